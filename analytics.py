@@ -0,0 +1,243 @@
+"""
+Growth and time-series analytics over a (country, year) matrix.
+
+Every metric is computed for all countries and years at once with NumPy
+array operations instead of a loop per country: year-over-year growth,
+compound annual growth between any two years, ranks and rank
+movement, share of the world total and rolling aggregates. GrowthAnalytics
+bundles them for one indicator of a dataset version so they are computed
+once and shared, like YearRankings.
+
+Missing values stay NaN throughout: a metric is NaN wherever one of its
+inputs is missing.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+def yoy_growth(matrix):
+    """
+    Year-over-year growth of every country
+
+    Args:
+        matrix: Float array of shape (countries, years)
+
+    Returns:
+        Array of the same shape with the growth from the previous year as a
+        fraction (0.05 = 5%); the first year is NaN
+    """
+    growth = np.full(matrix.shape, np.nan)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        growth[:, 1:] = matrix[:, 1:] / matrix[:, :-1] - 1
+    growth[~np.isfinite(growth)] = np.nan
+    return growth
+
+
+def log_values(matrix):
+    """Natural log of the values, NaN where they are missing or not positive"""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        logs = np.log(matrix)
+    logs[~np.isfinite(logs)] = np.nan
+    return logs
+
+
+def cagr(logs, years, start, end):
+    """
+    Compound annual growth rate of every country between two years
+
+    Args:
+        logs: Array of shape (countries, years) from log_values()
+        years: Integer years along the columns of logs
+        start: Column index of the first year
+        end: Column index of the last year
+
+    Returns:
+        Array of shape (countries,), NaN where a value is missing or not
+        positive, or when end isn't after start
+    """
+    span = years[end] - years[start]
+    if span <= 0:
+        return np.full(logs.shape[0], np.nan)
+    return np.expm1((logs[:, end] - logs[:, start]) / span)
+
+
+def rank_matrix(matrix, order=None):
+    """
+    Rank of every country in every year, 1 for the largest value
+
+    Args:
+        matrix: Float array of shape (countries, years)
+        order: Descending argsort of matrix along axis 0, if already known
+            (e.g. YearRankings.order)
+
+    Returns:
+        Float array of the same shape, NaN where the value is missing
+    """
+    if order is None:
+        # Descending order per column; NaNs sort last when negated
+        order = np.argsort(-matrix, axis=0, kind="stable")
+    ranks = np.empty(matrix.shape)
+    positions = np.arange(1, matrix.shape[0] + 1, dtype=np.float64)[:, None]
+    np.put_along_axis(ranks, order, positions, axis=0)
+    ranks[np.isnan(matrix)] = np.nan
+    return ranks
+
+
+def world_share(matrix):
+    """
+    Share of every country in the total of all countries, per year
+
+    Args:
+        matrix: Float array of shape (countries, years)
+
+    Returns:
+        Array of the same shape with fractions of the column totals
+    """
+    totals = np.nansum(matrix, axis=0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(totals > 0, matrix / totals, np.nan)
+
+
+def rolling(matrix, window, how="mean"):
+    """
+    Rolling aggregate over the years, ending at each year
+
+    Args:
+        matrix: Float array of shape (countries, years)
+        window: Number of years per window
+        how: "mean" or "sum"
+
+    Returns:
+        Array of the same shape, NaN until a full window of values exists
+    """
+    filled = np.nan_to_num(matrix, nan=0.0)
+    present = (~np.isnan(matrix)).astype(np.int64)
+
+    # Window sums as differences of cumulative sums along the year axis
+    zeros = np.zeros((matrix.shape[0], 1))
+    cum = np.concatenate([zeros, filled.cumsum(axis=1)], axis=1)
+    counts = np.concatenate([zeros, present.cumsum(axis=1)], axis=1)
+
+    result = np.full(matrix.shape, np.nan)
+    if window <= matrix.shape[1]:
+        sums = cum[:, window:] - cum[:, :-window]
+        full = (counts[:, window:] - counts[:, :-window]) == window
+        values = sums / window if how == "mean" else sums
+        result[:, window - 1 :] = np.where(full, values, np.nan)
+    return result
+
+
+class GrowthAnalytics:
+    """All growth metrics of one indicator, computed once for every country and year"""
+
+    def __init__(
+        self, countries, matrix, years, iso=None, rolling_window=3, order=None
+    ):
+        """
+        Args:
+            countries: Country names along the rows of matrix
+            matrix: Float array of shape (countries, years), NaN when missing
+            years: Integer years along the columns of matrix
+            iso: ISO-3 codes matching countries (None where unknown)
+            rolling_window: Number of years of the rolling mean
+            order: Descending argsort of matrix along axis 0, if already known
+        """
+        self.matrix = np.asarray(matrix, dtype=np.float64)
+        self.countries = np.asarray(countries, dtype=object)
+        if iso is None:
+            iso = [None] * len(self.countries)
+        self.iso = np.asarray(iso, dtype=object)
+        self.years = np.asarray(years, dtype=np.int64)
+        self.year_labels = [str(year) for year in self.years]
+        self._year_pos = {year: i for i, year in enumerate(self.year_labels)}
+        self._country_pos = {country: i for i, country in enumerate(self.countries)}
+
+        self.yoy = yoy_growth(self.matrix)
+        # Logs make the CAGR between any two years a single subtraction
+        self.logs = log_values(self.matrix)
+        self.ranks = rank_matrix(self.matrix, order)
+        self.share = world_share(self.matrix)
+        self.rolling_window = rolling_window
+        self.rolling_mean = rolling(self.matrix, rolling_window)
+
+    @property
+    def nbytes(self):
+        arrays = (self.matrix, self.yoy, self.logs, self.ranks, self.share)
+        return sum(a.nbytes for a in arrays) + self.rolling_mean.nbytes
+
+    def cagr(self, base_year, year):
+        """
+        Return the CAGR of every country between two years
+
+        Args:
+            base_year: First year label
+            year: Last year label
+
+        Returns:
+            Array of shape (countries,)
+        """
+        i = self._year_pos[base_year]
+        j = self._year_pos[year]
+        return cagr(self.logs, self.years, i, j)
+
+    def series(self, countries, metric="value"):
+        """
+        Return one metric over all years for some countries
+
+        Args:
+            countries: Country names
+            metric: "value", "yoy", "share", "rank" or "rolling"
+
+        Returns:
+            Long DataFrame with Country, Year and the metric column, for
+            line charts
+        """
+        data = {
+            "value": self.matrix,
+            "yoy": self.yoy,
+            "share": self.share,
+            "rank": self.ranks,
+            "rolling": self.rolling_mean,
+        }[metric]
+        rows = np.array(
+            [self._country_pos[c] for c in countries if c in self._country_pos],
+            dtype=np.int64,
+        )
+        return pd.DataFrame(
+            {
+                "Country": np.repeat(self.countries[rows], len(self.years)),
+                "Year": np.tile(self.years, len(rows)),
+                metric: data[rows].ravel(),
+            }
+        ).dropna(subset=[metric])
+
+    def summary(self, year, base_year):
+        """
+        Return every metric for every country in a year, compared to a base year
+
+        Args:
+            year: Year label, e.g. "2025"
+            base_year: Earlier year label for CAGR and rank change
+
+        Returns:
+            DataFrame with Country, ISO, Value, YoY, Share, Rolling, Rank,
+            Rank change (positive = moved up) and CAGR columns, sorted by
+            rank, without countries that have no value in the year
+        """
+        j = self._year_pos[year]
+        i = self._year_pos[base_year]
+        frame = pd.DataFrame(
+            {
+                "Country": self.countries,
+                "ISO": self.iso,
+                "Value": self.matrix[:, j],
+                "YoY": self.yoy[:, j],
+                "Share": self.share[:, j],
+                "Rolling": self.rolling_mean[:, j],
+                "Rank": self.ranks[:, j],
+                "Rank change": self.ranks[:, i] - self.ranks[:, j],
+                "CAGR": cagr(self.logs, self.years, i, j),
+            }
+        )
+        return frame.dropna(subset=["Value"]).sort_values("Rank").reset_index(drop=True)
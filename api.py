@@ -0,0 +1,424 @@
+"""
+Headless HTTP API serving the GDP dataset alongside the Streamlit UI.
+
+Dashboards and batch jobs can query the same data the app shows without a
+browser session: it reuses the ingest, snapshot store and processed views
+of gdp_data, so every request is served from one in-memory dataset.
+
+Endpoints:
+    GET /api/v1/years
+    GET /api/v1/rankings/<year>?page=0&page_size=25[&indicator=&vintage=]
+    GET /api/v1/growth/<year>?base=<year>[&indicator=&vintage=]
+    GET /api/v1/groups/<year>[?family=]
+    GET /api/v1/countries/<ISO-3 code or name>[?indicator=&vintage=]
+    GET /api/v1/indicators/<indicator>.arrow[?vintage=]
+    GET /metrics (Prometheus text format), GET /api/v1/metrics (JSON)
+
+Responses carry an ETag derived from the dataset version, so clients
+sending If-None-Match get a 304 without the body being rebuilt, and are
+gzip-compressed when the client accepts it. Loading the dataset and
+building response bodies run on the IOLoop's thread pool, so one slow
+request doesn't hold up the others.
+
+Usage:
+    python api.py [--port 8502] [--processes 1]
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import math
+import threading
+
+import numpy as np
+import pyarrow as pa
+import tornado.ioloop
+import tornado.web
+from tornado.httpserver import HTTPServer
+
+from country_codes import resolve_iso3
+from gdp_data import (
+    get_analytics,
+    get_group_aggregates,
+    get_processed_view,
+    load_gdp_data,
+    process_data,
+    start_refresh_scheduler,
+)
+from imf_data import GDP_INDICATOR
+from instrumentation import metrics
+
+ARROW_CONTENT_TYPE = "application/vnd.apache.arrow.stream"
+
+DEFAULT_PAGE_SIZE = 25
+MAX_PAGE_SIZE = 1000
+
+# (dataset version, indicator, vintage, gzipped) -> Arrow IPC bytes of an
+# indicator dump, compressed or not
+_arrow_dumps = {}
+_arrow_lock = threading.Lock()
+
+
+def run_blocking(func, *args):
+    """Run CPU or IO bound work on the IOLoop's thread pool"""
+    return tornado.ioloop.IOLoop.current().run_in_executor(None, func, *args)
+
+
+class DatasetHandler(tornado.web.RequestHandler):
+    """Base handler answering from the shared dataset with version ETags"""
+
+    async def prepare(self):
+        await self.load()
+        if self.check_etag_header():
+            self.set_status(304)
+            self.finish()
+
+    async def load(self):
+        with metrics.stage("load"):
+            self.cube, self.version = await run_blocking(load_gdp_data)
+        # The response only depends on the dataset version and the URL
+        self.set_etag_header()
+
+    async def shared(self, get, *args):
+        """
+        Return a per-version result of gdp_data, such as get_analytics()
+
+        Newer versions swapped in since prepare() can have evicted the
+        request's version, so the dataset is loaded again once.
+
+        Raises:
+            HTTPError: 503 if the version is evicted again
+        """
+        result = await run_blocking(get, self.version, *args)
+        if result is None:
+            await self.load()
+            result = await run_blocking(get, self.version, *args)
+        if result is None:
+            raise tornado.web.HTTPError(503, reason="The dataset is being updated")
+        return result
+
+    def compute_etag(self):
+        digest = hashlib.sha1(f"{self.version} {self.request.uri}".encode()).hexdigest()
+        return f'"{digest}"'
+
+    def indicator_and_vintage(self, indicator=None):
+        indicator = indicator or self.get_argument("indicator", GDP_INDICATOR)
+        vintage = self.get_argument("vintage", None)
+        if indicator not in self.cube.indicators:
+            raise tornado.web.HTTPError(404, reason=f"Unknown indicator {indicator}")
+        if vintage is not None and vintage not in self.cube.vintages:
+            raise tornado.web.HTTPError(404, reason=f"Unknown vintage {vintage}")
+        return indicator, vintage
+
+    def write_json(self, payload):
+        self.set_header("Content-Type", "application/json")
+        self.write(json.dumps(payload, separators=(",", ":")))
+
+    async def respond(self, build, *args):
+        """Build a JSON payload on the thread pool and write it"""
+        body = await run_blocking(
+            lambda: json.dumps(build(*args), separators=(",", ":"))
+        )
+        self.set_header("Content-Type", "application/json")
+        self.write(body)
+
+    def write_error(self, status_code, **kwargs):
+        self.write_json({"error": self._reason, "status": status_code})
+
+    def on_finish(self):
+        # Handler name as the stage, e.g. "api:RankingsHandler"
+        metrics.observe(
+            "stage_seconds", f"api:{type(self).__name__}", self.request.request_time()
+        )
+        metrics.count("api_responses", str(self.get_status()))
+
+
+class MetricsHandler(tornado.web.RequestHandler):
+    """Process metrics for Prometheus (/metrics) or as JSON (/api/v1/metrics)"""
+
+    def initialize(self, fmt):
+        self.fmt = fmt
+
+    def get(self):
+        if self.fmt == "prometheus":
+            self.set_header("Content-Type", "text/plain; version=0.0.4")
+            self.write(metrics.prometheus())
+        else:
+            self.set_header("Content-Type", "application/json")
+            self.write(json.dumps(metrics.snapshot(), separators=(",", ":")))
+
+
+def _json_number(value):
+    # The cube holds float32, so use the shortest decimal that round-trips
+    return None if math.isnan(value) else float(str(np.float32(value)))
+
+
+class YearsHandler(DatasetHandler):
+    def get(self):
+        self.write_json(
+            {
+                "version": self.version,
+                "vintages": self.cube.vintages,
+                "indicators": self.cube.indicators,
+                "years": self.cube.year_labels,
+            }
+        )
+
+
+class RankingsHandler(DatasetHandler):
+    async def get(self, year):
+        await self.respond(self.rankings, year)
+
+    def rankings(self, year):
+        indicator, vintage = self.indicator_and_vintage()
+        if not self.cube.has_year(year):
+            raise tornado.web.HTTPError(404, reason=f"No data for {year}")
+
+        try:
+            page = int(self.get_argument("page", "0"))
+            page_size = int(self.get_argument("page_size", str(DEFAULT_PAGE_SIZE)))
+        except ValueError:
+            raise tornado.web.HTTPError(400, reason="page and page_size must be integers")
+        if page < 0 or not 0 < page_size <= MAX_PAGE_SIZE:
+            raise tornado.web.HTTPError(400, reason="page or page_size out of range")
+
+        # The app's GDP views are shared; other indicators are ranked on demand
+        if indicator == GDP_INDICATOR and vintage is None:
+            ranked = get_processed_view(self.cube, self.version, year)
+        else:
+            ranked = process_data(self.cube, year, indicator, vintage)
+
+        start = page * page_size
+        page_df = ranked.iloc[start : start + page_size]
+        return {
+                "version": self.version,
+                "indicator": indicator,
+                "year": year,
+                "page": page,
+                "page_size": page_size,
+                "total": len(ranked),
+                "pages": math.ceil(len(ranked) / page_size),
+                "rows": [
+                    {
+                        "rank": rank,
+                        "country": country,
+                        "iso": iso,
+                        "value": _json_number(value),
+                    }
+                    for rank, country, iso, value in zip(
+                        range(start + 1, start + len(page_df) + 1),
+                        page_df["Country"],
+                        page_df["ISO"],
+                        page_df["GDP (Billions USD)"],
+                    )
+                ],
+            }
+
+
+class GrowthHandler(DatasetHandler):
+    async def get(self, year):
+        indicator, vintage = self.indicator_and_vintage()
+        analytics = await self.shared(get_analytics, indicator, vintage)
+        await self.respond(self.growth, analytics, year, indicator)
+
+    def growth(self, analytics, year, indicator):
+        base_year = self.get_argument("base", self.cube.year_labels[0])
+        if year not in analytics.year_labels or base_year not in analytics.year_labels:
+            raise tornado.web.HTTPError(404, reason=f"No data for {year} or {base_year}")
+
+        summary = analytics.summary(year, base_year)
+        return {
+                "version": self.version,
+                "indicator": indicator,
+                "year": year,
+                "base_year": base_year,
+                "rows": [
+                    {
+                        "country": country,
+                        "iso": iso,
+                        "value": _json_number(value),
+                        "yoy": _float_or_none(yoy),
+                        "share": _float_or_none(share),
+                        "rolling_mean": _float_or_none(rolling_mean),
+                        "rank": int(rank),
+                        "rank_change": _float_or_none(rank_change),
+                        "cagr": _float_or_none(cagr),
+                    }
+                    for (
+                        country,
+                        iso,
+                        value,
+                        yoy,
+                        share,
+                        rolling_mean,
+                        rank,
+                        rank_change,
+                        cagr,
+                    ) in zip(*(summary[col] for col in summary.columns))
+                ],
+            }
+
+
+def _float_or_none(value):
+    return None if math.isnan(value) else float(value)
+
+
+class GroupsHandler(DatasetHandler):
+    async def get(self, year):
+        aggregates = await self.shared(get_group_aggregates)
+        await self.respond(self.groups, aggregates, year)
+
+    def groups(self, aggregates, year):
+        if year not in aggregates:
+            raise tornado.web.HTTPError(404, reason=f"No data for {year}")
+        family = self.get_argument("family", None)
+        if family is not None and family not in aggregates.index.families:
+            raise tornado.web.HTTPError(404, reason=f"Unknown group family {family}")
+
+        groups = aggregates.view(year, family)
+        return {
+                "version": self.version,
+                "indicator": GDP_INDICATOR,
+                "year": year,
+                "rows": [
+                    {
+                        "group": group,
+                        "family": group_family,
+                        "total": _json_number(total),
+                        "members": int(members),
+                        "reporting": int(reporting),
+                        "average": _json_number(average),
+                    }
+                    for group, group_family, total, members, reporting, average in zip(
+                        groups["Country"],
+                        groups["Family"],
+                        groups["GDP (Billions USD)"],
+                        groups["Members"],
+                        groups["Reporting"],
+                        groups["Average"],
+                    )
+                ],
+            }
+
+
+class CountryHandler(DatasetHandler):
+    async def get(self, country):
+        await self.respond(self.country, country)
+
+    def country(self, country):
+        indicator, vintage = self.indicator_and_vintage()
+
+        iso = resolve_iso3(country)
+        matches = np.flatnonzero(
+            (self.cube.iso == iso) if iso else (self.cube.countries == country)
+        )
+        if not len(matches):
+            raise tornado.web.HTTPError(404, reason=f"Unknown country {country}")
+
+        i = matches[0]
+        values = self.cube.matrix(indicator, vintage)[i]
+        return {
+                "version": self.version,
+                "country": self.cube.countries[i],
+                "iso": self.cube.iso[i],
+                "indicator": indicator,
+                "vintage": vintage or self.cube.latest_vintage,
+                "years": self.cube.year_labels,
+                "values": [_json_number(value) for value in values],
+            }
+
+
+class IndicatorDumpHandler(DatasetHandler):
+    async def get(self, indicator):
+        indicator, vintage = self.indicator_and_vintage(indicator)
+        gzipped = "gzip" in self.request.headers.get("Accept-Encoding", "")
+        body = await run_blocking(self.dump, indicator, vintage, gzipped)
+
+        self.set_header("Content-Type", ARROW_CONTENT_TYPE)
+        if gzipped:
+            # Compressed once per version here, so the gzip transform skips it
+            self.set_header("Content-Encoding", "gzip")
+        self.write(body)
+
+    def dump(self, indicator, vintage, gzipped):
+        key = (self.version, indicator, vintage, gzipped)
+        with _arrow_lock:
+            body = _arrow_dumps.get(key)
+        if body is None:
+            body = indicator_arrow_ipc(self.cube, indicator, vintage)
+            if gzipped:
+                level = tornado.web.GZipContentEncoding.GZIP_LEVEL
+                body = gzip.compress(body, compresslevel=level)
+            with _arrow_lock:
+                # Keep only dumps of the current dataset version
+                for stale_key in [k for k in _arrow_dumps if k[0] != self.version]:
+                    del _arrow_dumps[stale_key]
+                _arrow_dumps[key] = body
+        return body
+
+
+def indicator_arrow_ipc(cube, indicator, vintage=None):
+    """
+    Serialize one indicator as an Arrow IPC stream
+
+    Returns:
+        Bytes of a table with Country, ISO and one float32 column per year
+    """
+    matrix = cube.matrix(indicator, vintage)
+    columns = {
+        "Country": pa.array(cube.countries, type=pa.string()),
+        "ISO": pa.array(cube.iso, type=pa.string()),
+    }
+    for j, year in enumerate(cube.year_labels):
+        # NaN marks missing values in the cube; Arrow uses nulls
+        column = matrix[:, j]
+        columns[year] = pa.array(column, mask=np.isnan(column), type=pa.float32())
+
+    table = pa.table(columns)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def make_app():
+    """Create the Tornado application with all API routes"""
+    return tornado.web.Application(
+        [
+            (r"/api/v1/years", YearsHandler),
+            (r"/api/v1/rankings/(\d{4})", RankingsHandler),
+            (r"/api/v1/growth/(\d{4})", GrowthHandler),
+            (r"/api/v1/groups/(\d{4})", GroupsHandler),
+            (r"/api/v1/metrics", MetricsHandler, {"fmt": "json"}),
+            (r"/metrics", MetricsHandler, {"fmt": "prometheus"}),
+            (r"/api/v1/countries/([^/]+)", CountryHandler),
+            (r"/api/v1/indicators/([^/.]+)\.arrow", IndicatorDumpHandler),
+        ],
+        compress_response=True,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless GDP data API")
+    parser.add_argument("--port", type=int, default=8502)
+    parser.add_argument(
+        "--processes",
+        type=int,
+        default=1,
+        help="Number of server processes sharing the port (0 = one per CPU)",
+    )
+    args = parser.parse_args()
+
+    server = HTTPServer(make_app(), xheaders=True)
+    server.bind(args.port)
+    server.start(args.processes)
+
+    # Load the dataset before taking requests so the first one isn't slow
+    load_gdp_data()
+    start_refresh_scheduler()
+    tornado.ioloop.IOLoop.current().start()
+
+
+if __name__ == "__main__":
+    main()
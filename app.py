@@ -1,26 +1,17 @@
 import streamlit as st
-import pandas as pd
-import plotly.express as px
-import requests
-import io
-import re
-import numpy as np
 import math
-from functools import lru_cache
+import os
+from datetime import datetime, timezone
 
 # Set page configuration
 st.set_page_config(page_title="Global GDP Visualization", page_icon="📊", layout="wide")
 
-# Custom CSS to improve the UI
+# The header goes out before the app's modules are imported, so a new worker
+# paints it while pandas, pyarrow and Plotly load. The other styles follow
+# the imports.
 st.markdown(
     """
 <style>
-    /* Overall app styling */
-    .main {
-        background-color: #f8f9fa;
-        color: #212529;
-    }
-    
     /* Title styling */
     h1 {
         color: #0466c8;
@@ -39,6 +30,113 @@ st.markdown(
         line-height: 1.6;
     }
     
+    /* App header container */
+    .app-header {
+        display: flex;
+        align-items: center;
+        margin-bottom: 0.5rem;
+        margin-top: 1rem;
+    }
+    
+    /* Globe icon styling */
+    .globe-icon {
+        font-size: 2.5rem;
+        margin-right: 0.5rem;
+        vertical-align: middle;
+        display: inline-block;
+    }
+    
+    /* For mobile responsiveness */
+    @media (max-width: 768px) {
+        h1 {
+            font-size: 1.8rem !important;
+        }
+        .globe-icon {
+            font-size: 2rem;
+        }
+    }
+</style>
+""",
+    unsafe_allow_html=True,
+)
+
+# Custom header with styled title and globe icon
+st.markdown(
+    """<div class="app-header">
+    <span class="globe-icon">🌍</span><h1 style="display: inline-block; margin-top: 0;">Global GDP Visualization</h1>
+    </div>""",
+    unsafe_allow_html=True,
+)
+
+# App description with improved styling
+st.markdown(
+    """<div class="app-description">
+    This application visualizes GDP data from the International Monetary Fund (IMF),
+    sourced directly from the IMF's World Economic Outlook database.
+    </div>""",
+    unsafe_allow_html=True,
+)
+
+from figure_cache import figure_cache  # noqa: E402
+from figures import (  # noqa: E402
+    TIMELINE_TOP_N,
+    TREND_METRICS,
+    create_gdp_chart,
+    create_gdp_map,
+    create_gdp_map_lite,
+    create_group_map,
+    create_rank_change_chart,
+    create_timeline_chart,
+    create_timeline_map,
+    create_trend_chart,
+)
+from gdp_data import (  # noqa: E402
+    data_as_of,
+    get_analytics,
+    get_group_aggregates,
+    get_processed_view,
+    get_timeline,
+    load_gdp_data,
+    memory_report,
+    revisions,
+    start_refresh_scheduler,
+    year_version,
+)
+from groups import PARTITIONS, group_families  # noqa: E402
+from imf_data import DEFAULT_YEAR, GDP_INDICATOR  # noqa: E402
+from instrumentation import metrics, start_metrics_server  # noqa: E402
+
+# Render only the selected view instead of all tabs (GDP_LAZY_VIEWS=0 disables)
+LAZY_VIEWS = os.environ.get("GDP_LAZY_VIEWS", "1") != "0"
+
+# Map detail options -> border resolution of the lightweight map (None for the full map)
+MAP_MODES = {
+    "Full": None,
+    "Light": 110,
+}
+
+# Map detail selected by default (GDP_MAP_MODE=light for constrained clients)
+DEFAULT_MAP_MODE = "Light" if os.environ.get("GDP_MAP_MODE") == "light" else "Full"
+
+# Aggregate mode showing individual countries; the others are group families
+COUNTRIES_MODE = "Countries"
+
+# Rows sent per step in "All" mode; more are loaded on request
+ALL_WINDOW_ROWS = int(os.environ.get("GDP_ALL_WINDOW_ROWS", "50"))
+
+# Show the rerun profile in the sidebar (also enabled with ?debug=1)
+DEBUG_PANEL = os.environ.get("GDP_DEBUG_PANEL") == "1"
+
+# Custom CSS to improve the UI
+st.markdown(
+    """
+<style>
+    /* Overall app styling */
+    .main {
+        background-color: #f8f9fa;
+        color: #212529;
+    }
+    
     /* Tabs styling - eliminate white space */
     .stTabs {
         background-color: transparent !important;
@@ -68,6 +166,19 @@ st.markdown(
     }
     
     
+    /* View selector (lazy views) styled like the tabs */
+    div[data-testid="stRadio"] [role="radiogroup"] {
+        gap: 1.5rem;
+        border-bottom: 1px solid #e9ecef;
+        padding-bottom: 0.25rem;
+    }
+    
+    div[data-testid="stRadio"] label p {
+        font-size: 1rem;
+        font-weight: 600;
+    }
+    
+    
     /* Year selector styling */
     .year-selector {
         margin-bottom: 0.125rem;
@@ -176,338 +287,12 @@ st.markdown(
         font-size: 0.9rem;
     }
     
-    /* App header container */
-    .app-header {
-        display: flex;
-        align-items: center;
-        margin-bottom: 0.5rem;
-        margin-top: 1rem;
-    }
-    
-    /* Globe icon styling */
-    .globe-icon {
-        font-size: 2.5rem;
-        margin-right: 0.5rem;
-        vertical-align: middle;
-        display: inline-block;
-    }
-    
-    /* For mobile responsiveness */
-    @media (max-width: 768px) {
-        h1 {
-            font-size: 1.8rem !important;
-        }
-        .globe-icon {
-            font-size: 2rem;
-        }
-    }
 </style>
 """,
     unsafe_allow_html=True,
 )
 
 
-@lru_cache(maxsize=1)
-def fetch_imf_gdp_data():
-    """
-    Fetch GDP data directly from the IMF's World Economic Outlook database
-    Returns a pandas DataFrame with the data
-    """
-    # IMF data URL - World Economic Outlook database
-    url = "https://www.imf.org/en/Publications/WEO/weo-database/2024/October/weo-report?c=512,914,612,171,614,311,213,911,314,193,122,912,313,419,513,316,913,124,339,638,514,218,963,616,223,516,918,748,618,624,522,622,156,626,628,228,924,233,632,636,634,238,662,960,423,935,128,611,321,243,248,469,253,642,643,939,734,644,819,172,132,646,648,915,134,652,174,328,258,656,654,336,263,268,532,944,176,534,536,429,433,178,436,136,343,158,439,916,664,826,542,967,443,917,544,941,446,666,668,672,946,137,546,674,676,548,556,678,181,867,682,684,273,868,921,948,943,686,688,518,728,836,558,138,196,278,692,694,962,142,449,564,565,283,853,288,293,566,964,182,359,453,968,922,714,862,135,716,456,722,942,718,724,576,936,961,813,726,199,733,184,524,361,362,364,732,366,144,146,463,528,923,738,578,537,742,866,369,744,186,925,869,746,926,466,112,111,298,927,846,299,582,487,474,754,698,&s=NGDPD,&sy=2022&ey=2029&ssm=0&scsm=1&scc=0&ssd=1&ssc=0&sic=0&sort=country&ds=.&br=1"
-
-    try:
-        # Use pandas to read the HTML table directly
-        tables = pd.read_html(url)
-
-        # Find the GDP data table - typically the largest table
-        gdp_df = None
-        max_rows = 0
-        selected_table_idx = -1
-
-        for i, table in enumerate(tables):
-            if len(table) > max_rows:
-                max_rows = len(table)
-                gdp_df = table
-                selected_table_idx = i
-
-        if gdp_df is None or max_rows < 10:  # Ensure we have a substantial table
-            st.error("Couldn't find GDP data table on the IMF website")
-            return None
-
-        # Get all column names
-        col_names = list(gdp_df.columns)
-
-        # Find the column containing country names
-        country_col = None
-        for col in col_names:
-            if "country" in str(col).lower():
-                country_col = col
-                break
-
-        if country_col is None:
-            # If we can't find a column with 'country' in the name, assume it's the first column
-            country_col = col_names[0]
-
-        # Find year columns (columns with 4-digit numbers)
-        year_cols = []
-        for col in col_names:
-            if re.search(r"\b20\d\d\b", str(col)):
-                year_cols.append(col)
-
-        if not year_cols:
-            # If we can't find year columns, look for numeric columns or columns with year-like names
-            for col in col_names:
-                # Check if column name itself contains a 4-digit year
-                if isinstance(col, tuple) and any(
-                    re.search(r"\b20\d\d\b", str(part)) for part in col
-                ):
-                    year_cols.append(col)
-                # Check if the column contains numeric data
-                elif col != country_col and pd.api.types.is_numeric_dtype(gdp_df[col]):
-                    year_cols.append(col)
-                # Check if column name contains "year" or "unnamed"
-                elif "year" in str(col).lower() or "unnamed" in str(col).lower():
-                    year_cols.append(col)
-
-        # Create a new dataframe with just the country and year columns
-        clean_df = pd.DataFrame()
-        clean_df["Country"] = gdp_df[country_col].astype(str)
-
-        # Convert years to string format YYYY
-        expected_years = [
-            "2022",
-            "2023",
-            "2024",
-            "2025",
-            "2026",
-            "2027",
-            "2028",
-            "2029",
-        ]
-
-        # If we found year columns, use them
-        if year_cols:
-            for i, year_col in enumerate(year_cols):
-                if i < len(expected_years):
-                    year = expected_years[i]
-                    # Extract the values and convert to numeric
-                    clean_df[year] = pd.to_numeric(gdp_df[year_col], errors="coerce")
-        # If no year columns were found, try to use position-based approach
-        else:
-            # Assume years are in columns 1-8 (after country column)
-            for i, year in enumerate(expected_years):
-                col_idx = i + 1  # Skip the country column
-                if col_idx < len(col_names):
-                    col = col_names[col_idx]
-                    clean_df[year] = pd.to_numeric(gdp_df[col], errors="coerce")
-
-        # Remove rows with missing or invalid country names
-        clean_df = clean_df[clean_df["Country"].str.len() > 2]
-
-        # Remove rows that are not countries (headers, footers, etc.)
-        clean_df = clean_df[
-            ~clean_df["Country"].str.contains(
-                "International Monetary Fund|Subject|Descriptor|Gross domestic product",
-                regex=True,
-                case=False,
-            )
-        ]
-
-        return clean_df
-
-    except Exception as e:
-        st.error(f"Error processing IMF data: {e}")
-        import traceback
-
-        return None
-
-
-def process_data(df, selected_year):
-    """
-    Process the GDP data for visualization
-
-    Args:
-        df: DataFrame with GDP data
-        selected_year: Year to filter the data by
-
-    Returns:
-        Processed DataFrame sorted by GDP
-    """
-    if df is None:
-        return None
-
-    # Select data for the chosen year
-    if selected_year not in df.columns:
-        st.warning(
-            f"Data for {selected_year} not available. Defaulting to the most recent year."
-        )
-        # Get the most recent year from the numeric columns
-        year_columns = [col for col in df.columns if col != "Country"]
-        selected_year = year_columns[-1]
-
-    # Filter and sort the data
-    filtered_df = df[["Country", selected_year]].copy()
-    filtered_df = filtered_df.dropna(subset=[selected_year])
-    filtered_df = filtered_df.sort_values(by=selected_year, ascending=False)
-
-    # Format GDP values in billions with no decimals
-    filtered_df["GDP (Billions USD)"] = filtered_df[selected_year]
-    filtered_df["GDP_formatted"] = filtered_df["GDP (Billions USD)"].apply(
-        lambda x: f"{int(x)}" if not pd.isna(x) else ""
-    )
-
-    return filtered_df
-
-
-def create_gdp_chart(df, selected_year, countries_per_page=25, page=0):
-    """
-    Create a bar chart visualization of GDP data
-
-    Args:
-        df: Processed DataFrame with GDP data
-        selected_year: Selected year for the data
-        countries_per_page: Number of countries to display per page
-        page: Current page number (0-indexed)
-
-    Returns:
-        Plotly figure object
-    """
-    if df is None or df.empty:
-        return None
-
-    # Calculate pagination
-    start_idx = page * countries_per_page
-    end_idx = start_idx + countries_per_page
-
-    # Get the subset of data for the current page
-    page_df = df.iloc[start_idx:end_idx].copy()
-
-    # Calculate dynamic height based on number of countries (minimum 600px)
-    # Each country bar needs about 30px of height
-    height = max(600, countries_per_page * 30)
-
-    # Create bar chart using Plotly
-    fig = px.bar(
-        page_df,
-        y="Country",
-        x="GDP (Billions USD)",
-        text="GDP_formatted",
-        orientation="h",
-        title=f"GDP in {selected_year} (USD Billions)",
-        labels={"GDP (Billions USD)": "GDP (Billions USD)", "Country": ""},
-        height=height,
-        # Use a single color instead of a color scale
-        color_discrete_sequence=["#0466c8"],  # Updated to match theme
-    )
-
-    # Customize the appearance
-    fig.update_layout(
-        xaxis_title="GDP (Billions USD)",
-        yaxis={
-            "categoryorder": "total ascending",
-            "automargin": True,  # Give more space for country names
-            "title": None,
-            "tickfont": {"size": 12, "color": "#495057"},
-        },
-        font=dict(size=12),
-        margin=dict(l=20, r=20, t=50, b=20),
-        # Remove color axis/colorbar
-        coloraxis_showscale=False,
-        # Improve the appearance of the plot with better styling
-        plot_bgcolor="white",
-        paper_bgcolor="white",
-        title={
-            "font": {"size": 18, "color": "#212529", "family": "Arial, sans-serif"},
-            "x": 0.5,
-            "xanchor": "center",
-        },
-        xaxis={
-            "showgrid": True,
-            "gridwidth": 1,
-            "gridcolor": "#f1f3f5",
-            "title": {"font": {"size": 14, "color": "#495057"}},
-        },
-    )
-
-    fig.update_traces(
-        textposition="outside",
-        hovertemplate="<b>%{y}</b><br>GDP: %{text}<extra></extra>",
-        marker_line_width=0,
-        # Adding a slight gradient effect to bars
-        marker_color="#0466c8",
-        opacity=0.9,
-    )
-
-    return fig
-
-
-def create_gdp_map(df, selected_year):
-    """
-    Create a choropleth map visualization of GDP data
-
-    Args:
-        df: Processed DataFrame with GDP data
-        selected_year: Selected year for the data
-
-    Returns:
-        Plotly figure object
-    """
-    if df is None or df.empty:
-        return None
-
-    # Create choropleth map using Plotly
-    fig = px.choropleth(
-        df,
-        locations="Country",  # Use country names
-        locationmode="country names",  # Match names to country boundaries
-        color="GDP (Billions USD)",
-        hover_name="Country",
-        color_continuous_scale="YlGnBu",  # Yellow-Green-Blue colorscale with 100 increments
-        range_color=[0, df["GDP (Billions USD)"].max()],  # Full range of values
-        title=f"Global GDP Distribution {selected_year} (USD Billions)",
-        labels={"GDP (Billions USD)": "GDP (Billions USD)"},
-        projection="natural earth",  # Use a more natural looking projection
-    )
-
-    # Customize the appearance
-    fig.update_layout(
-        coloraxis_colorbar=dict(
-            title="GDP (Billions USD)",
-            tickfont={"size": 12, "color": "#495057"},
-            titlefont={"size": 14, "color": "#495057"},
-            len=0.5,  # Make the colorbar shorter
-            # Use a logarithmic scale to better show the range of values
-            tickvals=[100, 1000, 5000, 10000, 20000, 30000],
-            ticktext=["100", "1.000", "5.000", "10.000", "20.000", "30.000"],
-            # Increase number of color segments for more granularity
-            nticks=100,
-        ),
-        margin=dict(l=0, r=0, t=50, b=0),
-        geo=dict(
-            showframe=False,
-            showcountries=True,
-            showcoastlines=True,
-            projection_type="equirectangular",
-            landcolor="rgb(240, 240, 240)",
-            oceancolor="rgb(220, 240, 255)",
-            coastlinecolor="rgb(150, 150, 150)",
-            countrycolor="rgb(150, 150, 150)",
-        ),
-        height=600,
-        # Improve the appearance of the plot with better styling
-        plot_bgcolor="white",
-        paper_bgcolor="white",
-        title={
-            "font": {"size": 18, "color": "#212529", "family": "Arial, sans-serif"},
-            "x": 0.5,
-            "xanchor": "center",
-        },
-    )
-
-    return fig
-
-
 def pagination_controls(total_items, items_per_page, current_page, location="top"):
     """Create pagination controls
 
@@ -609,6 +394,84 @@ def pagination_controls(total_items, items_per_page, current_page, location="top
             st.markdown("</div>", unsafe_allow_html=True)
 
 
+def page_bounds(total_items, items_per_page):
+    """
+    Return the rows of the current page that are sent to the browser
+
+    In "All" mode only the first visible_rows rows are sent, so the first
+    paint doesn't grow with the number of countries.
+
+    Returns:
+        Tuple of (start, end) row indices
+    """
+    start = st.session_state.current_page * items_per_page
+    end = min(start + items_per_page, total_items)
+    if st.session_state.countries_per_page == "All":
+        end = min(end, start + st.session_state.visible_rows)
+    return start, end
+
+
+def load_more_control(total_items, shown_items, location):
+    """
+    Offer to load the next window of rows in "All" mode
+
+    Args:
+        total_items: Total number of items
+        shown_items: Number of items currently sent
+        location: Identifier for the control location
+    """
+    if st.session_state.countries_per_page != "All" or shown_items >= total_items:
+        return
+
+    more = min(ALL_WINDOW_ROWS, total_items - shown_items)
+    if st.button(
+        f"Show {more} more ({shown_items} of {total_items} shown)",
+        key=f"more_{location}",
+        use_container_width=True,
+    ):
+        st.session_state.visible_rows = shown_items + more
+        st.rerun()
+
+
+def show_figure(key, build, stage):
+    """
+    Display a cached figure, timing how long it takes to build and send
+
+    Args:
+        key: Figure cache key
+        build: Callable building the figure on a cache miss
+        stage: Stage name prefix for the metrics, e.g. "chart"
+    """
+
+    def timed_build():
+        with metrics.stage(f"{stage}:build"):
+            return build()
+
+    with metrics.stage(f"{stage}:figure"):
+        fig = figure_cache.get_or_build(key, timed_build)
+    if not fig:
+        return
+
+    # Includes serializing the figure into the page
+    with metrics.stage(f"{stage}:plotly_chart"):
+        st.plotly_chart(fig, use_container_width=True)
+    payload = figure_cache.size(key)
+    if payload is not None:
+        metrics.record_bytes(f"{stage}:payload", payload)
+
+
+def group_family():
+    """Return the group family of the aggregate mode, None for countries"""
+    mode = st.session_state.get("aggregate_mode", COUNTRIES_MODE)
+    return None if mode == COUNTRIES_MODE else mode
+
+
+def figure_type(name):
+    """Return the figure cache type of a view, distinct per aggregate mode"""
+    family = group_family()
+    return name if family is None else (name, family)
+
+
 def reset_pagination():
     """Reset pagination to first page when changing items per page"""
     st.session_state.current_page = 0
@@ -622,31 +485,270 @@ def reset_pagination_with_value(value):
         value: Key of the selectbox that changed
     """
     st.session_state.current_page = 0
+    st.session_state.visible_rows = ALL_WINDOW_ROWS
 
     # Update the main countries_per_page value
     if value in st.session_state:
         st.session_state.countries_per_page = st.session_state[value]
 
 
-def main():
-    """Main function to run the Streamlit app"""
-    # Custom header with styled title and globe icon
-    st.markdown(
-        """<div class="app-header">
-        <span class="globe-icon">🌍</span><h1 style="display: inline-block; margin-top: 0;">Global GDP Visualization</h1>
-        </div>""",
-        unsafe_allow_html=True,
+def render_chart_view(processed_data, selected_year, data_version, countries_per_page):
+    """Render the bar chart for the current page and its pagination controls"""
+    st.markdown('<div class="content-container">', unsafe_allow_html=True)
+
+    # Display the chart for the current page, built once per process. In
+    # "All" mode the loaded window is charted as a single page
+    _, end_idx = page_bounds(len(processed_data), countries_per_page)
+    if st.session_state.countries_per_page == "All":
+        chart_page, chart_rows = 0, end_idx
+    else:
+        chart_page, chart_rows = st.session_state.current_page, countries_per_page
+    show_figure(
+        (data_version, selected_year, chart_page, chart_rows, figure_type("chart")),
+        lambda: create_gdp_chart(
+            processed_data,
+            selected_year,
+            countries_per_page=chart_rows,
+            page=chart_page,
+        ),
+        "chart",
     )
 
-    # App description with improved styling
-    st.markdown(
-        """<div class="app-description">
-        This application visualizes GDP data from the International Monetary Fund (IMF),
-        sourced directly from the IMF's World Economic Outlook database.
-        </div>""",
-        unsafe_allow_html=True,
+    st.markdown("</div>", unsafe_allow_html=True)
+
+    load_more_control(len(processed_data), end_idx, location="chart")
+
+    # Display pagination controls below the chart
+    pagination_controls(
+        len(processed_data),
+        countries_per_page,
+        st.session_state.current_page,
+        location="chart",
+    )
+
+
+def render_map_view(processed_data, selected_year, data_version, countries_per_page):
+    """Render the world map for the selected year"""
+    st.markdown('<div class="content-container">', unsafe_allow_html=True)
+
+    family = group_family()
+    if family is not None:
+        render_group_map(selected_year, data_version, family)
+        st.markdown("</div>", unsafe_allow_html=True)
+        return
+
+    map_mode = st.selectbox(
+        "Map detail",
+        list(MAP_MODES),
+        index=list(MAP_MODES).index(DEFAULT_MAP_MODE),
+        key="map_mode",
+    )
+    resolution = MAP_MODES[map_mode]
+
+    # Display the map visualization - identical for every page and user
+    if resolution is None:
+        show_figure(
+            (data_version, selected_year, None, None, "map"),
+            lambda: create_gdp_map(processed_data, selected_year),
+            "map",
+        )
+    else:
+        show_figure(
+            (data_version, selected_year, None, None, f"map-lite-{resolution}"),
+            lambda: create_gdp_map_lite(processed_data, selected_year, resolution),
+            "map",
+        )
+
+    st.markdown("</div>", unsafe_allow_html=True)
+
+
+def render_group_map(selected_year, data_version, family):
+    """Render the map of a group family, coloring countries by their group"""
+    if family not in PARTITIONS:
+        st.info(
+            f"Groups in {family} can overlap, so they aren't mapped. "
+            f"Choose {' or '.join(PARTITIONS)} to see groups on the map."
+        )
+        return
+
+    _, version = load_gdp_data()
+    aggregates = get_group_aggregates(version)
+    if aggregates is None or selected_year not in aggregates:
+        st.warning("Group data is not available yet.")
+        return
+
+    show_figure(
+        (data_version, selected_year, None, None, figure_type("map")),
+        lambda: create_group_map(
+            aggregates.map_view(selected_year, family), selected_year, family
+        ),
+        "map",
     )
 
+
+def render_table_view(processed_data, selected_year, data_version, countries_per_page):
+    """Render the data table for the current page and its pagination controls"""
+    st.markdown('<div class="content-container">', unsafe_allow_html=True)
+
+    # Show the data table for the current page
+    total_countries = len(processed_data)
+    start_idx, end_idx = page_bounds(total_countries, countries_per_page)
+    page_data = processed_data.iloc[start_idx:end_idx].copy()
+
+    if group_family() is None:
+        columns = ["Country", "GDP (Billions USD)"]
+        country_label = "Country/Territory"
+    else:
+        # Groups also show how many members reported and their average
+        columns = ["Country", "GDP (Billions USD)", "Members", "Reporting", "Average"]
+        country_label = "Group"
+
+    table = page_data[columns].reset_index(drop=True)
+    # Approximate payload: the frame's column buffers, which Arrow mirrors
+    metrics.record_bytes("table:payload", int(table.memory_usage(index=False).sum()))
+    with metrics.stage("table:dataframe"):
+        st.dataframe(
+            table,
+            column_config={
+                "Country": st.column_config.TextColumn(country_label, width="medium"),
+                "GDP (Billions USD)": st.column_config.NumberColumn(
+                    "GDP (Billions USD)", format="%d", width="small"
+                ),
+                "Members": st.column_config.NumberColumn(width="small"),
+                "Reporting": st.column_config.NumberColumn(
+                    "Reporting", help="Members with data for the year", width="small"
+                ),
+                "Average": st.column_config.NumberColumn(
+                    "Average per member (Billions USD)", format="%d", width="small"
+                ),
+            },
+            hide_index=True,
+            use_container_width=True,
+        )
+
+    st.markdown("</div>", unsafe_allow_html=True)
+
+    load_more_control(total_countries, end_idx, location="table")
+
+    # Display pagination controls for the table
+    pagination_controls(
+        total_countries,
+        countries_per_page,
+        st.session_state.current_page,
+        location="table_top",
+    )
+
+
+def render_trends_view(processed_data, selected_year, data_version, countries_per_page):
+    """Render growth metrics over the years and rank changes"""
+    st.markdown('<div class="content-container">', unsafe_allow_html=True)
+    try:
+        render_trends(processed_data, selected_year)
+    finally:
+        # Closed on every early return too, so the layout after it holds
+        st.markdown("</div>", unsafe_allow_html=True)
+
+
+def render_trends(processed_data, selected_year):
+    """Render the trend controls and charts inside the content container"""
+    # Trends span every year, so they're keyed by the full dataset version
+    _, version = load_gdp_data()
+    analytics = get_analytics(version)
+    if analytics is None:
+        st.warning("Trend data is not available yet.")
+        return
+
+    if group_family() is None:
+        default = list(processed_data["Country"].head(5))
+    else:
+        # Trends are per country; start from the largest ones in group mode
+        summary = analytics.summary(selected_year, selected_year)
+        default = list(summary["Country"].head(5))
+
+    controls = st.columns([3, 2])
+    with controls[0]:
+        countries = st.multiselect(
+            "Countries",
+            list(analytics.countries),
+            default=default,
+            key="trend_countries",
+        )
+    with controls[1]:
+        metric = st.selectbox("Metric", list(TREND_METRICS), key="trend_metric")
+
+    if countries:
+        column = TREND_METRICS[metric][1]
+        # The chart spans every year, so it's cached once, not per selected year
+        show_figure(
+            (version, None, None, None, ("trend", column, tuple(countries))),
+            lambda: create_trend_chart(analytics.series(countries, column), metric),
+            "trend",
+        )
+    else:
+        st.info("Choose one or more countries to see their trends.")
+
+    earlier_years = [y for y in analytics.year_labels if y < selected_year]
+    if earlier_years:
+        base_year = st.selectbox(
+            "Compare ranks with", earlier_years, index=0, key="trend_base_year"
+        )
+        show_figure(
+            (version, selected_year, None, None, ("rank-change", base_year)),
+            lambda: create_rank_change_chart(
+                analytics.summary(selected_year, base_year), selected_year, base_year
+            ),
+            "rank-change",
+        )
+
+
+def render_timeline_view(processed_data, selected_year, data_version, countries_per_page):
+    """Render the animated chart and map of every year, stepped through in the browser"""
+    st.markdown('<div class="content-container">', unsafe_allow_html=True)
+    try:
+        render_timeline()
+    finally:
+        # Closed on every early return too, so the layout after it holds
+        st.markdown("</div>", unsafe_allow_html=True)
+
+
+def render_timeline():
+    """Render the timeline figures inside the content container"""
+    if group_family() is not None:
+        st.info(f"The timeline shows countries. Choose {COUNTRIES_MODE} to see it.")
+        return
+
+    # Every year is in the figures, so they're keyed by the full dataset version
+    _, version = load_gdp_data()
+    timeline = get_timeline(version)
+    if timeline is None:
+        st.warning("Timeline data is not available yet.")
+        return
+
+    st.caption("Press play or drag the slider to step through the years.")
+    show_figure(
+        (version, None, None, TIMELINE_TOP_N, "timeline-chart"),
+        lambda: create_timeline_chart(timeline),
+        "timeline-chart",
+    )
+    show_figure(
+        (version, None, None, None, "timeline-map"),
+        lambda: create_timeline_map(timeline),
+        "timeline-map",
+    )
+
+
+# View label -> render function, in display order
+VIEWS = {
+    "📊 Chart": render_chart_view,
+    "🗺️ Map": render_map_view,
+    "📋 Table": render_table_view,
+    "📈 Trends": render_trends_view,
+    "🎞️ Timeline": render_timeline_view,
+}
+
+
+def main():
+    """Main function to run the Streamlit app"""
     # Initialize pagination state
     if "current_page" not in st.session_state:
         st.session_state.current_page = 0
@@ -655,48 +757,69 @@ def main():
     if "countries_per_page" not in st.session_state:
         st.session_state.countries_per_page = "25"
 
+    # Initialize the number of rows loaded in "All" mode
+    if "visible_rows" not in st.session_state:
+        st.session_state.visible_rows = ALL_WINDOW_ROWS
+
     # Initialize active tab state
     if "active_tab" not in st.session_state:
-        st.session_state.active_tab = "Chart"
+        st.session_state.active_tab = "📊 Chart"
 
-    # Initialize GDP data state - only fetch once on app startup
-    if "gdp_data" not in st.session_state:
-        # Show loading spinner while fetching data
-        with st.spinner("Fetching GDP data from IMF..."):
-            st.session_state.gdp_data = fetch_imf_gdp_data()
-
-    # Use the stored GDP data
-    gdp_data = st.session_state.gdp_data
+    # The dataset is shared by all sessions - only the first load fetches it
+    try:
+        with st.spinner("Fetching GDP data from IMF..."), metrics.stage("load"):
+            cube, data_version = load_gdp_data()
+    except Exception as e:
+        st.error(f"Error processing IMF data: {e}")
+        cube = None
 
-    if gdp_data is None:
+    if cube is None:
         st.error("Failed to retrieve GDP data. Please try again later.")
         return
 
-    # Year selection - ensure we display years from 2022 to 2029
-    expected_years = [str(year) for year in range(2022, 2030)]
-    year_columns = [col for col in gdp_data.columns if col in expected_years]
+    # Year selection - offer every year the dataset has GDP values for
+    year_columns = cube.years_with_data(GDP_INDICATOR)
 
     if not year_columns:
-        st.error("No year data available for 2022-2029 in the dataset")
+        st.error("No year data available in the dataset")
         return
 
+    if str(DEFAULT_YEAR) in year_columns:
+        default_index = year_columns.index(str(DEFAULT_YEAR))
+    else:
+        default_index = len(year_columns) - 1
+
     # Year selector without label (dropdown is self-explanatory)
     st.markdown('<div class="year-selector">', unsafe_allow_html=True)
     selected_year = st.selectbox(
         "",  # Empty label - dropdown is self-explanatory
         year_columns,
-        index=3,  # Default to 2025 (index 3)
+        index=default_index,
         key="year_selector",
     )
     st.markdown("</div>", unsafe_allow_html=True)
 
-    # Process the data - store processed data in session state for the selected year
-    if f"processed_data_{selected_year}" not in st.session_state:
-        st.session_state[f"processed_data_{selected_year}"] = process_data(
-            gdp_data, selected_year
-        )
+    # Countries, or the groups of one family aggregated from them
+    st.radio(
+        "Show",
+        [COUNTRIES_MODE, *group_families()],
+        key="aggregate_mode",
+        horizontal=True,
+        on_change=reset_pagination,
+    )
+    family = group_family()
 
-    processed_data = st.session_state[f"processed_data_{selected_year}"]
+    # Processed views are computed once per process and shared by all sessions
+    with metrics.stage("view"):
+        if family is None:
+            processed_data = get_processed_view(cube, data_version, selected_year)
+        else:
+            aggregates = get_group_aggregates(data_version)
+            processed_data = (
+                aggregates.view(selected_year, family)
+                if aggregates is not None and selected_year in aggregates
+                else None
+            )
 
     if processed_data is None or processed_data.empty:
         st.warning("No data available for the selected year.")
@@ -718,87 +841,131 @@ def main():
     if st.session_state.current_page >= total_pages:
         st.session_state.current_page = 0
 
-    # Create tabs for chart, map, and table with custom styling
-    tab1, tab2, tab3 = st.tabs(["📊 Chart", "🗺️ Map", "📋 Table"])
-
-    with tab1:  # Chart tab
-        st.markdown('<div class="content-container">', unsafe_allow_html=True)
-
-        # Display the chart for the current page
-        fig = create_gdp_chart(
-            processed_data,
-            selected_year,
-            countries_per_page=countries_per_page,
-            page=st.session_state.current_page,
+    # The views only differ in how they present the processed data. Their
+    # figures are cached under the version the year's data last changed in
+    view_version = year_version(data_version, selected_year)
+    view_args = (processed_data, selected_year, view_version, countries_per_page)
+
+    if LAZY_VIEWS:
+        # Only the selected view is computed and sent to the browser
+        active_view = st.radio(
+            "View",
+            list(VIEWS),
+            key="active_tab",
+            horizontal=True,
+            label_visibility="collapsed",
         )
+        VIEWS[active_view](*view_args)
+    else:
+        # Create tabs for chart, map, and table with custom styling
+        for tab, render_view in zip(st.tabs(list(VIEWS)), VIEWS.values()):
+            with tab:
+                render_view(*view_args)
+
+    # Cells the last data update revised, known from the incremental ingest
+    changes = revisions(data_version, selected_year)
+    if changes is not None:
+        with st.expander(f"What changed in the last update ({len(changes)})"):
+            st.dataframe(
+                changes.assign(Change=changes["Value"] - changes["Previous"]),
+                column_config={
+                    "Country": st.column_config.TextColumn("Country/Territory"),
+                    "Previous": st.column_config.NumberColumn(
+                        "Previous (Billions USD)", format="%.1f"
+                    ),
+                    "Value": st.column_config.NumberColumn(
+                        "Current (Billions USD)", format="%.1f"
+                    ),
+                    "Change": st.column_config.NumberColumn(format="%+.1f"),
+                },
+                hide_index=True,
+                use_container_width=True,
+            )
 
-        if fig:
-            st.plotly_chart(fig, use_container_width=True)
-
-        st.markdown("</div>", unsafe_allow_html=True)
-
-        # Display pagination controls below the chart
-        pagination_controls(
-            total_countries,
-            countries_per_page,
-            st.session_state.current_page,
-            location="chart",
-        )
-
-    with tab2:  # Map tab
-        st.markdown('<div class="content-container">', unsafe_allow_html=True)
-
-        # Display the map visualization
-        map_fig = create_gdp_map(processed_data, selected_year)
-
-        if map_fig:
-            st.plotly_chart(map_fig, use_container_width=True)
-
-        st.markdown("</div>", unsafe_allow_html=True)
+    # Add footnote with improved styling
+    as_of = data_as_of(data_version)
+    as_of_text = (
+        f"<br>Data as of {datetime.fromtimestamp(as_of, timezone.utc):%Y-%m-%d %H:%M} UTC"
+        if as_of is not None
+        else ""
+    )
+    st.markdown(
+        f"""<div class="footer">
+        Data source: <a href="https://www.imf.org/en/Publications/WEO/weo-database/2024/October" target="_blank" style="color: #0466c8; text-decoration: none;">
+        International Monetary Fund (IMF) - World Economic Outlook Database</a>{as_of_text}
+        </div>""",
+        unsafe_allow_html=True,
+    )
 
-    with tab3:  # Table tab
-        st.markdown('<div class="content-container">', unsafe_allow_html=True)
 
-        # Show the data table for the current page
-        start_idx = st.session_state.current_page * countries_per_page
-        end_idx = min(
-            start_idx + countries_per_page, total_countries
-        )  # Make sure we don't go past the end
-        page_data = processed_data.iloc[start_idx:end_idx].copy()
+def render_debug_panel(trace):
+    """
+    Show where the time of the last rerun went, and the process-wide metrics
 
+    Args:
+        trace: RerunTrace of the rerun that just finished
+    """
+    with st.sidebar.expander("Rerun profile", expanded=True):
+        st.caption(f"Total: {trace.seconds * 1000:.1f} ms")
         st.dataframe(
-            page_data[["Country", "GDP (Billions USD)"]].reset_index(drop=True),
+            trace.rows(),
             column_config={
-                "Country": st.column_config.TextColumn(
-                    "Country/Territory", width="medium"
-                ),
-                "GDP (Billions USD)": st.column_config.NumberColumn(
-                    "GDP (Billions USD)", format="%d", width="small"
-                ),
+                "ms": st.column_config.NumberColumn(format="%.1f"),
+                "Allocated (KiB)": st.column_config.NumberColumn(format="%.0f"),
+                "Payload (KiB)": st.column_config.NumberColumn(format="%.1f"),
             },
             hide_index=True,
             use_container_width=True,
         )
 
-        st.markdown("</div>", unsafe_allow_html=True)
+        snapshot = metrics.snapshot()
+        st.caption("Cache hit rates")
+        for name, stats in snapshot["caches"].items():
+            st.text(
+                f"{name}: {stats['hit_rate']:.0%} of {stats['hits'] + stats['misses']}"
+            )
 
-        # Display pagination controls for the table
-        pagination_controls(
-            total_countries,
-            countries_per_page,
-            st.session_state.current_page,
-            location="table_top",
+        st.caption("Stage times in this process (ms)")
+        stages = snapshot["histograms"].get("stage_seconds", {})
+        st.dataframe(
+            [
+                {
+                    "Stage": stage,
+                    "Count": summary["count"],
+                    "p50": summary["p50"] * 1000,
+                    "p95": summary["p95"] * 1000,
+                }
+                for stage, summary in stages.items()
+            ],
+            column_config={
+                "p50": st.column_config.NumberColumn(format="%.1f"),
+                "p95": st.column_config.NumberColumn(format="%.1f"),
+            },
+            hide_index=True,
+            use_container_width=True,
         )
 
-    # Add footnote with improved styling
-    st.markdown(
-        """<div class="footer">
-        Data source: <a href="https://www.imf.org/en/Publications/WEO/weo-database/2024/October" target="_blank" style="color: #0466c8; text-decoration: none;">
-        International Monetary Fund (IMF) - World Economic Outlook Database</a>
-        </div>""",
-        unsafe_allow_html=True,
-    )
+        _, version = load_gdp_data()
+        report = memory_report(version)
+        if report is not None:
+            st.caption("Dataset memory in this process (KiB)")
+            st.dataframe(
+                [{"Component": name, "KiB": nbytes / 1024} for name, nbytes in report.items()],
+                column_config={"KiB": st.column_config.NumberColumn(format="%.0f")},
+                hide_index=True,
+                use_container_width=True,
+            )
 
 
 if __name__ == "__main__":
-    main()
+    with metrics.rerun() as trace:
+        main()
+
+    # New IMF data is fetched in the background and swapped in between
+    # reruns. Started after the first paint, which doesn't need its HTTP stack
+    start_refresh_scheduler()
+    # Prometheus scrapes of this process's metrics, if GDP_METRICS_PORT is set
+    start_metrics_server()
+
+    if DEBUG_PANEL or st.query_params.get("debug") == "1":
+        render_debug_panel(trace)
@@ -0,0 +1,78 @@
+"""
+Microbenchmark: growth metrics per country vs on the whole matrix.
+
+Computes year-over-year growth, CAGR, ranks, world share and a 3-year
+rolling mean for every country and year, once with a Python loop over
+countries (a pandas Series per country, as one would add them to
+process_data) and once with analytics.GrowthAnalytics, on the same
+synthetic dataset as bench_process_data.
+
+Usage:
+    python benchmarks/bench_analytics.py [--entities 10000] [--years 50]
+"""
+
+import argparse
+import os
+import sys
+import timeit
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from analytics import GrowthAnalytics  # noqa: E402
+from bench_process_data import synthetic_data  # noqa: E402
+
+
+def metrics_per_country(countries, matrix, years):
+    """Every metric with a loop over countries"""
+    frame = pd.DataFrame(matrix, index=countries, columns=years)
+    totals = frame.sum(axis=0)
+    ranks = frame.rank(axis=0, ascending=False, method="first")
+    results = {}
+    for country, row in frame.iterrows():
+        results[country] = {
+            "yoy": row.pct_change(fill_method=None),
+            "cagr": (row.iloc[-1] / row.iloc[0]) ** (1 / (years[-1] - years[0])) - 1,
+            "share": row / totals,
+            "rank_change": ranks.loc[country].iloc[0] - ranks.loc[country],
+            "rolling": row.rolling(3).mean(),
+        }
+    return results
+
+
+def best_ms(stmt, number):
+    return min(timeit.repeat(stmt, number=number, repeat=3)) / number * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--entities", type=int, default=10_000)
+    parser.add_argument("--years", type=int, default=50)
+    args = parser.parse_args()
+
+    countries, matrix, year_labels = synthetic_data(args.entities, args.years)
+    years = [int(year) for year in year_labels]
+    analytics = GrowthAnalytics(countries, matrix, years)
+    year, base_year = year_labels[-1], year_labels[0]
+
+    results = [
+        ("per country loop", best_ms(lambda: metrics_per_country(countries, matrix, years), 1)),
+        ("matrix: all metrics", best_ms(lambda: GrowthAnalytics(countries, matrix, years), 3)),
+        ("matrix: summary for a year", best_ms(lambda: analytics.summary(year, base_year), 20)),
+        ("matrix: CAGR for a year pair", best_ms(lambda: analytics.cagr(base_year, year), 200)),
+    ]
+
+    print(f"{args.entities} entities x {args.years} years")
+    for name, ms in results:
+        print(f"  {name:<30} {ms:>10.3f} ms")
+
+    # Sanity check that both compute the same growth
+    loop = metrics_per_country(countries[:50], matrix[:50], years)
+    expected = np.array([loop[c]["yoy"].to_numpy() for c in countries[:50]])
+    assert np.allclose(expected, analytics.yoy[:50], equal_nan=True)
+
+
+if __name__ == "__main__":
+    main()
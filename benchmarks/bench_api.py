@@ -0,0 +1,146 @@
+"""
+Benchmark: request throughput and latency of the headless API.
+
+Starts api.py on a free local port, serving the recorded IMF report from a
+temporary snapshot folder, and sends a mix of requests (ranking pages,
+growth, groups, country series and the gzipped Arrow dump) from 1, 2, 4,
+... concurrent clients, each on its own keep-alive connection. Reports
+requests per second and the median and 95th percentile latency, overall
+and for the cheap ranking pages while the heavier requests run alongside.
+
+Usage:
+    python benchmarks/bench_api.py [--seconds 5] [--clients 1,4,16]
+        [--processes 1]
+"""
+
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import requests
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+sys.path.insert(0, ROOT)
+
+from imf_data import FIXTURE_PATH  # noqa: E402
+
+# Paths requested in turn by every client
+REQUESTS = [
+    "/api/v1/rankings/2025?page=0&page_size=25",
+    "/api/v1/growth/2025?base=2022",
+    "/api/v1/rankings/2026?page=3&page_size=25",
+    "/api/v1/groups/2025",
+    "/api/v1/rankings/2027?page=1&page_size=100",
+    "/api/v1/countries/DEU",
+    "/api/v1/indicators/NGDPD.arrow",
+]
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_api(processes):
+    """
+    Start api.py in a subprocess and wait until it answers
+
+    Returns:
+        Tuple of (process, base URL)
+    """
+    port = free_port()
+    env = dict(
+        os.environ,
+        GDP_IMF_SOURCE=FIXTURE_PATH,
+        GDP_SNAPSHOT_DIR=tempfile.mkdtemp(),
+        GDP_REFRESH_INTERVAL="0",
+    )
+    process = subprocess.Popen(
+        [sys.executable, os.path.join(ROOT, "api.py"), "--port", str(port),
+         "--processes", str(processes)],
+        env=env,
+    )
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        try:
+            requests.get(f"{url}/api/v1/years", timeout=1).raise_for_status()
+            return process, url
+        except requests.RequestException:
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError("api.py didn't start")
+
+
+def client(url, offset, stop, latencies):
+    session = requests.Session()
+    session.headers["Accept-Encoding"] = "gzip"
+    i = offset
+    while not stop.is_set():
+        path = REQUESTS[i % len(REQUESTS)]
+        start = time.perf_counter()
+        session.get(url + path, timeout=30).raise_for_status()
+        latencies.append((path, time.perf_counter() - start))
+        i += 1
+
+
+def measure(url, clients, seconds):
+    stop = threading.Event()
+    latencies = []
+    threads = [
+        threading.Thread(target=client, args=(url, i, stop, latencies))
+        for i in range(clients)
+    ]
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return latencies
+
+
+def percentiles(values):
+    values = sorted(values)
+    p95 = values[min(len(values) - 1, int(len(values) * 0.95))]
+    return statistics.median(values) * 1000, p95 * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--clients", default="1,4,16", help="Comma-separated client counts")
+    parser.add_argument("--processes", type=int, default=1, help="api.py --processes")
+    args = parser.parse_args()
+
+    process, url = start_api(args.processes)
+    try:
+        # Build the per-version results once so every run measures serving
+        measure(url, 1, 1)
+        print(
+            f"{'clients':>7} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} "
+            f"{'pages p50':>10} {'pages p95':>10}"
+        )
+        for clients in (int(n) for n in args.clients.split(",")):
+            latencies = measure(url, clients, args.seconds)
+            p50, p95 = percentiles([seconds for _, seconds in latencies])
+            pages = [seconds for path, seconds in latencies if "/rankings/" in path]
+            pages_p50, pages_p95 = percentiles(pages)
+            print(
+                f"{clients:>7} {len(latencies) / args.seconds:>8.0f} {p50:>8.1f} {p95:>8.1f} "
+                f"{pages_p50:>10.1f} {pages_p95:>10.1f}"
+            )
+    finally:
+        process.terminate()
+        process.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""
+Benchmark: sequential vs concurrent multi-indicator fetch.
+
+Serves the recorded report page from a local mock of the IMF server that
+answers every request after an injected latency, then fetches N indicators
+both the old way (one full report per indicator, one after another, each
+on a new connection) and with weo_batch.fetch_weo_indicators (country
+chunks per indicator, concurrently on a pooled session). Reports wall time
+and the number of TCP connections the server saw.
+
+Usage:
+    python benchmarks/bench_batch_fetch.py [--indicators 20] [--latency 0.2]
+"""
+
+import argparse
+import os
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from imf_data import FIXTURE_PATH, IMF_WEO_URL, fetch_imf_gdp_data  # noqa: E402
+from weo_batch import (  # noqa: E402
+    DEFAULT_CHUNK_SIZE,
+    DEFAULT_MAX_WORKERS,
+    fetch_weo_indicators,
+    report_country_codes,
+    weo_report_url,
+)
+
+
+def mock_server(latency):
+    """
+    Start a local stand-in for the IMF report endpoint
+
+    Each IMF country code is answered with a row of the recorded report, so
+    responses are as large as real ones for the requested countries.
+
+    Returns:
+        Tuple of (server, base URL, stats dict)
+    """
+    with open(FIXTURE_PATH, encoding="utf-8") as f:
+        page = f.read()
+    head, rest = page.split("<tbody>", 1)
+    body, tail = rest.split("</tbody>", 1)
+    rows = re.findall(r"<tr>.*?</tr>", body, flags=re.DOTALL)
+    row_by_code = dict(zip(report_country_codes(), rows))
+    stats = {"requests": 0, "connections": 0}
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def setup(self):
+            super().setup()
+            with lock:
+                stats["connections"] += 1
+
+        def do_GET(self):
+            with lock:
+                stats["requests"] += 1
+            query = parse_qs(urlsplit(self.path).query)
+            codes = [code for code in query["c"][0].split(",") if code]
+            time.sleep(latency)
+            report = (
+                head
+                + "<tbody>\n"
+                + "\n".join(row_by_code[code] for code in codes if code in row_by_code)
+                + "\n</tbody>"
+                + tail
+            ).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(report)))
+            self.end_headers()
+            self.wfile.write(report)
+
+        def log_message(self, *args):
+            pass
+
+    class Server(ThreadingHTTPServer):
+        daemon_threads = True
+        # The default backlog of 5 drops bursts of concurrent connects
+        request_queue_size = 128
+
+    server = Server(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_port}{urlsplit(IMF_WEO_URL).path}"
+    return server, base_url + "?" + urlsplit(IMF_WEO_URL).query, stats
+
+
+def fetch_sequential(indicators, base_url):
+    # One full report per indicator, each on a fresh connection
+    return [
+        fetch_imf_gdp_data(
+            weo_report_url(report_country_codes(), code, base_url=base_url)
+        )
+        for code in indicators
+    ]
+
+
+def measure(fetch, stats):
+    stats.update(requests=0, connections=0)
+    start = time.perf_counter()
+    fetch()
+    return time.perf_counter() - start, dict(stats)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--indicators", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--workers", type=int, default=DEFAULT_MAX_WORKERS)
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    args = parser.parse_args()
+
+    server, base_url, stats = mock_server(args.latency)
+    indicators = [f"IND{i:02d}" for i in range(args.indicators)]
+    try:
+        old_time, old_stats = measure(
+            lambda: fetch_sequential(indicators, base_url), stats
+        )
+        new_time, new_stats = measure(
+            lambda: fetch_weo_indicators(
+                indicators,
+                base_url=base_url,
+                chunk_size=args.chunk_size,
+                max_workers=args.workers,
+            ),
+            stats,
+        )
+    finally:
+        server.shutdown()
+
+    print(
+        f"{args.indicators} indicators, {args.latency * 1000:.0f} ms latency "
+        f"per request, {args.workers} workers"
+    )
+    print(f"{'':>11} {'wall s':>7} {'requests':>9} {'connections':>12}")
+    for name, elapsed, counts in (
+        ("sequential", old_time, old_stats),
+        ("concurrent", new_time, new_stats),
+    ):
+        print(
+            f"{name:>11} {elapsed:>7.2f} {counts['requests']:>9} "
+            f"{counts['connections']:>12}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Memory benchmark: representations of the WEO dataset as it grows.
+
+For synthetic datasets with more indicators and vintages than the app
+loads today, reports the bytes held by:
+- wide frames as fetch_imf_gdp_data() returns them (object Country
+  column, float64 year columns), one per indicator and vintage, and the
+  same after compact_frame() (categorical Country, float32 years)
+- the long frame of the bulk reader with float64 values, as snapshots
+  were held before compact_frame()
+- the same long frame after compact_frame() (categorical codes, float32)
+- the WeoCube built from it (one contiguous float32 array)
+
+Frame sizes include their strings (pandas' deep memory usage).
+
+Usage:
+    python benchmarks/bench_dataset_memory.py [--years 50] [--sizes 1x1,45x1,45x4]
+"""
+
+import argparse
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from country_codes import resolve_iso3  # noqa: E402
+from imf_data import FIXTURE_PATH, fetch_imf_gdp_data  # noqa: E402
+from weo_cube import WeoCube, compact_frame  # noqa: E402
+
+
+def frame_bytes(frame):
+    return int(frame.memory_usage(index=True, deep=True).sum())
+
+
+def synthetic_long(countries, indicators, years, seed=0):
+    """Long frame in the layout of read_weo_bulk(), with float64 values"""
+    rng = np.random.default_rng(seed)
+    n = len(countries) * indicators * len(years)
+    country_idx = np.repeat(np.arange(len(countries)), indicators * len(years))
+    indicator_idx = np.tile(np.repeat(np.arange(indicators), len(years)), len(countries))
+    year_idx = np.tile(np.arange(len(years)), len(countries) * indicators)
+    iso = [resolve_iso3(name) or name[:3].upper() for name in countries]
+    return pd.DataFrame(
+        {
+            "Country": pd.Categorical.from_codes(country_idx, countries),
+            "ISO": pd.Categorical(np.asarray(iso, dtype=object)[country_idx]),
+            "Indicator": pd.Categorical.from_codes(
+                indicator_idx, [f"IND{i:02d}" for i in range(indicators)]
+            ),
+            "Year": np.asarray(years, dtype=np.int16)[year_idx],
+            "Value": rng.lognormal(3, 2, n),
+        }
+    )
+
+
+def wide_frames(long_df, years):
+    """One wide float64 frame per indicator, like fetch_imf_gdp_data()"""
+    frames = []
+    for _, rows in long_df.groupby("Indicator", observed=True):
+        wide = rows.pivot(index="Country", columns="Year", values="Value")
+        wide.columns = [str(year) for year in years]
+        # Parsed frames hold a plain object column of names
+        wide.index = wide.index.astype(object)
+        frames.append(wide.rename_axis("Country").reset_index())
+    return frames
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--years", type=int, default=50)
+    parser.add_argument(
+        "--sizes", default="1x1,10x1,45x1,45x4", help="indicators x vintages, comma-separated"
+    )
+    args = parser.parse_args()
+
+    countries = list(pd.unique(fetch_imf_gdp_data(FIXTURE_PATH)["Country"]))
+    years = list(range(2030 - args.years, 2030))
+    print(f"{len(countries)} countries, {len(years)} years")
+    print(
+        f"{'indicators x vintages':>22} {'wide f64 KiB':>13} {'wide compact':>13} "
+        f"{'long f64 KiB':>13} {'long compact':>13} {'cube KiB':>9} {'cells':>10}"
+    )
+    for size in args.sizes.split(","):
+        indicators, vintages = (int(n) for n in size.lower().split("x"))
+        wide = wide_compact = long = compact = cube = 0
+        for vintage in range(vintages):
+            long_df = synthetic_long(countries, indicators, years, seed=vintage)
+            for frame in wide_frames(long_df, years):
+                wide += frame_bytes(frame)
+                wide_compact += frame_bytes(compact_frame(frame))
+            long += frame_bytes(long_df)
+            compacted = compact_frame(long_df)
+            compact += frame_bytes(compacted)
+            cube += sum(WeoCube.from_long(compacted, f"v{vintage}").memory_usage().values())
+        cells = len(countries) * indicators * len(years) * vintages
+        print(
+            f"{size:>22} {wide / 1024:>13.0f} {wide_compact / 1024:>13.0f} "
+            f"{long / 1024:>13.0f} {compact / 1024:>13.0f} {cube / 1024:>9.0f} {cells:>10}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Benchmark: building many figures in-process vs in a FigureExecutor pool.
+
+Builds the figures of a multi-view page for every year of the recorded
+IMF report (each 25-country chart page, the full and the lightweight map)
+with 1, 2, 4, ... worker processes up to the CPU count, and reports the
+wall time and speedup over building them in-process. The pool is started
+and warmed up before timing, as in a long-running exporter or server.
+
+Usage:
+    python benchmarks/bench_figure_executor.py [--rounds 3] [--processes 1,2,4,8]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+sys.path.insert(0, ROOT)
+
+from imf_data import FIXTURE_PATH  # noqa: E402
+
+os.environ["GDP_IMF_SOURCE"] = FIXTURE_PATH
+os.environ["GDP_SNAPSHOT_DIR"] = tempfile.mkdtemp()
+
+from figure_executor import FigureExecutor  # noqa: E402
+from gdp_data import get_processed_view, load_gdp_data  # noqa: E402
+
+PAGE_SIZE = 25
+
+
+def dashboard_tasks():
+    """FigureExecutor tasks of every chart page and map of every year"""
+    cube, version = load_gdp_data()
+    tasks = []
+    for year in cube.year_labels:
+        view = get_processed_view(cube, version, year)
+        for start in range(0, len(view), PAGE_SIZE):
+            tasks.append(("chart", view.iloc[start : start + PAGE_SIZE], (year, PAGE_SIZE, 0)))
+        tasks.append(("map", view, (year,)))
+        tasks.append(("map-lite", view, (year, 110)))
+    return tasks
+
+
+def time_executor(executor, tasks, rounds):
+    """Best wall time of building every task, in seconds"""
+    # Warm up: every worker pays Plotly's one-off setup on its first figure
+    list(executor.map(tasks[: executor.processes * 2]))
+    best = float("inf")
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for _ in executor.map(tasks):
+            pass
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    cpus = os.cpu_count() or 1
+    default_processes = [n for n in (1, 2, 4, 8, 16, 32) if n <= cpus]
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument(
+        "--processes",
+        default=",".join(map(str, default_processes)),
+        help="Comma-separated worker counts",
+    )
+    args = parser.parse_args()
+
+    tasks = dashboard_tasks()
+    print(f"{len(tasks)} figures, {cpus} CPUs")
+    print(f"{'processes':>9} {'seconds':>9} {'figures/s':>10} {'speedup':>8}")
+    baseline = None
+    for processes in (int(n) for n in args.processes.split(",")):
+        with FigureExecutor(processes) as executor:
+            seconds = time_executor(executor, tasks, args.rounds)
+        baseline = baseline or seconds
+        print(
+            f"{processes:>9} {seconds:>9.2f} {len(tasks) / seconds:>10.1f} "
+            f"{baseline / seconds:>7.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
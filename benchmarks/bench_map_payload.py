@@ -0,0 +1,53 @@
+"""
+Benchmark: choropleth payload of the full and lightweight map modes.
+
+Builds create_gdp_map and create_gdp_map_lite for every year of the
+recorded IMF report and reports the figure JSON size (raw and gzipped, as
+sent to the browser) and the time to build and serialize each figure.
+
+Usage:
+    python benchmarks/bench_map_payload.py
+"""
+
+import gzip
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+sys.path.insert(0, ROOT)
+
+from imf_data import FIXTURE_PATH  # noqa: E402
+
+os.environ["GDP_IMF_SOURCE"] = FIXTURE_PATH
+os.environ["GDP_SNAPSHOT_DIR"] = tempfile.mkdtemp()
+
+import figures  # noqa: E402
+from gdp_data import get_processed_view, load_gdp_data  # noqa: E402
+
+
+def measure(build):
+    start = time.perf_counter()
+    spec = build().to_json()
+    elapsed = time.perf_counter() - start
+    return len(spec), len(gzip.compress(spec.encode())), elapsed
+
+
+def main():
+    cube, version = load_gdp_data()
+    modes = {
+        "full": lambda df, year: figures.create_gdp_map(df, year),
+        "light": lambda df, year: figures.create_gdp_map_lite(df, year),
+    }
+
+    print(f"{'year':<6} {'mode':<11} {'JSON KiB':>9} {'gzip KiB':>9} {'build+json ms':>14}")
+    for year in cube.year_labels:
+        df = get_processed_view(cube, version, year)
+        for name, build in modes.items():
+            raw, packed, seconds = measure(lambda: build(df, year))
+            print(f"{year:<6} {name:<11} {raw / 1024:>9.1f} {packed / 1024:>9.1f} {seconds * 1000:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
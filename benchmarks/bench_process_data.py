@@ -0,0 +1,79 @@
+"""
+Microbenchmark: per-year processing before and after precomputed rankings.
+
+Compares the previous process_data (copy, dropna, sort and a Python
+formatting lambda per row on a wide DataFrame) with YearRankings, which
+ranks and formats every year once up front, on a synthetic dataset.
+
+Usage:
+    python benchmarks/bench_process_data.py [--entities 10000] [--years 50]
+"""
+
+import argparse
+import os
+import sys
+import timeit
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from rankings import YearRankings  # noqa: E402
+
+
+def process_data_before(df, selected_year):
+    """process_data as it was before per-year rankings were precomputed"""
+    filtered_df = df[["Country", selected_year]].copy()
+    filtered_df = filtered_df.dropna(subset=[selected_year])
+    filtered_df = filtered_df.sort_values(by=selected_year, ascending=False)
+    filtered_df["GDP (Billions USD)"] = filtered_df[selected_year]
+    filtered_df["GDP_formatted"] = filtered_df["GDP (Billions USD)"].apply(
+        lambda x: f"{int(x)}" if not pd.isna(x) else ""
+    )
+    return filtered_df
+
+
+def synthetic_data(entities, years, seed=0):
+    rng = np.random.default_rng(seed)
+    matrix = rng.lognormal(3.0, 2.0, size=(entities, years))
+    matrix[rng.random(matrix.shape) < 0.05] = np.nan
+    countries = np.array([f"Entity {i}" for i in range(entities)], dtype=object)
+    year_labels = [str(2000 + i) for i in range(years)]
+    return countries, matrix, year_labels
+
+
+def best_ms(stmt, number):
+    return min(timeit.repeat(stmt, number=number, repeat=5)) / number * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--entities", type=int, default=10_000)
+    parser.add_argument("--years", type=int, default=50)
+    parser.add_argument("--page-size", type=int, default=25)
+    args = parser.parse_args()
+
+    countries, matrix, year_labels = synthetic_data(args.entities, args.years)
+    df = pd.DataFrame(matrix, columns=year_labels)
+    df.insert(0, "Country", countries)
+    year = year_labels[len(year_labels) // 2]
+
+    rankings = YearRankings(countries, matrix, year_labels)
+    view = rankings.view(year)
+
+    results = [
+        ("before: process_data per year", best_ms(lambda: process_data_before(df, year), 3)),
+        ("before: every year", best_ms(lambda: [process_data_before(df, y) for y in year_labels], 1)),
+        ("after: rank all years (once)", best_ms(lambda: YearRankings(countries, matrix, year_labels), 1)),
+        ("after: view for a year", best_ms(lambda: rankings.view(year), 20)),
+        ("after: page slice", best_ms(lambda: view.iloc[: args.page_size], 200)),
+    ]
+
+    print(f"{args.entities} entities x {args.years} years")
+    for name, ms in results:
+        print(f"  {name:<32} {ms:>10.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
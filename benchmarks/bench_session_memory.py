@@ -0,0 +1,79 @@
+"""
+Memory benchmark: per-session overhead of the shared data layer.
+
+Simulates Streamlit sessions that each view every year, once with the old
+per-session copies in st.session_state and once with references into the
+process-wide dataset from gdp_data, and reports the traced memory per
+session as the number of sessions grows.
+
+Usage:
+    python benchmarks/bench_session_memory.py [--sessions 1 10 100 500]
+"""
+
+import argparse
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from imf_data import FIXTURE_PATH, GDP_INDICATOR, WEO_VINTAGE, fetch_imf_gdp_data  # noqa: E402
+from gdp_data import get_processed_view, process_data  # noqa: E402
+from weo_cube import WeoCube  # noqa: E402
+
+
+def load_cube():
+    return WeoCube.from_wide(fetch_imf_gdp_data(FIXTURE_PATH), WEO_VINTAGE, GDP_INDICATOR)
+
+
+def per_session_copies(n_sessions, years):
+    """Old layout: every session fetches and processes its own copies"""
+    sessions = []
+    for _ in range(n_sessions):
+        state = {"gdp_data": load_cube(), "current_page": 0}
+        for year in years:
+            state[f"processed_data_{year}"] = process_data(state["gdp_data"], year)
+        sessions.append(state)
+    return sessions
+
+
+def shared_references(n_sessions, years, cube, version):
+    """New layout: sessions hold UI state and references to shared views"""
+    sessions = []
+    for _ in range(n_sessions):
+        state = {"current_page": 0, "countries_per_page": "25"}
+        for year in years:
+            state["year_selector"] = year
+            get_processed_view(cube, version, year)
+        sessions.append(state)
+    return sessions
+
+
+def measure(build):
+    tracemalloc.start()
+    result = build()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return current
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 10, 50, 200])
+    args = parser.parse_args()
+
+    cube = load_cube()
+    years = cube.year_labels
+
+    print(f"{'sessions':>8} {'copies KiB/session':>20} {'shared KiB/session':>20}")
+    for n in args.sessions:
+        copies = measure(lambda: per_session_copies(n, years))
+        # Use a fresh version per run so the shared views are built inside the trace
+        version = f"bench-{n}"
+        shared = measure(lambda: shared_references(n, years, cube, version))
+        print(f"{n:>8} {copies / n / 1024:>20.1f} {shared / n / 1024:>20.1f}")
+
+
+if __name__ == "__main__":
+    main()
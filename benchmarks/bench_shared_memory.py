@@ -0,0 +1,133 @@
+"""
+Memory benchmark: dataset held per worker process vs memory-mapped once.
+
+Publishes a synthetic cube and its GDP rankings to a SharedDatasets
+folder, then starts 1, 2, 4, ... worker processes that each either map
+the version (as workers do with GDP_SHARED_DATASET on) or hold a private
+copy of the same arrays (as every worker did before), and read all of it.
+While all workers are alive, reports their summed proportional set size
+(PSS, where a page shared by n processes counts 1/n to each), the time
+to open the dataset, and the dataset's share of the PSS.
+
+Needs Linux (/proc/<pid>/smaps_rollup).
+
+Usage:
+    python benchmarks/bench_shared_memory.py [--countries 2000] [--years 60]
+        [--indicators 45] [--workers 1,2,4,8]
+"""
+
+import argparse
+import logging
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from rankings import YearRankings  # noqa: E402
+from shared_dataset import SharedDatasets  # noqa: E402
+from weo_cube import WeoCube  # noqa: E402
+
+VERSION = "bench@0"
+
+# Synthetic countries have no ISO-3 codes; don't list them all
+logging.disable(logging.WARNING)
+
+
+def synthetic_cube(countries, years, indicators, seed=0):
+    rng = np.random.default_rng(seed)
+    values = rng.lognormal(3, 2, (1, indicators, countries, years)).astype(np.float32)
+    return WeoCube(
+        ["bench"],
+        ["NGDPD"] + [f"IND{i:02d}" for i in range(1, indicators)],
+        [f"Country {i}" for i in range(countries)],
+        list(range(2030 - years, 2030)),
+        values,
+        iso=[None] * countries,
+    )
+
+
+def pss_kib():
+    """Proportional set size of this process in KiB"""
+    with open("/proc/self/smaps_rollup", encoding="utf-8") as f:
+        for line in f:
+            if line.startswith("Pss:"):
+                return int(line.split()[1])
+    return 0
+
+
+def worker(directory, shared, barrier, results):
+    before = pss_kib()
+    start = time.perf_counter()
+    cube, rankings, _ = SharedDatasets(directory).open(VERSION)
+    if not shared:
+        # What a worker building the dataset itself ends up holding
+        cube.values = np.array(cube.values)
+        rankings.order = np.array(rankings.order)
+        rankings.values = np.array(rankings.values)
+        rankings.labels = np.array(rankings.labels)
+    # Read every page, as rendering all years and indicators eventually does
+    for array in (cube.values, rankings.order, rankings.values, rankings.labels):
+        np.count_nonzero(array == array)
+    seconds = time.perf_counter() - start
+    # Measure once every worker holds the data
+    barrier.wait()
+    pss = pss_kib()
+    results.put((pss, pss - before, seconds))
+    barrier.wait()
+
+
+def measure(directory, shared, workers):
+    context = multiprocessing.get_context("spawn")
+    barrier = context.Barrier(workers)
+    results = context.Queue()
+    processes = [
+        context.Process(target=worker, args=(directory, shared, barrier, results))
+        for _ in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    measured = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+    total = sum(pss for pss, _, _ in measured)
+    dataset = sum(delta for _, delta, _ in measured)
+    seconds = max(seconds for _, _, seconds in measured)
+    return total, dataset, seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--countries", type=int, default=2000)
+    parser.add_argument("--years", type=int, default=60)
+    parser.add_argument("--indicators", type=int, default=45)
+    parser.add_argument("--workers", default="1,2,4,8", help="Comma-separated worker counts")
+    args = parser.parse_args()
+
+    cube = synthetic_cube(args.countries, args.years, args.indicators)
+    rankings = YearRankings(cube.countries, cube.matrix("NGDPD"), cube.year_labels, cube.iso)
+    directory = tempfile.mkdtemp()
+    shared = SharedDatasets(directory)
+    shared.publish(VERSION, cube, rankings, 0.0, {})
+    size = cube.values.nbytes + rankings.values.nbytes + rankings.labels.nbytes
+    size += rankings.order.nbytes
+    print(f"Dataset arrays: {size / 2**20:.1f} MiB")
+    print(
+        f"{'workers':>7} {'mode':>8} {'total PSS MiB':>14} {'dataset PSS MiB':>16} "
+        f"{'open ms':>8}"
+    )
+    for workers in (int(n) for n in args.workers.split(",")):
+        for mode in ("private", "mapped"):
+            total, dataset, seconds = measure(directory, mode == "mapped", workers)
+            print(
+                f"{workers:>7} {mode:>8} {total / 1024:>14.1f} {dataset / 1024:>16.1f} "
+                f"{seconds * 1000:>8.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""
+Benchmark: cold start of a fresh app worker, with an import-time breakdown.
+
+Starts fresh Python processes, as an autoscaled worker would, and reports:
+- the import time of the app's dependencies beyond Streamlit itself
+  (which `streamlit run` has loaded before the script starts), from
+  python -X importtime, grouped by top-level package
+- the time to first paint: from the first script run until the default
+  view has been rendered, served from a warm snapshot. The median of
+  several fresh processes is checked against a budget, and the script
+  exits with status 1 when it is exceeded.
+
+Usage:
+    python benchmarks/bench_startup.py [--runs 5] [--budget-ms 1500]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from collections import defaultdict
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+
+from imf_data import FIXTURE_PATH  # noqa: E402
+
+# Default time-to-first-paint budget, overridable via GDP_STARTUP_BUDGET_MS
+DEFAULT_BUDGET_MS = 1500
+
+MARKER = "--app-imports--"
+
+# Imports app.py the way the Streamlit runner would, after Streamlit itself
+IMPORT_SCRIPT = f"""
+import sys
+import streamlit
+from streamlit.testing.v1 import AppTest
+sys.stderr.write("{MARKER}\\n")
+sys.stderr.flush()
+import app
+"""
+
+# One fresh worker: Streamlit is loaded, the app script runs for the first time
+FIRST_PAINT_SCRIPT = """
+import json, sys, time
+from streamlit.testing.v1 import AppTest
+start = time.perf_counter()
+at = AppTest.from_file(sys.argv[1], default_timeout=120).run()
+elapsed = time.perf_counter() - start
+errors = [e.message for e in at.exception]
+print(json.dumps({"ms": elapsed * 1000, "errors": errors}))
+"""
+
+
+def child_env(snapshot_dir):
+    env = dict(os.environ)
+    env["GDP_IMF_SOURCE"] = FIXTURE_PATH
+    env["GDP_SNAPSHOT_DIR"] = snapshot_dir
+    # Startup shouldn't wait on, or be slowed by, the background refresh
+    env["GDP_REFRESH_INTERVAL"] = "0"
+    env["PYTHONPATH"] = ROOT + os.pathsep + env.get("PYTHONPATH", "")
+    return env
+
+
+def import_breakdown(env):
+    """
+    Import the app in a fresh process and sum self times per top-level package
+
+    Returns:
+        Tuple of (total ms, list of (package, ms) sorted by time)
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", IMPORT_SCRIPT],
+        env=env,
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    lines = result.stderr.split(MARKER, 1)[1].splitlines()
+
+    by_package = defaultdict(float)
+    for line in lines:
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, self_us, _, name = (part.strip() for part in line.replace(":", "|", 1).split("|"))
+        if not self_us.isdigit():
+            continue
+        by_package[name.split(".")[0]] += int(self_us) / 1000
+    total = sum(by_package.values())
+    return total, sorted(by_package.items(), key=lambda item: -item[1])
+
+
+def first_paint_ms(env):
+    """Time the first run of the app script in a fresh process"""
+    result = subprocess.run(
+        [sys.executable, "-c", FIRST_PAINT_SCRIPT, os.path.join(ROOT, "app.py")],
+        env=env,
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    run = json.loads(result.stdout.strip().splitlines()[-1])
+    if run["errors"]:
+        raise RuntimeError(f"App raised: {run['errors']}")
+    return run["ms"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument(
+        "--budget-ms",
+        type=float,
+        default=float(os.environ.get("GDP_STARTUP_BUDGET_MS", DEFAULT_BUDGET_MS)),
+    )
+    parser.add_argument("--top", type=int, default=12, help="Packages to list")
+    args = parser.parse_args()
+
+    env = child_env(tempfile.mkdtemp())
+
+    # The first process parses the fixture and leaves a warm snapshot behind
+    first_paint_ms(env)
+
+    total, packages = import_breakdown(env)
+    print(f"App imports beyond Streamlit: {total:.0f} ms")
+    for package, ms in packages[: args.top]:
+        print(f"  {package:<24} {ms:>8.1f} ms")
+
+    times = [first_paint_ms(env) for _ in range(args.runs)]
+    median = statistics.median(times)
+    print(
+        f"\nTime to first paint of a fresh worker (warm snapshot, {args.runs} runs): "
+        f"median {median:.0f} ms, min {min(times):.0f} ms, max {max(times):.0f} ms"
+    )
+    print(f"Budget: {args.budget_ms:.0f} ms")
+    if median > args.budget_ms:
+        print("Over budget")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Benchmark: server render time and payload per interaction, tabs vs lazy views.
+
+Runs the app headlessly with Streamlit's AppTest against the recorded IMF
+report, once with every tab rendered (GDP_LAZY_VIEWS=0) and once with only
+the active view, and reports the script run time and the size of the
+elements sent to the browser for a rerun, a page change and a year change.
+
+Usage:
+    python benchmarks/bench_views.py
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+sys.path.insert(0, ROOT)
+
+from streamlit.testing.v1 import AppTest  # noqa: E402
+
+from figure_cache import figure_cache  # noqa: E402
+from imf_data import FIXTURE_PATH  # noqa: E402
+
+
+def payload_bytes(node):
+    """Sum the serialized size of every element below a node"""
+    total = 0
+    proto = getattr(node, "proto", None)
+    if proto is not None and hasattr(proto, "ByteSize"):
+        total += proto.ByteSize()
+    for child in getattr(node, "children", {}).values():
+        total += payload_bytes(child)
+    return total
+
+
+def run(lazy):
+    os.environ["GDP_LAZY_VIEWS"] = "1" if lazy else "0"
+    figure_cache.invalidate()
+    at = AppTest.from_file(os.path.join(ROOT, "app.py"), default_timeout=120)
+
+    # Warm the process-wide caches so both modes measure steady state
+    at.run()
+
+    results = []
+    def next_page():
+        # Same state change as the Next button, without its st.rerun()
+        at.session_state.current_page += 1
+
+    def next_year():
+        at.selectbox(key="year_selector").select("2026")
+
+    for name, interact in [
+        ("load", lambda: None),
+        ("next page", next_page),
+        ("change year", next_year),
+    ]:
+        interact()
+        start = time.perf_counter()
+        at.run()
+        results.append((name, time.perf_counter() - start, payload_bytes(at.main)))
+    return results
+
+
+def main():
+    os.environ["GDP_IMF_SOURCE"] = FIXTURE_PATH
+    os.environ["GDP_SNAPSHOT_DIR"] = tempfile.mkdtemp()
+
+    print(f"{'mode':<6} {'interaction':<12} {'render ms':>10} {'payload KiB':>12}")
+    for lazy in (False, True):
+        for name, seconds, size in run(lazy):
+            mode = "lazy" if lazy else "tabs"
+            print(f"{mode:<6} {name:<12} {seconds * 1000:>10.1f} {size / 1024:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Benchmark: streaming WEO report parser vs pd.read_html.
+
+Parses a saved copy of the IMF report page with both the previous
+pd.read_html path and weo_parser.parse_weo_report, reporting the best wall
+time and the peak traced memory. --scale repeats the country rows to mimic
+reports requested with a longer country list.
+
+Usage:
+    python benchmarks/bench_weo_parser.py [--report PATH] [--scale 1 10 50]
+"""
+
+import argparse
+import os
+import re
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from imf_data import FIXTURE_PATH, parse_imf_gdp_tables  # noqa: E402
+from weo_parser import parse_weo_report  # noqa: E402
+
+
+def read_html_path(path):
+    return parse_imf_gdp_tables(pd.read_html(path))
+
+
+def scaled_report(path, scale):
+    """Write a copy of the report with every country row repeated scale times"""
+    with open(path, encoding="utf-8") as f:
+        page = f.read()
+    head, rest = page.split("<tbody>", 1)
+    body, tail = rest.split("</tbody>", 1)
+    rows = re.findall(r"<tr>.*?</tr>", body, flags=re.DOTALL)
+    copies = [
+        row.replace("<tr><td>", f"<tr><td>Copy {i} ", 1) if i else row
+        for i in range(scale)
+        for row in rows
+    ]
+    out = tempfile.NamedTemporaryFile(
+        "w", suffix=".html", encoding="utf-8", delete=False
+    )
+    with out:
+        out.write(head + "<tbody>\n" + "\n".join(copies) + "\n</tbody>" + tail)
+    return out.name
+
+
+def measure(parse, path, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        parse(path)
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    result = parse(path)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak, len(result)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--report", default=FIXTURE_PATH)
+    parser.add_argument("--scale", type=int, nargs="+", default=[1, 10, 50])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(
+        f"{'scale':>5} {'rows':>7} {'read_html ms':>13} {'stream ms':>10} "
+        f"{'read_html peak MiB':>19} {'stream peak MiB':>16}"
+    )
+    for scale in args.scale:
+        path = args.report if scale == 1 else scaled_report(args.report, scale)
+        try:
+            old_time, old_peak, rows = measure(read_html_path, path, args.repeat)
+            new_time, new_peak, _ = measure(parse_weo_report, path, args.repeat)
+        finally:
+            if path != args.report:
+                os.remove(path)
+        print(
+            f"{scale:>5} {rows:>7} {old_time * 1000:>13.1f} {new_time * 1000:>10.1f} "
+            f"{old_peak / 2**20:>19.2f} {new_peak / 2**20:>16.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
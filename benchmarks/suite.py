@@ -0,0 +1,241 @@
+"""
+Benchmark suite: ingest, processing and rendering paths with a baseline check.
+
+Times the hot paths of a rerun offline:
+- parsing the recorded IMF report (fetch_imf_gdp_data on the fixture)
+- process_data and the precomputed YearRankings for every year
+- pagination slicing of a processed view
+- building the bar chart and the map, and serializing them to JSON
+
+on synthetic datasets of 200, 10k and 100k entities with 8 and 60 years.
+Results are written as JSON and, given a baseline from an earlier run,
+compared case by case: a case that got slower than the threshold is
+reported as a regression and the script exits with status 1, so it can
+gate a deployment. Timings are only comparable on the same machine, so
+record the baseline where the comparison runs.
+
+Usage:
+    python benchmarks/suite.py [--sizes 200x8,10000x60] [--output results.json]
+        [--baseline baseline.json] [--threshold 0.25] [--save-baseline]
+"""
+
+import argparse
+import functools
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import timeit
+
+import numpy as np
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+sys.path.insert(0, ROOT)
+
+from imf_data import FIXTURE_PATH  # noqa: E402
+
+os.environ.setdefault("GDP_IMF_SOURCE", FIXTURE_PATH)
+os.environ.setdefault("GDP_SNAPSHOT_DIR", tempfile.mkdtemp())
+
+import pandas as pd  # noqa: E402
+import plotly  # noqa: E402
+
+from bench_process_data import synthetic_data  # noqa: E402
+from country_codes import resolve_iso3  # noqa: E402
+import figures  # noqa: E402
+from gdp_data import process_data  # noqa: E402
+from imf_data import GDP_INDICATOR, fetch_imf_gdp_data  # noqa: E402
+from rankings import YearRankings  # noqa: E402
+from weo_cube import WeoCube  # noqa: E402
+
+DEFAULT_SIZES = "200x8,200x60,10000x8,10000x60,100000x8,100000x60"
+DEFAULT_THRESHOLD = 0.25
+DEFAULT_REPEAT = 5
+
+# Differences below this are timer noise, never regressions
+NOISE_FLOOR_MS = 0.05
+
+PAGE_SIZE = 25
+
+
+def measure(stmt, repeat):
+    """
+    Time a callable like timeit, calibrating the loop count to ~0.2 s
+
+    Returns:
+        Dict with min_ms, median_ms, number and repeat
+    """
+    timer = timeit.Timer(stmt)
+    number, _ = timer.autorange()
+    times = [t / number * 1000 for t in timer.repeat(repeat=repeat, number=number)]
+    return {
+        "min_ms": min(times),
+        "median_ms": statistics.median(times),
+        "number": number,
+        "repeat": repeat,
+    }
+
+
+def synthetic_cube(entities, years):
+    """WeoCube of synthetic GDP values with real ISO codes, for drawable maps"""
+    countries, matrix, year_labels = synthetic_data(entities, years)
+    codes = [code for code in map(resolve_iso3, _fixture_countries()) if code]
+    iso = [codes[i % len(codes)] for i in range(entities)]
+    return WeoCube(
+        ["synthetic"],
+        [GDP_INDICATOR],
+        countries,
+        [int(year) for year in year_labels],
+        matrix[np.newaxis, np.newaxis],
+        iso=iso,
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def _fixture_countries():
+    return fetch_imf_gdp_data(FIXTURE_PATH)["Country"]
+
+
+def fixture_cases():
+    """Cases on the recorded IMF report"""
+    yield "parse:fetch_imf_gdp_data", lambda: fetch_imf_gdp_data(FIXTURE_PATH)
+
+
+def size_cases(entities, years):
+    """Cases on a synthetic dataset of one size"""
+    cube = synthetic_cube(entities, years)
+    year = cube.year_labels[len(cube.year_labels) // 2]
+    matrix = cube.matrix(GDP_INDICATOR)
+    rankings = YearRankings(cube.countries, matrix, cube.year_labels, cube.iso)
+    view = rankings.view(year)
+    middle_page = (len(view) // PAGE_SIZE) // 2 * PAGE_SIZE
+
+    chart = figures.create_gdp_chart(view, year, PAGE_SIZE, page=0)
+    gdp_map = figures.create_gdp_map(view, year)
+
+    yield "process_data", lambda: process_data(cube, year)
+    yield "rankings:all_years", lambda: YearRankings(
+        cube.countries, matrix, cube.year_labels, cube.iso
+    )
+    yield "rankings:view", lambda: rankings.view(year)
+    yield "paginate", lambda: view.iloc[middle_page : middle_page + PAGE_SIZE]
+    yield "chart:build", lambda: figures.create_gdp_chart(view, year, PAGE_SIZE, page=0)
+    yield "chart:to_json", chart.to_json
+    yield "map:build", lambda: figures.create_gdp_map(view, year)
+    yield "map:to_json", gdp_map.to_json
+
+
+def parse_sizes(text):
+    sizes = []
+    for size in text.split(","):
+        entities, years = size.lower().split("x")
+        sizes.append((int(entities), int(years)))
+    return sizes
+
+
+def run(sizes, repeat):
+    """
+    Run every case
+
+    Returns:
+        Dict of case name (e.g. "process_data[10000x60]") -> timing dict
+    """
+    results = {}
+    groups = [("fixture", fixture_cases)] + [
+        (f"{entities}x{years}", lambda e=entities, y=years: size_cases(e, y))
+        for entities, years in sizes
+    ]
+    for label, cases in groups:
+        for name, stmt in cases():
+            case = f"{name}[{label}]"
+            results[case] = measure(stmt, repeat)
+            print(f"  {case:<40} {results[case]['min_ms']:>12.3f} ms", flush=True)
+    return results
+
+
+def environment():
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "plotly": plotly.__version__,
+        "timestamp": time.time(),
+    }
+
+
+def compare(results, baseline, threshold):
+    """
+    Compare the results with a baseline run
+
+    Args:
+        results: Timings of this run
+        baseline: Timings of the baseline run
+        threshold: Allowed slowdown as a fraction (0.25 = 25%)
+
+    Returns:
+        List of (case, baseline ms, current ms, ratio, regressed)
+    """
+    rows = []
+    for case, timing in results.items():
+        before = baseline.get(case)
+        if before is None:
+            continue
+        old, new = before["min_ms"], timing["min_ms"]
+        ratio = new / old if old else float("inf")
+        regressed = ratio > 1 + threshold and new - old > NOISE_FLOOR_MS
+        rows.append((case, old, new, ratio, regressed))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="entities x years, comma-separated")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    parser.add_argument("--output", default=os.path.join(ROOT, "benchmarks", "results.json"))
+    parser.add_argument("--baseline", default=os.path.join(ROOT, "benchmarks", "baseline.json"))
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    parser.add_argument(
+        "--save-baseline",
+        action="store_true",
+        help="Also store this run as the baseline for later comparisons",
+    )
+    args = parser.parse_args()
+
+    results = run(parse_sizes(args.sizes), args.repeat)
+    report = {"environment": environment(), "results": results}
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {args.output}")
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Saved baseline {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print("No baseline to compare with (run with --save-baseline to record one)")
+        return
+
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    rows = compare(results, baseline["results"], args.threshold)
+    print(f"\nCompared with {args.baseline} (threshold +{args.threshold:.0%})")
+    for case, old, new, ratio, regressed in rows:
+        flag = "REGRESSION" if regressed else ""
+        print(f"  {case:<40} {old:>10.3f} -> {new:>10.3f} ms  x{ratio:5.2f} {flag}")
+
+    regressions = [row for row in rows if row[4]]
+    if regressions:
+        print(f"{len(regressions)} regression(s)")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,352 @@
+"""
+Resolution of IMF country names to ISO 3166-1 alpha-3 codes.
+
+The IMF report labels economies with its own names ("Korea", "Türkiye,
+Republic of", "China, People's Republic of"), which Plotly's fuzzy
+"country names" matching gets wrong or silently drops. Names are resolved
+once at ingest through an explicit table and alias list so the map can
+plot by ISO code, and names that can't be resolved are reported instead
+of disappearing from the map.
+"""
+
+import logging
+import re
+import unicodedata
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# IMF WEO name -> ISO-3 code of every economy in the report
+ISO3_CODES = {
+    "Afghanistan": "AFG",
+    "Albania": "ALB",
+    "Algeria": "DZA",
+    "Andorra": "AND",
+    "Angola": "AGO",
+    "Antigua and Barbuda": "ATG",
+    "Argentina": "ARG",
+    "Armenia": "ARM",
+    "Aruba": "ABW",
+    "Australia": "AUS",
+    "Austria": "AUT",
+    "Azerbaijan": "AZE",
+    "The Bahamas": "BHS",
+    "Bahrain": "BHR",
+    "Bangladesh": "BGD",
+    "Barbados": "BRB",
+    "Belarus": "BLR",
+    "Belgium": "BEL",
+    "Belize": "BLZ",
+    "Benin": "BEN",
+    "Bhutan": "BTN",
+    "Bolivia": "BOL",
+    "Bosnia and Herzegovina": "BIH",
+    "Botswana": "BWA",
+    "Brazil": "BRA",
+    "Brunei Darussalam": "BRN",
+    "Bulgaria": "BGR",
+    "Burkina Faso": "BFA",
+    "Burundi": "BDI",
+    "Cabo Verde": "CPV",
+    "Cambodia": "KHM",
+    "Cameroon": "CMR",
+    "Canada": "CAN",
+    "Central African Republic": "CAF",
+    "Chad": "TCD",
+    "Chile": "CHL",
+    "China, People's Republic of": "CHN",
+    "Colombia": "COL",
+    "Comoros": "COM",
+    "Congo, Dem. Rep. of the": "COD",
+    "Congo, Republic of": "COG",
+    "Costa Rica": "CRI",
+    "Côte d'Ivoire": "CIV",
+    "Croatia": "HRV",
+    "Cyprus": "CYP",
+    "Czech Republic": "CZE",
+    "Denmark": "DNK",
+    "Djibouti": "DJI",
+    "Dominica": "DMA",
+    "Dominican Republic": "DOM",
+    "Ecuador": "ECU",
+    "Egypt": "EGY",
+    "El Salvador": "SLV",
+    "Equatorial Guinea": "GNQ",
+    "Eritrea": "ERI",
+    "Estonia": "EST",
+    "Eswatini": "SWZ",
+    "Ethiopia": "ETH",
+    "Fiji": "FJI",
+    "Finland": "FIN",
+    "France": "FRA",
+    "Gabon": "GAB",
+    "The Gambia": "GMB",
+    "Georgia": "GEO",
+    "Germany": "DEU",
+    "Ghana": "GHA",
+    "Greece": "GRC",
+    "Grenada": "GRD",
+    "Guatemala": "GTM",
+    "Guinea": "GIN",
+    "Guinea-Bissau": "GNB",
+    "Guyana": "GUY",
+    "Haiti": "HTI",
+    "Honduras": "HND",
+    "Hong Kong SAR": "HKG",
+    "Hungary": "HUN",
+    "Iceland": "ISL",
+    "India": "IND",
+    "Indonesia": "IDN",
+    "Iran": "IRN",
+    "Iraq": "IRQ",
+    "Ireland": "IRL",
+    "Israel": "ISR",
+    "Italy": "ITA",
+    "Jamaica": "JAM",
+    "Japan": "JPN",
+    "Jordan": "JOR",
+    "Kazakhstan": "KAZ",
+    "Kenya": "KEN",
+    "Kiribati": "KIR",
+    "Korea": "KOR",
+    "Kosovo": "XKX",
+    "Kuwait": "KWT",
+    "Kyrgyz Republic": "KGZ",
+    "Lao P.D.R.": "LAO",
+    "Latvia": "LVA",
+    "Lebanon": "LBN",
+    "Lesotho": "LSO",
+    "Liberia": "LBR",
+    "Libya": "LBY",
+    "Lithuania": "LTU",
+    "Luxembourg": "LUX",
+    "Macao SAR": "MAC",
+    "Madagascar": "MDG",
+    "Malawi": "MWI",
+    "Malaysia": "MYS",
+    "Maldives": "MDV",
+    "Mali": "MLI",
+    "Malta": "MLT",
+    "Marshall Islands": "MHL",
+    "Mauritania": "MRT",
+    "Mauritius": "MUS",
+    "Mexico": "MEX",
+    "Micronesia": "FSM",
+    "Moldova": "MDA",
+    "Mongolia": "MNG",
+    "Montenegro": "MNE",
+    "Morocco": "MAR",
+    "Mozambique": "MOZ",
+    "Myanmar": "MMR",
+    "Namibia": "NAM",
+    "Nauru": "NRU",
+    "Nepal": "NPL",
+    "Netherlands": "NLD",
+    "New Zealand": "NZL",
+    "Nicaragua": "NIC",
+    "Niger": "NER",
+    "Nigeria": "NGA",
+    "North Macedonia": "MKD",
+    "Norway": "NOR",
+    "Oman": "OMN",
+    "Pakistan": "PAK",
+    "Palau": "PLW",
+    "Panama": "PAN",
+    "Papua New Guinea": "PNG",
+    "Paraguay": "PRY",
+    "Peru": "PER",
+    "Philippines": "PHL",
+    "Poland": "POL",
+    "Portugal": "PRT",
+    "Puerto Rico": "PRI",
+    "Qatar": "QAT",
+    "Romania": "ROU",
+    "Russia": "RUS",
+    "Rwanda": "RWA",
+    "Samoa": "WSM",
+    "San Marino": "SMR",
+    "São Tomé and Príncipe": "STP",
+    "Saudi Arabia": "SAU",
+    "Senegal": "SEN",
+    "Serbia": "SRB",
+    "Seychelles": "SYC",
+    "Sierra Leone": "SLE",
+    "Singapore": "SGP",
+    "Slovak Republic": "SVK",
+    "Slovenia": "SVN",
+    "Solomon Islands": "SLB",
+    "Somalia": "SOM",
+    "South Africa": "ZAF",
+    "South Sudan, Republic of": "SSD",
+    "Spain": "ESP",
+    "Sri Lanka": "LKA",
+    "St. Kitts and Nevis": "KNA",
+    "St. Lucia": "LCA",
+    "St. Vincent and the Grenadines": "VCT",
+    "Sudan": "SDN",
+    "Suriname": "SUR",
+    "Sweden": "SWE",
+    "Switzerland": "CHE",
+    "Syria": "SYR",
+    "Taiwan Province of China": "TWN",
+    "Tajikistan": "TJK",
+    "Tanzania": "TZA",
+    "Thailand": "THA",
+    "Timor-Leste": "TLS",
+    "Togo": "TGO",
+    "Tonga": "TON",
+    "Trinidad and Tobago": "TTO",
+    "Tunisia": "TUN",
+    "Türkiye, Republic of": "TUR",
+    "Turkmenistan": "TKM",
+    "Tuvalu": "TUV",
+    "Uganda": "UGA",
+    "Ukraine": "UKR",
+    "United Arab Emirates": "ARE",
+    "United Kingdom": "GBR",
+    "United States": "USA",
+    "Uruguay": "URY",
+    "Uzbekistan": "UZB",
+    "Vanuatu": "VUT",
+    "Venezuela": "VEN",
+    "Vietnam": "VNM",
+    "West Bank and Gaza": "PSE",
+    "Yemen": "YEM",
+    "Zambia": "ZMB",
+    "Zimbabwe": "ZWE",
+}
+
+# Other spellings seen across WEO vintages and data sources
+ALIASES = {
+    "Bahamas": "The Bahamas",
+    "Bahamas, The": "The Bahamas",
+    "Brunei": "Brunei Darussalam",
+    "Cape Verde": "Cabo Verde",
+    "China": "China, People's Republic of",
+    "Congo, Democratic Republic of the": "Congo, Dem. Rep. of the",
+    "Democratic Republic of the Congo": "Congo, Dem. Rep. of the",
+    "Republic of Congo": "Congo, Republic of",
+    "Congo": "Congo, Republic of",
+    "Cote d'Ivoire": "Côte d'Ivoire",
+    "Ivory Coast": "Côte d'Ivoire",
+    "Czechia": "Czech Republic",
+    "Egypt, Arab Rep.": "Egypt",
+    "Gambia": "The Gambia",
+    "Gambia, The": "The Gambia",
+    "Hong Kong": "Hong Kong SAR",
+    "Hong Kong SAR, China": "Hong Kong SAR",
+    "Iran, Islamic Republic of": "Iran",
+    "Islamic Republic of Iran": "Iran",
+    "Korea, Republic of": "Korea",
+    "Republic of Korea": "Korea",
+    "South Korea": "Korea",
+    "Kyrgyzstan": "Kyrgyz Republic",
+    "Lao PDR": "Lao P.D.R.",
+    "Laos": "Lao P.D.R.",
+    "Macao": "Macao SAR",
+    "Macau": "Macao SAR",
+    "Macedonia, FYR": "North Macedonia",
+    "Micronesia, Fed. States of": "Micronesia",
+    "Federated States of Micronesia": "Micronesia",
+    "Moldova, Republic of": "Moldova",
+    "Russian Federation": "Russia",
+    "Sao Tome and Principe": "São Tomé and Príncipe",
+    "Slovakia": "Slovak Republic",
+    "South Sudan": "South Sudan, Republic of",
+    "Saint Kitts and Nevis": "St. Kitts and Nevis",
+    "Saint Lucia": "St. Lucia",
+    "Saint Vincent and the Grenadines": "St. Vincent and the Grenadines",
+    "Swaziland": "Eswatini",
+    "Syrian Arab Republic": "Syria",
+    "Taiwan": "Taiwan Province of China",
+    "Turkey": "Türkiye, Republic of",
+    "Türkiye": "Türkiye, Republic of",
+    "Timor Leste": "Timor-Leste",
+    "East Timor": "Timor-Leste",
+    "United States of America": "United States",
+    "Venezuela, RB": "Venezuela",
+    "Viet Nam": "Vietnam",
+    "Yemen, Rep.": "Yemen",
+    "Palestine": "West Bank and Gaza",
+}
+
+# Codes the IMF uses in its bulk files that differ from ISO 3166-1
+IMF_CODE_FIXES = {
+    "UVK": "XKX",  # Kosovo
+    "WBG": "PSE",  # West Bank and Gaza
+}
+
+
+def normalize_name(name):
+    """
+    Reduce a country name to a form that ignores case, accents and spacing
+
+    Args:
+        name: Country name, e.g. "Türkiye, Republic of "
+
+    Returns:
+        Normalized name, e.g. "turkiye, republic of"
+    """
+    decomposed = unicodedata.normalize("NFKD", str(name))
+    ascii_name = "".join(c for c in decomposed if not unicodedata.combining(c))
+    ascii_name = ascii_name.replace("\u2019", "'")
+    return re.sub(r"\s+", " ", ascii_name).strip(" .").casefold()
+
+
+def _build_lookup():
+    lookup = {normalize_name(name): iso for name, iso in ISO3_CODES.items()}
+    for alias, name in ALIASES.items():
+        lookup[normalize_name(alias)] = ISO3_CODES[name]
+    # Codes resolve to themselves so already coded data passes through
+    for iso in ISO3_CODES.values():
+        lookup.setdefault(iso.casefold(), iso)
+    for imf_code, iso in IMF_CODE_FIXES.items():
+        lookup[imf_code.casefold()] = iso
+    return lookup
+
+
+# Normalized name or code -> ISO-3 code, built once at import
+_LOOKUP = _build_lookup()
+
+
+def resolve_iso3(name):
+    """
+    Look up the ISO-3 code of a country name
+
+    Returns:
+        ISO-3 code, or None if the name isn't known
+    """
+    return _LOOKUP.get(normalize_name(name))
+
+
+def build_iso_index(names, source_codes=None):
+    """
+    Resolve every country name of a dataset to its ISO-3 code
+
+    Args:
+        names: Sequence of country names
+        source_codes: Codes shipped with the data (e.g. the ISO column of a
+            WEO bulk file), preferred over the names when given
+
+    Returns:
+        Tuple of (object array of ISO-3 codes with None where unmatched,
+        list of unmatched names)
+    """
+    if source_codes is None:
+        source_codes = [None] * len(names)
+    codes = np.array(
+        [
+            (code is not None and resolve_iso3(code)) or resolve_iso3(name)
+            for name, code in zip(names, source_codes)
+        ],
+        dtype=object,
+    )
+    unmatched = [name for name, iso in zip(names, codes) if iso is None]
+    if unmatched:
+        logger.warning(
+            "%d countries have no ISO-3 code and won't appear on the map: %s",
+            len(unmatched),
+            ", ".join(unmatched),
+        )
+    return codes, unmatched
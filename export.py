@@ -0,0 +1,287 @@
+"""
+Static export of the default views, for serving without a Python process.
+
+Pre-renders what a visitor sees before changing anything but the year and
+page: the bar chart of every (year, page size, page), the full and
+lightweight map of every year, and the table pages. Each is written as
+standalone HTML, which loads a shared plotly.min.js, and as JSON (Plotly
+figure specs, table records), so a CDN or a plain file server can serve
+them.
+
+The figures come from the same builders and processed views as the app,
+built across cores by a FigureExecutor. A manifest records a
+digest of each output's inputs (the rows it shows, its parameters and the
+Plotly version), and outputs whose digest is unchanged are skipped, so
+re-exporting after a data update only rewrites the pages it touched.
+
+Usage:
+    python export.py [--output site] [--processes 0] [--page-sizes 25,50,100,All]
+        [--force]
+"""
+
+import argparse
+import hashlib
+import html
+import json
+import logging
+import math
+import os
+import time
+
+import pandas as pd
+import plotly
+import plotly.io
+import plotly.offline
+
+from figure_executor import FigureExecutor
+from gdp_data import get_processed_view, load_gdp_data
+from imf_data import DEFAULT_YEAR, GDP_INDICATOR
+
+DEFAULT_OUTPUT = "site"
+DEFAULT_PAGE_SIZES = "25,50,100,All"
+
+# Bump when the layout or format of the outputs changes, to re-render them all
+EXPORT_FORMAT = 1
+
+MANIFEST = "manifest.json"
+PLOTLY_JS = "plotly.min.js"
+
+# Border resolution of the exported lightweight map
+LITE_RESOLUTION = 110
+
+TABLE_COLUMNS = ["Rank", "Country", "ISO", "GDP (Billions USD)"]
+
+
+def export_jobs(view, year, page_sizes):
+    """
+    List the outputs of one year
+
+    Args:
+        view: Processed view of the year from get_processed_view()
+        year: Year label, e.g. "2025"
+        page_sizes: Page sizes as strings, "All" for one page of every row
+
+    Returns:
+        List of (name, kind, year, rows, frame) tuples, where name is the
+        output path without extension and frame holds the rows it shows
+    """
+    jobs = [
+        (f"{year}/map", "map", year, None, view),
+        (f"{year}/map-lite", "map-lite", year, None, view),
+    ]
+    total = len(view)
+    for size in page_sizes:
+        rows = total if size == "All" else int(size)
+        for page in range(math.ceil(total / rows)):
+            frame = view.iloc[page * rows : (page + 1) * rows]
+            label = f"{size.lower()}-{page + 1}"
+            jobs.append((f"{year}/chart-{label}", "chart", year, rows, frame))
+            jobs.append((f"{year}/table-{label}", "table", year, page * rows, frame))
+    return jobs
+
+
+def job_digest(job):
+    """Digest of everything an output depends on"""
+    name, kind, year, rows, frame = job
+    digest = hashlib.sha1(
+        json.dumps([EXPORT_FORMAT, plotly.__version__, name, kind, year, rows]).encode()
+    )
+    digest.update(pd.util.hash_pandas_object(frame, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def figure_task(job):
+    """Return the FigureExecutor task of a chart or map output"""
+    _, kind, year, rows, frame = job
+    if kind == "chart":
+        return kind, frame, (year, rows, 0)
+    if kind == "map-lite":
+        return kind, frame, (year, LITE_RESOLUTION)
+    return kind, frame, (year,)
+
+
+def write_figure(output, name, spec):
+    """Write a figure's JSON and a standalone HTML page drawing it"""
+    _write(os.path.join(output, f"{name}.json"), spec)
+    # The JSON comes from a validated figure; outputs are one folder deep,
+    # next to the shared plotly.js
+    page = plotly.io.to_html(
+        json.loads(spec), include_plotlyjs=f"../{PLOTLY_JS}", full_html=True, validate=False
+    )
+    _write(os.path.join(output, f"{name}.html"), page)
+
+
+def write_table(output, job):
+    """Write a table page as JSON records and as an HTML table"""
+    name, _, year, first_row, frame = job
+    table = frame.assign(Rank=range(first_row + 1, first_row + len(frame) + 1))
+    table = table[TABLE_COLUMNS]
+    _write(os.path.join(output, f"{name}.json"), table.to_json(orient="records"))
+    page = _html_page(
+        f"GDP in {year} (USD Billions)",
+        table.to_html(index=False, float_format="{:,.1f}".format, border=0),
+    )
+    _write(os.path.join(output, f"{name}.html"), page)
+
+
+def _html_page(title, body):
+    return (
+        f"<!DOCTYPE html>\n<html>\n<head><meta charset=\"utf-8\">"
+        f"<title>{html.escape(title)}</title></head>\n"
+        f"<body>\n<h1>{html.escape(title)}</h1>\n{body}\n</body>\n</html>\n"
+    )
+
+
+def _write(path, text):
+    # Written next to the target and renamed, so a file server never sends
+    # a half-written file
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(path + ".tmp", path)
+
+
+def _read_manifest(output):
+    try:
+        with open(os.path.join(output, MANIFEST), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _is_current(output, name, digest, previous):
+    return previous.get(name) == digest and all(
+        os.path.exists(os.path.join(output, f"{name}.{ext}")) for ext in ("html", "json")
+    )
+
+
+def _remove(output, name):
+    for ext in ("html", "json"):
+        try:
+            os.remove(os.path.join(output, f"{name}.{ext}"))
+        except FileNotFoundError:
+            pass
+
+
+def _index_page(years, page_sizes, pages):
+    rows = []
+    for year in years:
+        links = [
+            f'<a href="{year}/map.html">Map</a>',
+            f'<a href="{year}/map-lite.html">Map (light)</a>',
+        ]
+        for size in page_sizes:
+            label = size.lower()
+            links.append(
+                f'<a href="{year}/chart-{label}-1.html">Chart, {size}</a> '
+                f"({pages[year, size]} pages, "
+                f'<a href="{year}/table-{label}-1.html">table</a>)'
+            )
+        rows.append(f"<h2>{year}</h2>\n<p>{' · '.join(links)}</p>")
+    return _html_page("Global GDP Visualization", "\n".join(rows))
+
+
+def export(output=DEFAULT_OUTPUT, processes=0, page_sizes=None, force=False):
+    """
+    Export the default views of every year
+
+    Args:
+        output: Folder to write to, e.g. the document root of a file server
+        processes: Worker processes (0 = one per CPU, 1 = render in this process)
+        page_sizes: Page sizes as strings (default 25, 50, 100 and All)
+        force: Re-render every output, even unchanged ones
+
+    Returns:
+        Dict with the number of rendered, skipped and removed outputs
+    """
+    page_sizes = page_sizes or DEFAULT_PAGE_SIZES.split(",")
+    cube, version = load_gdp_data()
+    years = cube.years_with_data(GDP_INDICATOR)
+
+    jobs = []
+    pages = {}
+    for year in years:
+        year_jobs = export_jobs(get_processed_view(cube, version, year), year, page_sizes)
+        for size in page_sizes:
+            prefix = f"{year}/chart-{size.lower()}-"
+            pages[year, size] = sum(name.startswith(prefix) for name, *_ in year_jobs)
+        jobs += year_jobs
+
+    manifest = _read_manifest(output)
+    previous = {} if force else manifest.get("outputs", {})
+    digests = {job[0]: job_digest(job) for job in jobs}
+    pending = [job for job in jobs if not _is_current(output, job[0], digests[job[0]], previous)]
+
+    plotly_js = os.path.join(output, PLOTLY_JS)
+    if force or manifest.get("plotly") != plotly.__version__ or not os.path.exists(plotly_js):
+        _write(plotly_js, plotly.offline.get_plotlyjs())
+
+    figure_jobs = [job for job in pending if job[1] != "table"]
+    for job in pending:
+        if job[1] == "table":
+            write_table(output, job)
+    # Figures are built in worker processes and written here as they arrive
+    with FigureExecutor(processes) as executor:
+        specs = executor.map(figure_task(job) for job in figure_jobs)
+        for job, spec in zip(figure_jobs, specs):
+            write_figure(output, job[0], spec)
+
+    # Outputs that aren't produced anymore, e.g. pages of a shrunk year
+    stale = set(manifest.get("outputs", {})) - set(digests)
+    for name in stale:
+        _remove(output, name)
+
+    default_year = str(DEFAULT_YEAR) if str(DEFAULT_YEAR) in years else years[-1]
+    _write(os.path.join(output, "index.html"), _index_page(years, page_sizes, pages))
+    _write(
+        os.path.join(output, MANIFEST),
+        json.dumps(
+            {
+                "version": version,
+                "plotly": plotly.__version__,
+                "years": years,
+                "default_year": default_year,
+                "page_sizes": page_sizes,
+                "outputs": digests,
+            },
+            indent=1,
+        ),
+    )
+    return {
+        "rendered": len(pending),
+        "skipped": len(jobs) - len(pending),
+        "removed": len(stale),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the default views as static files")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT)
+    parser.add_argument(
+        "--processes",
+        type=int,
+        default=0,
+        help="Number of rendering processes (0 = one per CPU)",
+    )
+    parser.add_argument(
+        "--page-sizes",
+        default=DEFAULT_PAGE_SIZES,
+        help="Comma-separated page sizes, All for a single page",
+    )
+    parser.add_argument(
+        "--force", action="store_true", help="Re-render outputs even if unchanged"
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    start = time.perf_counter()
+    counts = export(args.output, args.processes, args.page_sizes.split(","), args.force)
+    print(
+        f"Rendered {counts['rendered']}, skipped {counts['skipped']} unchanged, "
+        f"removed {counts['removed']} outputs in {time.perf_counter() - start:.1f} s "
+        f"to {args.output}/"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""
+Process-wide cache of built Plotly figures.
+
+Building a figure through plotly.express takes tens of milliseconds while
+restoring one from its JSON takes about one, and most figures are
+identical for every user (the choropleth for a year doesn't depend on the
+session at all). Figures are stored as serialized JSON keyed by
+(dataset version, year, page, page size, figure type), evicted least
+recently used first once the cache exceeds its memory cap.
+"""
+
+import json
+import os
+import threading
+from collections import OrderedDict
+
+import plotly.graph_objects as go
+
+# Default memory cap, overridable via GDP_FIGURE_CACHE_MB
+DEFAULT_MAX_MB = 64
+
+
+class FigureCache:
+    """LRU cache of figure JSON with a memory cap and hit/miss counters"""
+
+    def __init__(self, max_bytes=None):
+        """
+        Args:
+            max_bytes: Total size of cached JSON before evicting
+                (GDP_FIGURE_CACHE_MB or 64 MB)
+        """
+        if max_bytes is None:
+            max_bytes = float(os.environ.get("GDP_FIGURE_CACHE_MB", DEFAULT_MAX_MB)) * 2**20
+        self.max_bytes = max_bytes
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get_json(self, key):
+        """Return the cached JSON for a key, or None, counting the lookup"""
+        with self._lock:
+            spec = self._entries.get(key)
+            if spec is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return spec
+
+    def size(self, key):
+        """Return the JSON size of a cached figure without counting a lookup"""
+        with self._lock:
+            spec = self._entries.get(key)
+            return None if spec is None else len(spec)
+
+    def put_json(self, key, spec):
+        """Store figure JSON, evicting the least recently used entries if needed"""
+        size = len(spec)
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.nbytes -= len(old)
+            self._entries[key] = spec
+            self.nbytes += size
+
+            while self.nbytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.nbytes -= len(evicted)
+                self.evictions += 1
+
+    def get_or_build(self, key, build):
+        """
+        Return the figure for a key, building and caching it on a miss
+
+        Args:
+            key: Tuple of (dataset version, year, page, page size, figure type)
+            build: Callable returning a Plotly figure or None
+
+        Returns:
+            Plotly figure, or None if build() returned None
+        """
+        spec = self.get_json(key)
+        if spec is not None:
+            # The JSON came from a validated figure, so skip re-validating it
+            return go.Figure(json.loads(spec), _validate=False)
+
+        fig = build()
+        if fig is not None:
+            self.put_json(key, fig.to_json())
+        return fig
+
+    def invalidate(self, predicate=None):
+        """
+        Drop cached figures
+
+        Args:
+            predicate: Callable taking a key and returning whether to drop it
+                (drops everything if None)
+
+        Returns:
+            Number of dropped figures
+        """
+        with self._lock:
+            keys = [key for key in self._entries if predicate is None or predicate(key)]
+            for key in keys:
+                self.nbytes -= len(self._entries.pop(key))
+            return len(keys)
+
+    def stats(self):
+        """Return the cache counters as a dict"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self.nbytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+# Shared by every session of the process
+figure_cache = FigureCache()
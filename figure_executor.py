@@ -0,0 +1,154 @@
+"""
+Parallel figure building in worker processes.
+
+Building a Plotly figure is pure Python and holds the GIL, so views built
+one after another (every year of a comparison page, every page of an
+export) use a single core. FigureExecutor builds them in a process pool
+instead: each task ships the builder's name and a compact slice of the
+processed view (only the rows and columns the figure shows) to a worker,
+which returns the figure's JSON, the form the figure cache and exports
+store anyway.
+
+At most max_pending tasks are in flight, so a long task list doesn't
+queue every data slice in memory at once. When a pool can't be started
+(one CPU, GDP_RENDER_PROCESSES=1, platforms without process semaphores)
+or a worker dies, figures are built in the calling process instead.
+"""
+
+import logging
+import multiprocessing
+import os
+from collections import deque
+from concurrent.futures import CancelledError, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from figures import create_gdp_chart, create_gdp_map, create_gdp_map_lite, create_group_map
+
+logger = logging.getLogger(__name__)
+
+# Task kind -> figure builder, called as builder(frame, *args)
+BUILDERS = {
+    "chart": create_gdp_chart,
+    "map": create_gdp_map,
+    "map-lite": create_gdp_map_lite,
+    "group-map": create_group_map,
+}
+
+# Columns of the processed views the builders read; others aren't shipped
+FIGURE_COLUMNS = ("Country", "ISO", "Group", "GDP (Billions USD)", "GDP_formatted")
+
+# Tasks in flight per worker process
+PENDING_PER_PROCESS = 4
+
+
+def compact(frame):
+    """Return the columns of a view the figure builders need"""
+    return frame[[column for column in frame.columns if column in FIGURE_COLUMNS]]
+
+
+def build_figure_json(kind, frame, args):
+    """
+    Build one figure and serialize it
+
+    Runs in the worker processes, or in the caller's as a fallback.
+
+    Args:
+        kind: Key of BUILDERS
+        frame: Processed view or slice of it
+        args: Further builder arguments, e.g. (year, rows, page)
+
+    Returns:
+        Figure JSON, or None if the builder returned no figure
+    """
+    fig = BUILDERS[kind](frame, *args)
+    return None if fig is None else fig.to_json()
+
+
+class FigureExecutor:
+    """Builds figures in a bounded process pool, or in-process as a fallback"""
+
+    def __init__(self, processes=None, max_pending=None):
+        """
+        Args:
+            processes: Worker processes (GDP_RENDER_PROCESSES, 0 = one per CPU,
+                1 = build in the calling process)
+            max_pending: Tasks in flight at once (4 per process by default)
+        """
+        if processes is None:
+            processes = int(os.environ.get("GDP_RENDER_PROCESSES", "0"))
+        self.processes = processes or os.cpu_count() or 1
+        self.max_pending = max_pending or self.processes * PENDING_PER_PROCESS
+
+        self._pool = None
+        if self.processes > 1:
+            try:
+                # Spawned rather than forked: the caller may be running
+                # threads (snapshot refreshes, a web server) whose locks a
+                # forked child would inherit
+                self._pool = ProcessPoolExecutor(
+                    self.processes, mp_context=multiprocessing.get_context("spawn")
+                )
+            except (OSError, NotImplementedError) as e:
+                logger.warning("Building figures in-process, no process pool: %s", e)
+
+    @property
+    def parallel(self):
+        """Whether figures are built in worker processes"""
+        return self._pool is not None
+
+    def map(self, tasks):
+        """
+        Build figures, yielding their JSON in task order
+
+        Args:
+            tasks: Iterable of (kind, frame, args) tuples, see build_figure_json()
+
+        Yields:
+            Figure JSON (or None) of each task
+        """
+        in_flight = deque()
+        for kind, frame, args in tasks:
+            task = (kind, compact(frame), tuple(args))
+            if self._pool is None and not in_flight:
+                yield build_figure_json(*task)
+                continue
+            if len(in_flight) >= self.max_pending:
+                yield self._result(*in_flight.popleft())
+            in_flight.append((task, self._submit(task)))
+        while in_flight:
+            yield self._result(*in_flight.popleft())
+
+    def _submit(self, task):
+        if self._pool is None:
+            return None
+        try:
+            return self._pool.submit(build_figure_json, *task)
+        except BrokenProcessPool:
+            self._fall_back()
+            return None
+
+    def _result(self, task, future):
+        if future is not None:
+            try:
+                return future.result()
+            except (BrokenProcessPool, CancelledError):
+                self._fall_back()
+        return build_figure_json(*task)
+
+    def _fall_back(self):
+        if self._pool is not None:
+            logger.warning("Figure worker process died, building figures in-process")
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    def close(self):
+        """Stop the worker processes"""
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
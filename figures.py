@@ -0,0 +1,671 @@
+"""
+Plotly figures of the GDP views.
+
+Built with plotly.graph_objects only: Streamlit has already imported it
+when the app script starts, while plotly.express costs another import on
+every fresh worker and wraps each figure in extra subplot setup. The
+builders take the shared processed views and return figures that the
+figure cache stores as JSON.
+"""
+
+import numpy as np
+import plotly.colors as pc
+import plotly.graph_objects as go
+
+# Number of color classes of the lightweight map
+MAP_CLASSES = 7
+
+# Trend metric label -> (axis label, GrowthAnalytics.series metric, tick format)
+TREND_METRICS = {
+    "GDP": ("GDP (Billions USD)", "value", ",.0f"),
+    "Growth (year over year)": ("Growth", "yoy", ".1%"),
+    "Share of world GDP": ("Share of world GDP", "share", ".1%"),
+    "GDP, 3-year average": ("GDP, 3-year average (Billions USD)", "rolling", ",.0f"),
+    "Rank": ("Rank", "rank", "d"),
+}
+
+# Countries in each year of the animated bar chart
+TIMELINE_TOP_N = 15
+
+# Milliseconds per year when the timeline plays
+TIMELINE_FRAME_MS = 1000
+
+
+def create_gdp_chart(df, selected_year, countries_per_page=25, page=0):
+    """
+    Create a bar chart visualization of GDP data
+
+    Args:
+        df: Processed DataFrame with GDP data
+        selected_year: Selected year for the data
+        countries_per_page: Number of countries to display per page
+        page: Current page number (0-indexed)
+
+    Returns:
+        Plotly figure object
+    """
+    if df is None or df.empty:
+        return None
+
+    # Calculate pagination
+    start_idx = page * countries_per_page
+    end_idx = start_idx + countries_per_page
+
+    # Get the subset of data for the current page
+    page_df = df.iloc[start_idx:end_idx].copy()
+
+    # Calculate dynamic height based on number of countries (minimum 600px)
+    # Each country bar needs about 30px of height
+    height = max(600, countries_per_page * 30)
+
+    # Create bar chart using Plotly
+    fig = go.Figure(
+        go.Bar(
+            x=page_df["GDP (Billions USD)"],
+            y=page_df["Country"],
+            text=page_df["GDP_formatted"],
+            orientation="h",
+            showlegend=False,
+        )
+    )
+    fig.update_layout(title_text=f"GDP in {selected_year} (USD Billions)", height=height)
+
+    # Customize the appearance
+    fig.update_layout(
+        xaxis_title="GDP (Billions USD)",
+        yaxis={
+            "categoryorder": "total ascending",
+            "automargin": True,  # Give more space for country names
+            "title": None,
+            "tickfont": {"size": 12, "color": "#495057"},
+        },
+        font=dict(size=12),
+        margin=dict(l=20, r=20, t=50, b=20),
+        # Remove color axis/colorbar
+        coloraxis_showscale=False,
+        # Improve the appearance of the plot with better styling
+        plot_bgcolor="white",
+        paper_bgcolor="white",
+        title={
+            "font": {"size": 18, "color": "#212529", "family": "Arial, sans-serif"},
+            "x": 0.5,
+            "xanchor": "center",
+        },
+        xaxis={
+            "showgrid": True,
+            "gridwidth": 1,
+            "gridcolor": "#f1f3f5",
+            "title": {"font": {"size": 14, "color": "#495057"}},
+        },
+    )
+
+    fig.update_traces(
+        textposition="outside",
+        hovertemplate="<b>%{y}</b><br>GDP: %{text}<extra></extra>",
+        marker_line_width=0,
+        # Adding a slight gradient effect to bars
+        marker_color="#0466c8",
+        opacity=0.9,
+    )
+
+    return fig
+
+
+def create_gdp_map(df, selected_year):
+    """
+    Create a choropleth map visualization of GDP data
+
+    Args:
+        df: Processed DataFrame with GDP data
+        selected_year: Selected year for the data
+
+    Returns:
+        Plotly figure object
+    """
+    if df is None or df.empty:
+        return None
+
+    # Countries without an ISO-3 code were reported at ingest and can't be drawn
+    df = df[df["ISO"].notna()]
+
+    # Create choropleth map using Plotly
+    fig = go.Figure(
+        go.Choropleth(
+            locations=df["ISO"],  # Use the ISO-3 codes resolved at ingest
+            locationmode="ISO-3",  # Match codes to country boundaries exactly
+            z=df["GDP (Billions USD)"],
+            hovertext=df["Country"],
+            coloraxis="coloraxis",
+        )
+    )
+    fig.update_layout(
+        title_text=f"Global GDP Distribution {selected_year} (USD Billions)",
+        coloraxis=dict(
+            colorscale="YlGnBu",  # Yellow-Green-Blue colorscale
+            cmin=0,  # Full range of values
+            cmax=df["GDP (Billions USD)"].max(),
+        ),
+    )
+
+    # Show the country and value only, without repeating the ISO code
+    fig.update_traces(
+        hovertemplate="<b>%{hovertext}</b><br><br>GDP (Billions USD)=%{z}<extra></extra>"
+    )
+
+    # Customize the appearance
+    fig.update_layout(
+        coloraxis_colorbar=dict(
+            title="GDP (Billions USD)",
+            tickfont={"size": 12, "color": "#495057"},
+            titlefont={"size": 14, "color": "#495057"},
+            len=0.5,  # Make the colorbar shorter
+            # Use a logarithmic scale to better show the range of values
+            tickvals=[100, 1000, 5000, 10000, 20000, 30000],
+            ticktext=["100", "1.000", "5.000", "10.000", "20.000", "30.000"],
+            # Increase number of color segments for more granularity
+            nticks=100,
+        ),
+        margin=dict(l=0, r=0, t=50, b=0),
+        geo=dict(
+            showframe=False,
+            showcountries=True,
+            showcoastlines=True,
+            projection_type="equirectangular",
+            landcolor="rgb(240, 240, 240)",
+            oceancolor="rgb(220, 240, 255)",
+            coastlinecolor="rgb(150, 150, 150)",
+            countrycolor="rgb(150, 150, 150)",
+        ),
+        height=600,
+        # Improve the appearance of the plot with better styling
+        plot_bgcolor="white",
+        paper_bgcolor="white",
+        title={
+            "font": {"size": 18, "color": "#212529", "family": "Arial, sans-serif"},
+            "x": 0.5,
+            "xanchor": "center",
+        },
+    )
+
+    return fig
+
+
+def map_color_classes(values, n_classes=MAP_CLASSES):
+    """
+    Bin positive values into log-spaced color classes
+
+    Args:
+        values: Array of values
+        n_classes: Number of color classes
+
+    Returns:
+        Tuple of (class index per value, class edges rounded to 2 significant
+        digits). Zero, negative and missing values can't be placed on a log
+        scale and get class -1. When the positive values are all equal there
+        is a single class, and without positive values there are no edges
+    """
+    values = np.asarray(values, dtype=np.float64)
+    # NaN compares False, so missing values aren't positive either
+    positive = values > 0
+    classes = np.full(len(values), -1)
+    if not positive.any():
+        return classes, np.array([])
+
+    low, high = values[positive].min(), values[positive].max()
+    edges = np.geomspace(low, high, n_classes + 1)
+    # Round the edges so the legend shows readable numbers
+    digits = 1 - np.floor(np.log10(edges)).astype(int)
+    edges = np.unique([round(edge, digit) for edge, digit in zip(edges, digits)])
+    if len(edges) < 2:
+        classes[positive] = 0
+        return classes, np.array([low, high])
+
+    found = np.searchsorted(edges, values[positive], side="right") - 1
+    classes[positive] = np.clip(found, 0, len(edges) - 2)
+    return classes, edges
+
+
+def create_gdp_map_lite(df, selected_year, resolution=110):
+    """
+    Create a lightweight choropleth map of GDP data
+
+    Values are shipped as a handful of log-spaced color classes instead of
+    a continuous scale, without the default Plotly template, so the figure
+    JSON is a fraction of create_gdp_map's and faster to draw.
+
+    Args:
+        df: Processed DataFrame with GDP data
+        selected_year: Selected year for the data
+        resolution: Scale of Plotly's country borders, 110 (1:110m) being
+            the coarsest
+
+    Returns:
+        Plotly figure object
+    """
+    if df is None or df.empty:
+        return None
+
+    # Countries without an ISO-3 code were reported at ingest and can't be drawn
+    df = df[df["ISO"].notna()]
+
+    classes, edges = map_color_classes(df["GDP (Billions USD)"].to_numpy())
+    # Zero and negative values have no class and are left blank too
+    drawn = classes >= 0
+    df, classes = df[drawn], classes[drawn]
+    n_classes = max(len(edges) - 1, 1)
+
+    # Stepped colorscale so each class gets one flat color
+    # A single class gets the middle color
+    points = np.linspace(0, 1, n_classes) if n_classes > 1 else [0.5]
+    colors = pc.sample_colorscale("YlGnBu", list(points))
+    colorscale = []
+    for i, color in enumerate(colors):
+        colorscale += [[i / n_classes, color], [(i + 1) / n_classes, color]]
+
+    fig = go.Figure(
+        go.Choropleth(
+            locations=df["ISO"],
+            locationmode="ISO-3",
+            z=classes,
+            zmin=-0.5,
+            zmax=n_classes - 0.5,
+            colorscale=colorscale,
+            hovertext=df["Country"],
+            text=df["GDP_formatted"],
+            hovertemplate="<b>%{hovertext}</b><br>GDP: %{text}<extra></extra>",
+            marker_line_width=0.5,
+            marker_line_color="rgb(150, 150, 150)",
+            showscale=len(edges) > 0,
+            colorbar=dict(
+                title="GDP (Billions USD)",
+                tickvals=list(range(n_classes)),
+                ticktext=[f"{lo:,g}–{hi:,g}" for lo, hi in zip(edges, edges[1:])],
+                len=0.5,
+            ),
+        )
+    )
+
+    fig.update_layout(
+        # An empty template keeps Plotly's default theme out of the payload
+        template=go.layout.Template(),
+        title={
+            "text": f"Global GDP Distribution {selected_year} (USD Billions)",
+            "x": 0.5,
+            "xanchor": "center",
+        },
+        margin=dict(l=0, r=0, t=50, b=0),
+        geo=dict(
+            showframe=False,
+            showcoastlines=False,
+            resolution=resolution,
+            projection_type="equirectangular",
+            landcolor="rgb(240, 240, 240)",
+        ),
+        height=600,
+    )
+
+    return fig
+
+
+def create_group_map(df, selected_year, family):
+    """
+    Create a choropleth map coloring every country by its group's GDP
+
+    Args:
+        df: DataFrame from GroupAggregates.map_view()
+        selected_year: Selected year for the data
+        family: Group family shown, e.g. "Region"
+
+    Returns:
+        Plotly figure object
+    """
+    if df is None or df.empty:
+        return None
+
+    fig = go.Figure(
+        go.Choropleth(
+            locations=df["ISO"],
+            locationmode="ISO-3",
+            z=df["GDP (Billions USD)"],
+            colorscale="YlGnBu",
+            hovertext=df["Group"],
+            text=df["GDP_formatted"],
+            hovertemplate="<b>%{hovertext}</b><br>GDP: %{text}<extra></extra>",
+            marker_line_width=0.5,
+            marker_line_color="rgb(150, 150, 150)",
+            colorbar=dict(title="GDP (Billions USD)", len=0.5),
+        )
+    )
+
+    fig.update_layout(
+        template=go.layout.Template(),
+        title={
+            "text": f"GDP by {family.lower()} {selected_year} (USD Billions)",
+            "x": 0.5,
+            "xanchor": "center",
+        },
+        margin=dict(l=0, r=0, t=50, b=0),
+        geo=dict(
+            showframe=False,
+            showcoastlines=False,
+            projection_type="equirectangular",
+            landcolor="rgb(240, 240, 240)",
+        ),
+        height=600,
+    )
+
+    return fig
+
+
+def create_trend_chart(series, metric):
+    """
+    Create a line chart of one metric over the years for several countries
+
+    Args:
+        series: Long DataFrame from GrowthAnalytics.series()
+        metric: Key of TREND_METRICS
+
+    Returns:
+        Plotly figure object
+    """
+    if series is None or series.empty:
+        return None
+
+    label, column, tick_format = TREND_METRICS[metric]
+    fig = go.Figure(
+        [
+            go.Scatter(
+                x=rows["Year"],
+                y=rows[column],
+                mode="lines+markers",
+                name=country,
+                hovertemplate=(
+                    f"<b>{country}</b><br>%{{x}}: %{{y:{tick_format}}}<extra></extra>"
+                ),
+            )
+            # One line per country, in the order they were selected
+            for country, rows in series.groupby("Country", sort=False)
+        ]
+    )
+
+    fig.update_layout(
+        height=500,
+        font=dict(size=12),
+        margin=dict(l=20, r=20, t=50, b=20),
+        plot_bgcolor="white",
+        paper_bgcolor="white",
+        title={
+            "text": f"{label} by Year",
+            "font": {"size": 18, "color": "#212529", "family": "Arial, sans-serif"},
+            "x": 0.5,
+            "xanchor": "center",
+        },
+        xaxis={"title": "", "dtick": 1, "showgrid": False},
+        yaxis={
+            "title": label,
+            "showgrid": True,
+            "gridcolor": "#f1f3f5",
+            "tickformat": tick_format,
+            # Rank 1 belongs at the top
+            "autorange": "reversed" if column == "rank" else True,
+        },
+        legend_title_text="",
+    )
+    return fig
+
+
+def create_rank_change_chart(summary, selected_year, base_year, top_n=25):
+    """
+    Create a bar chart of how the top countries' ranks moved since a base year
+
+    Args:
+        summary: DataFrame from GrowthAnalytics.summary()
+        selected_year: Year the countries are ranked in
+        base_year: Year the ranks are compared to
+        top_n: Number of top-ranked countries to show
+
+    Returns:
+        Plotly figure object
+    """
+    if summary is None or summary.empty:
+        return None
+
+    top = summary.head(top_n)
+    change = top["Rank change"]
+    fig = go.Figure(
+        go.Bar(
+            x=change,
+            y=top["Country"],
+            orientation="h",
+            marker_color=np.where(change >= 0, "#2b9348", "#d00000"),
+            customdata=np.column_stack([top["Rank"], top["CAGR"] * 100]),
+            hovertemplate=(
+                "<b>%{y}</b><br>Rank %{customdata[0]:.0f}, %{x:+.0f} places"
+                "<br>CAGR %{customdata[1]:.1f}%<extra></extra>"
+            ),
+        )
+    )
+
+    fig.update_layout(
+        title={
+            "text": f"Rank Change {base_year}–{selected_year} (Top {len(top)})",
+            "font": {"size": 18, "color": "#212529", "family": "Arial, sans-serif"},
+            "x": 0.5,
+            "xanchor": "center",
+        },
+        height=max(400, len(top) * 24),
+        margin=dict(l=20, r=20, t=50, b=20),
+        plot_bgcolor="white",
+        paper_bgcolor="white",
+        xaxis={
+            "title": "Places gained",
+            "zeroline": True,
+            "zerolinecolor": "#adb5bd",
+            "gridcolor": "#f1f3f5",
+        },
+        # Keep the ranking order, best at the top
+        yaxis={"autorange": "reversed", "automargin": True},
+    )
+    return fig
+
+
+def _timeline_controls(years):
+    """
+    Play/pause buttons and a year slider stepping through animation frames
+
+    Stepping happens in the browser, from frames named after the years.
+
+    Returns:
+        Tuple of (updatemenus, sliders) layout settings
+    """
+    step = {
+        "frame": {"duration": TIMELINE_FRAME_MS, "redraw": True},
+        "transition": {"duration": TIMELINE_FRAME_MS // 2},
+        "mode": "immediate",
+    }
+    updatemenus = [
+        {
+            "type": "buttons",
+            "direction": "left",
+            "showactive": False,
+            "x": 0,
+            "xanchor": "left",
+            "y": 0,
+            "yanchor": "top",
+            "pad": {"t": 40, "r": 10},
+            "buttons": [
+                {
+                    "label": "▶ Play",
+                    "method": "animate",
+                    "args": [None, {**step, "fromcurrent": True}],
+                },
+                {
+                    "label": "❚❚ Pause",
+                    "method": "animate",
+                    "args": [
+                        [None],
+                        {"frame": {"duration": 0, "redraw": False}, "mode": "immediate"},
+                    ],
+                },
+            ],
+        }
+    ]
+    sliders = [
+        {
+            "active": 0,
+            "x": 0.12,
+            "len": 0.88,
+            "y": 0,
+            "yanchor": "top",
+            "pad": {"t": 30},
+            "currentvalue": {"prefix": "Year: "},
+            "steps": [
+                {"label": year, "method": "animate", "args": [[year], step]} for year in years
+            ],
+        }
+    ]
+    return updatemenus, sliders
+
+
+def create_timeline_chart(timeline, top_n=TIMELINE_TOP_N):
+    """
+    Create an animated bar chart of the top countries of every year
+
+    Args:
+        timeline: Long DataFrame from YearRankings.timeline()
+        top_n: Number of countries shown per year
+
+    Returns:
+        Plotly figure object with one animation frame per year
+    """
+    if timeline is None or timeline.empty:
+        return None
+
+    top = timeline[timeline["Rank"] <= top_n]
+    frames = [
+        go.Frame(
+            name=year,
+            data=[
+                go.Bar(
+                    x=rows["GDP (Billions USD)"],
+                    y=rows["Country"],
+                    text=rows["GDP_formatted"],
+                )
+            ],
+            layout={"title": {"text": f"GDP in {year} (USD Billions)"}},
+        )
+        for year, rows in top.groupby("Year", sort=False)
+    ]
+
+    fig = go.Figure(data=frames[0].data, frames=frames)
+    fig.update_traces(
+        orientation="h",
+        textposition="outside",
+        hovertemplate="<b>%{y}</b><br>GDP: %{text}<extra></extra>",
+        marker_line_width=0,
+        marker_color="#0466c8",
+        opacity=0.9,
+        showlegend=False,
+    )
+
+    updatemenus, sliders = _timeline_controls([frame.name for frame in frames])
+    fig.update_layout(
+        height=max(500, top_n * 30) + 100,
+        font=dict(size=12),
+        margin=dict(l=20, r=20, t=50, b=20),
+        plot_bgcolor="white",
+        paper_bgcolor="white",
+        title={
+            "text": frames[0].layout.title.text,
+            "font": {"size": 18, "color": "#212529", "family": "Arial, sans-serif"},
+            "x": 0.5,
+            "xanchor": "center",
+        },
+        # One scale for all years, so growth shows as longer bars
+        xaxis={
+            "title": "GDP (Billions USD)",
+            "range": [0, top["GDP (Billions USD)"].max() * 1.15],
+            "showgrid": True,
+            "gridcolor": "#f1f3f5",
+        },
+        yaxis={
+            "categoryorder": "total ascending",
+            "automargin": True,
+            "title": None,
+            "tickfont": {"size": 12, "color": "#495057"},
+        },
+        updatemenus=updatemenus,
+        sliders=sliders,
+    )
+    return fig
+
+
+def create_timeline_map(timeline):
+    """
+    Create an animated choropleth map of GDP in every year
+
+    Args:
+        timeline: Long DataFrame from YearRankings.timeline()
+
+    Returns:
+        Plotly figure object with one animation frame per year
+    """
+    if timeline is None or timeline.empty:
+        return None
+
+    # Countries without an ISO-3 code were reported at ingest and can't be drawn
+    drawable = timeline[timeline["ISO"].notna()]
+    frames = [
+        go.Frame(
+            name=year,
+            data=[
+                go.Choropleth(
+                    locations=rows["ISO"],
+                    z=rows["GDP (Billions USD)"],
+                    hovertext=rows["Country"],
+                    text=rows["GDP_formatted"],
+                )
+            ],
+            layout={"title": {"text": f"Global GDP Distribution {year} (USD Billions)"}},
+        )
+        for year, rows in drawable.groupby("Year", sort=False)
+    ]
+
+    fig = go.Figure(data=frames[0].data, frames=frames)
+    fig.update_traces(
+        locationmode="ISO-3",
+        coloraxis="coloraxis",
+        hovertemplate="<b>%{hovertext}</b><br>GDP: %{text}<extra></extra>",
+        marker_line_width=0.5,
+        marker_line_color="rgb(150, 150, 150)",
+    )
+
+    updatemenus, sliders = _timeline_controls([frame.name for frame in frames])
+    fig.update_layout(
+        # An empty template keeps Plotly's default theme out of the payload
+        template=go.layout.Template(),
+        title={
+            "text": frames[0].layout.title.text,
+            "font": {"size": 18, "color": "#212529", "family": "Arial, sans-serif"},
+            "x": 0.5,
+            "xanchor": "center",
+        },
+        # One color scale for all years, so growth shows as a darker color
+        coloraxis=dict(
+            colorscale="YlGnBu",
+            cmin=0,
+            cmax=drawable["GDP (Billions USD)"].max(),
+            colorbar=dict(title="GDP (Billions USD)", len=0.5),
+        ),
+        margin=dict(l=0, r=0, t=50, b=0),
+        geo=dict(
+            showframe=False,
+            showcoastlines=False,
+            projection_type="equirectangular",
+            landcolor="rgb(240, 240, 240)",
+        ),
+        height=700,
+        updatemenus=updatemenus,
+        sliders=sliders,
+    )
+    return fig
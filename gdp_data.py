@@ -0,0 +1,652 @@
+"""
+Process-wide GDP dataset shared by every session.
+
+The WEO data and the per-year views derived from it are identical for all
+users, so they are held once per process instead of being copied into
+each session's st.session_state. Sessions keep only references and their
+UI state (page, page size, year). Everything returned from here is shared
+and must be treated as read-only.
+"""
+
+import functools
+import logging
+import os
+import sys
+import threading
+
+import numpy as np
+import pandas as pd
+
+import shared_dataset
+from analytics import GrowthAnalytics
+from figure_cache import figure_cache
+from groups import GroupIndex
+from imf_data import (
+    END_YEAR,
+    GDP_INDICATOR,
+    START_YEAR,
+    WEO_VINTAGE,
+    fetch_imf_gdp_data,
+    imf_source,
+    report_indicators,
+)
+from instrumentation import metrics
+from rankings import YearRankings
+from shared_dataset import SharedDatasets
+from snapshot_store import SnapshotStore, snapshot_key
+from weo_bulk import read_weo_bulk, weo_bulk_key, weo_bulk_sources, weo_bulk_vintage
+from weo_cube import WeoCube
+from weo_delta import delta_years
+
+logger = logging.getLogger(__name__)
+
+GDP_SNAPSHOT_KEY = snapshot_key(WEO_VINTAGE, GDP_INDICATOR, START_YEAR, END_YEAR)
+
+# Parsed IMF data is kept on disk so restarts don't re-download the report
+snapshot_store = SnapshotStore()
+
+# Built datasets are written once per host and memory-mapped by every worker
+shared_datasets = (
+    SharedDatasets(os.path.join(snapshot_store.directory, "shared"))
+    if shared_dataset.ENABLED
+    else None
+)
+
+# (year version, year) -> processed view, shared by all sessions
+_views = {}
+_views_lock = threading.Lock()
+_view_lookups = {"hits": 0, "misses": 0}
+
+_scheduler = None
+
+# Dataset version -> _Dataset. The previous version is kept too so sessions
+# still rendering it after a swap don't have to rebuild it.
+_datasets = {}
+MAX_DATASETS = 2
+
+
+class _Dataset:
+    """
+    Data derived from one dataset version
+
+    year_versions maps each year to the dataset version its data last
+    changed in. Per-year views and figures are cached under that version,
+    so after an update that revises only some years, the cached views of
+    the other years keep being used.
+    """
+
+    def __init__(self, cube, rankings, as_of, year_versions, revisions, shared=False):
+        self.cube = cube
+        self.rankings = rankings
+        # Whether the cube and rankings are memory maps of shared_datasets
+        self.shared = shared
+        self.as_of = as_of
+        self.year_versions = year_versions
+        self.revisions = revisions
+        # (indicator, vintage) -> GrowthAnalytics, built on first use
+        self.analytics = {}
+        # Group membership of the cube's countries and GDP group aggregates
+        self.groups = None
+        self.group_aggregates = None
+        # GDP rankings of every year in one long frame, built on first use
+        self.timeline = None
+
+
+def _snapshot_sources():
+    """
+    List the snapshots the dataset is built from
+
+    When GDP_WEO_BULK_PATH is set the data comes from the WEO bulk files
+    (all their indicators and vintages) instead of the HTML report. When
+    GDP_INDICATORS lists more than GDP, the report is fetched once per
+    indicator concurrently.
+
+    Returns:
+        List of (vintage, snapshot key, location, parse) tuples, where
+        parse reads the location (or a file object with its contents)
+    """
+    bulk_sources = weo_bulk_sources()
+    if bulk_sources:
+        return [
+            (weo_bulk_vintage(source), weo_bulk_key(source), source, read_weo_bulk)
+            for source in bulk_sources
+        ]
+    indicators = report_indicators()
+    if indicators != (GDP_INDICATOR,):
+        key = snapshot_key(WEO_VINTAGE, "+".join(indicators), START_YEAR, END_YEAR)
+        return [(WEO_VINTAGE, key, indicators, _fetch_weo_indicators)]
+    return [(WEO_VINTAGE, GDP_SNAPSHOT_KEY, imf_source(), fetch_imf_gdp_data)]
+
+
+def _fetch_weo_indicators(indicators):
+    # The batch fetcher and its HTTP stack are only imported when a fetch is
+    # needed, not by workers starting from a stored snapshot
+    from weo_batch import fetch_weo_indicators
+
+    return fetch_weo_indicators(indicators)
+
+
+def load_gdp_data():
+    """
+    Return the shared WEO data cube and its version
+
+    The data is served from the snapshot store, which refreshes it in the
+    background once it is older than the snapshot TTL. The version changes
+    whenever a new snapshot is swapped in.
+
+    When another worker of the host already built the version the snapshot
+    metadata points to, its cube and rankings are mapped from
+    shared_datasets instead, without reading the snapshots.
+
+    Returns:
+        Tuple of (WeoCube, version string)
+    """
+    if shared_datasets is not None:
+        shared = _shared_dataset()
+        if shared is not None:
+            return shared
+
+    snapshots = [
+        (vintage, _load_snapshot(key, location, parse))
+        for vintage, key, location, parse in _snapshot_sources()
+    ]
+    return _dataset(snapshots)
+
+
+def _load_snapshot(key, location, parse):
+    return snapshot_store.load(
+        key,
+        functools.partial(parse, location),
+        refresh=functools.partial(_refresh_snapshot, key, location, parse),
+    )
+
+
+def _refresh_snapshot(key, location, parse):
+    """
+    Refresh a stale snapshot the way the scheduler's polls do
+
+    The source gets a conditional request, new data is validated, and the
+    dataset including it is built before it is swapped in.
+    """
+    _refresher().refresh(key, location, parse)
+
+
+def _shared_dataset():
+    """
+    Map the dataset version of the stored snapshots, if it was published
+
+    Returns:
+        Tuple of (WeoCube, version string), or None
+    """
+    metas = []
+    for _, key, location, parse in _snapshot_sources():
+        meta = snapshot_store.meta(key)
+        if meta is None:
+            return None
+        if snapshot_store.is_stale(meta):
+            snapshot_store.refresh_in_background(
+                key, functools.partial(_refresh_snapshot, key, location, parse)
+            )
+        metas.append(meta)
+    version = ",".join(_version(meta) for meta in metas)
+
+    with _views_lock:
+        dataset = _datasets.get(version)
+    if dataset is None:
+        with metrics.stage("dataset:map"):
+            mapped = shared_datasets.open(version)
+        if mapped is None:
+            return None
+        cube, rankings, header = mapped
+        dataset = _store_dataset(
+            version,
+            _Dataset(
+                cube,
+                rankings,
+                header["as_of"],
+                header["year_versions"],
+                _stored_revisions(metas),
+                shared=True,
+            ),
+        )
+    return dataset.cube, version
+
+
+def prepare_snapshot(key, frame, meta, delta):
+    """
+    Build the dataset that includes a new snapshot before it is swapped in
+
+    Passed as the before_swap hook of SnapshotStore.write(), so the first
+    render after a refresh finds the cube and rankings already built. Only
+    the cached views and figures of the years the update revised are
+    dropped.
+
+    Args:
+        key: Key of the snapshot being written
+        frame: New snapshot data
+        meta: Metadata the snapshot will be stored with
+        delta: Cells changed since the stored snapshot (None if there was none)
+    """
+    snapshots = []
+    previous = []
+    for vintage, source_key, location, parse in _snapshot_sources():
+        if source_key == key:
+            current = snapshot_store.current(key)
+            snapshots.append((vintage, (frame, meta)))
+        else:
+            current = _load_snapshot(source_key, location, parse)
+            snapshots.append((vintage, current))
+        previous.append((vintage, current))
+
+    previous_version = None
+    if delta is not None and all(current is not None for _, current in previous):
+        previous_version = _snapshots_version(previous)
+    _dataset(snapshots, delta, previous_version)
+
+
+def _snapshots_version(snapshots):
+    return ",".join(_version(meta) for _, (_, meta) in snapshots)
+
+
+def _dataset(snapshots, delta=None, previous_version=None):
+    version = _snapshots_version(snapshots)
+
+    with _views_lock:
+        dataset = _datasets.get(version)
+        previous = _datasets.get(previous_version)
+    if dataset is None:
+        with metrics.stage("dataset:cube"):
+            cube = _build_cube(snapshots)
+        # Rank every year up front so selecting a year is only a lookup
+        with metrics.stage("dataset:rankings"):
+            rankings = YearRankings(
+                cube.countries, cube.matrix(GDP_INDICATOR), cube.year_labels, cube.iso
+            )
+        as_of = min(meta["fetched_at"] for _, (_, meta) in snapshots)
+
+        year_versions = {year: version for year in cube.year_labels}
+        if delta is not None and previous is not None:
+            revised = set(delta_years(delta))
+            for year, year_version in previous.year_versions.items():
+                if year in year_versions and year not in revised:
+                    year_versions[year] = year_version
+            _invalidate_years(previous.year_versions, revised)
+            revisions = delta
+        else:
+            revisions = _stored_revisions([meta for _, (_, meta) in snapshots])
+
+        if shared_datasets is not None:
+            shared_datasets.publish(version, cube, rankings, as_of, year_versions)
+        dataset = _store_dataset(
+            version, _Dataset(cube, rankings, as_of, year_versions, revisions)
+        )
+    return dataset.cube, version
+
+
+def _store_dataset(version, dataset):
+    """Keep a dataset version, unless another thread stored it first"""
+    with _views_lock:
+        dataset = _datasets.setdefault(version, dataset)
+        while len(_datasets) > MAX_DATASETS:
+            del _datasets[next(iter(_datasets))]
+    return dataset
+
+
+def _invalidate_years(year_versions, years):
+    """Drop the cached views and figures of revised years"""
+    stale = {(year_versions[year], year) for year in years if year in year_versions}
+    with _views_lock:
+        for key in stale & set(_views):
+            del _views[key]
+    figure_cache.invalidate(lambda key: (key[0], key[1]) in stale)
+
+
+def _stored_revisions(metas):
+    deltas = [snapshot_store.read_delta(meta["key"], meta) for meta in metas]
+    deltas = [delta for delta in deltas if delta is not None]
+    return pd.concat(deltas, ignore_index=True) if deltas else None
+
+
+def year_version(version, year):
+    """
+    Return the version the data of a year last changed in
+
+    Cache per-year results (views, figures) under this instead of the
+    dataset version, so they survive updates that don't revise the year.
+
+    Args:
+        version: Dataset version from load_gdp_data()
+        year: Year as a string
+
+    Returns:
+        Dataset version string
+    """
+    with _views_lock:
+        dataset = _datasets.get(version)
+    if dataset is None:
+        return version
+    return dataset.year_versions.get(year, version)
+
+
+def get_analytics(version, indicator=GDP_INDICATOR, vintage=None):
+    """
+    Return the growth analytics of an indicator, computing them once per version
+
+    Args:
+        version: Dataset version from load_gdp_data()
+        indicator: IMF subject code
+        vintage: WEO release (latest if None)
+
+    Returns:
+        Shared GrowthAnalytics, or None if the version is no longer loaded
+    """
+    with _views_lock:
+        dataset = _datasets.get(version)
+    if dataset is None:
+        return None
+
+    key = (indicator, vintage)
+    with _views_lock:
+        analytics = dataset.analytics.get(key)
+    if analytics is None:
+        cube = dataset.cube
+        # The GDP rankings already hold the per-year sort order
+        order = dataset.rankings.order if key == (GDP_INDICATOR, None) else None
+        analytics = GrowthAnalytics(
+            cube.countries,
+            cube.matrix(indicator, vintage),
+            cube.years,
+            cube.iso,
+            order=order,
+        )
+        with _views_lock:
+            analytics = dataset.analytics.setdefault(key, analytics)
+    return analytics
+
+
+def get_group_aggregates(version):
+    """
+    Return the GDP totals and averages of every country group, once per version
+
+    Args:
+        version: Dataset version from load_gdp_data()
+
+    Returns:
+        Shared GroupAggregates, or None if the version is no longer loaded
+    """
+    with _views_lock:
+        dataset = _datasets.get(version)
+    if dataset is None:
+        return None
+
+    if dataset.group_aggregates is None:
+        cube = dataset.cube
+        index = GroupIndex(cube.iso)
+        aggregates = index.aggregate(cube.matrix(GDP_INDICATOR), cube.year_labels)
+        with _views_lock:
+            if dataset.group_aggregates is None:
+                dataset.groups = index
+                dataset.group_aggregates = aggregates
+    return dataset.group_aggregates
+
+
+def get_timeline(version):
+    """
+    Return the ranked GDP of every year as one long frame, once per version
+
+    Args:
+        version: Dataset version from load_gdp_data()
+
+    Returns:
+        Shared DataFrame from YearRankings.timeline(), or None if the
+        version is no longer loaded
+    """
+    with _views_lock:
+        dataset = _datasets.get(version)
+    if dataset is None:
+        return None
+
+    if dataset.timeline is None:
+        with metrics.stage("dataset:timeline"):
+            timeline = dataset.rankings.timeline()
+        with _views_lock:
+            if dataset.timeline is None:
+                dataset.timeline = timeline
+    return dataset.timeline
+
+
+def memory_report(version):
+    """
+    Return the memory this process holds for a dataset version, by component
+
+    Strings are counted once per component even when several rows or
+    frames refer to the same string object, as views do to the cube's
+    country names, so the sizes are close to what the frames really add.
+
+    Args:
+        version: Dataset version from load_gdp_data()
+
+    Returns:
+        Dict of component name -> bytes, or None if the version is no
+        longer loaded
+    """
+    with _views_lock:
+        dataset = _datasets.get(version)
+        views = list(_views.values())
+    if dataset is None:
+        return None
+
+    # Only the snapshots this process read; mapped datasets need none
+    snapshots = [snapshot_store.cached(key) for _, key, _, _ in _snapshot_sources()]
+    rankings = dataset.rankings
+    # Mapped arrays live in the page cache, shared by every worker
+    shared = " (shared)" if dataset.shared else ""
+    report = {
+        "snapshot frames": _frames_bytes(frame for frame, _ in filter(None, snapshots)),
+        f"cube{shared}": sum(dataset.cube.memory_usage().values()),
+        f"rankings{shared}": (
+            rankings.order.nbytes + rankings.values.nbytes + rankings.labels.nbytes
+        ),
+        "analytics": sum(
+            value.nbytes
+            for analytics in list(dataset.analytics.values())
+            for value in vars(analytics).values()
+            if isinstance(value, np.ndarray)
+        ),
+        "views": _frames_bytes(views),
+        "figure cache": figure_cache.stats()["bytes"],
+    }
+    if dataset.group_aggregates is not None:
+        aggregates = dataset.group_aggregates
+        report["group aggregates"] = sum(
+            array.nbytes
+            for array in (aggregates.totals, aggregates.counts, aggregates.means)
+        )
+    if dataset.timeline is not None:
+        report["timeline"] = _frames_bytes([dataset.timeline])
+    return report
+
+
+def _frames_bytes(frames):
+    """Bytes of frames, counting each string object they refer to once"""
+    seen = set()
+    total = 0
+    for frame in frames:
+        total += int(frame.index.memory_usage(deep=True))
+        for _, column in frame.items():
+            if column.dtype != object:
+                total += int(column.memory_usage(index=False, deep=True))
+                continue
+            # One pointer per row plus every distinct object
+            total += column.memory_usage(index=False, deep=False)
+            for value in column.to_numpy():
+                if id(value) not in seen:
+                    seen.add(id(value))
+                    total += sys.getsizeof(value)
+    return total
+
+
+def data_as_of(version):
+    """
+    Return when the data of a dataset version was fetched from the IMF
+
+    Args:
+        version: Dataset version from load_gdp_data()
+
+    Returns:
+        Unix timestamp of the oldest snapshot in the dataset, or None
+    """
+    with _views_lock:
+        dataset = _datasets.get(version)
+    return dataset.as_of if dataset is not None else None
+
+
+def revisions(version, year, indicator=GDP_INDICATOR):
+    """
+    Return what the last update of the data changed for a year
+
+    Args:
+        version: Dataset version from load_gdp_data()
+        year: Year as a string
+        indicator: IMF subject code
+
+    Returns:
+        DataFrame with Country, Previous and Value columns (NaN where a
+        value was added or removed), largest changes first; None if the
+        last update revised nothing in the year
+    """
+    with _views_lock:
+        dataset = _datasets.get(version)
+    if dataset is None or dataset.revisions is None:
+        return None
+
+    delta = dataset.revisions
+    selected = delta["Year"] == int(year)
+    if "Indicator" in delta.columns:
+        selected &= delta["Indicator"] == indicator
+    if not selected.any():
+        return None
+
+    changes = delta.loc[selected, ["Country", "Previous", "Value"]]
+    order = (changes["Value"] - changes["Previous"]).abs().fillna(np.inf)
+    return changes.loc[order.sort_values(ascending=False).index].reset_index(drop=True)
+
+
+def _refresher():
+    """Return the process-wide RefreshScheduler, creating it without starting it"""
+    global _scheduler
+    # Imported on first use: workers serving a fresh snapshot don't need
+    # the HTTP stack
+    from refresh_scheduler import RefreshScheduler
+
+    with _views_lock:
+        if _scheduler is None:
+            _scheduler = RefreshScheduler(
+                snapshot_store, _snapshot_sources, before_swap=prepare_snapshot
+            )
+        return _scheduler
+
+
+def start_refresh_scheduler():
+    """Start the process-wide background refresher (once per process)"""
+    scheduler = _refresher()
+    with _views_lock:
+        scheduler.start()
+    return scheduler
+
+
+def _version(meta):
+    return f"{meta['key']}@{meta['fetched_at']:.3f}"
+
+
+def _build_cube(snapshots):
+    cubes = []
+    for vintage, (frame, _) in snapshots:
+        if "Indicator" in frame.columns:
+            cubes.append(WeoCube.from_long(frame, vintage))
+        else:
+            cubes.append(WeoCube.from_wide(frame, vintage, GDP_INDICATOR))
+    return cubes[0] if len(cubes) == 1 else WeoCube.combine(cubes)
+
+
+def get_processed_view(cube, version, selected_year):
+    """
+    Return the processed data for a year, computing it once per process
+
+    Args:
+        cube: Shared WeoCube from load_gdp_data()
+        version: Dataset version from load_gdp_data()
+        selected_year: Year to filter the data by
+
+    Returns:
+        Shared processed DataFrame sorted by GDP
+    """
+    key = (year_version(version, selected_year), selected_year)
+    with _views_lock:
+        view = _views.get(key)
+        _view_lookups["misses" if view is None else "hits"] += 1
+    if view is not None:
+        return view
+
+    with _views_lock:
+        dataset = _datasets.get(version)
+    rankings = dataset.rankings if dataset is not None else None
+    with metrics.stage("process"):
+        if rankings is not None and selected_year in rankings:
+            view = rankings.view(selected_year)
+        else:
+            view = process_data(cube, selected_year)
+
+    with _views_lock:
+        # Drop views no kept dataset version refers to anymore
+        in_use = {
+            (year_version, year)
+            for dataset in _datasets.values()
+            for year, year_version in dataset.year_versions.items()
+        }
+        for stale_key in [k for k in _views if k not in in_use and k != key]:
+            del _views[stale_key]
+        _views.setdefault(key, view)
+        return _views[key]
+
+
+def view_cache_stats():
+    """Return the size and hit counters of the processed view cache"""
+    with _views_lock:
+        return {"entries": len(_views), **_view_lookups}
+
+
+metrics.register_cache("view", view_cache_stats)
+metrics.register_cache("figure", figure_cache.stats)
+
+
+def process_data(cube, selected_year, indicator=GDP_INDICATOR, vintage=None):
+    """
+    Process the GDP data for visualization
+
+    Args:
+        cube: WeoCube with the WEO data
+        selected_year: Year to filter the data by
+        indicator: IMF subject code to show
+        vintage: WEO release to show (latest if None)
+
+    Returns:
+        Processed DataFrame sorted by GDP
+    """
+    if cube is None:
+        return None
+
+    # Select data for the chosen year
+    if not cube.has_year(selected_year):
+        logger.warning(
+            "Data for %s not available. Defaulting to the most recent year.",
+            selected_year,
+        )
+        selected_year = cube.year_labels[-1]
+
+    # Slice the year out of the cube and rank it without per-row Python work
+    values = cube.series(indicator, selected_year, vintage)
+    rankings = YearRankings(
+        cube.countries, values[:, None], [str(selected_year)], cube.iso
+    )
+    return rankings.view(str(selected_year))
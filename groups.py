@@ -0,0 +1,303 @@
+"""
+Country groups and their aggregates.
+
+Groups are defined by ISO-3 membership lists: World Bank regions and
+income groups, political and economic blocs, and custom groups from a JSON
+file. GroupIndex turns them into a (group, country) membership matrix for
+a dataset's countries once, after which the totals, member counts and
+averages of every group and year come from one matrix multiply each.
+
+The membership is stored as coordinate lists and only expanded to a dense
+0/1 matrix for the multiply: with a few dozen groups and ~200 economies the
+dense matrix is a few kilobytes and NumPy's matmul is the fastest way to
+apply it.
+"""
+
+import json
+import logging
+import os
+
+import numpy as np
+import pandas as pd
+
+from rankings import format_labels
+
+logger = logging.getLogger(__name__)
+
+
+def _codes(text):
+    return tuple(text.split())
+
+
+# World Bank regions
+REGIONS = {
+    "East Asia & Pacific": _codes(
+        "AUS BRN CHN FJI FSM HKG IDN JPN KHM KIR KOR LAO MAC MHL MMR MNG MYS NRU "
+        "NZL PHL PLW PNG SGP SLB THA TLS TON TUV TWN VNM VUT WSM"
+    ),
+    "Europe & Central Asia": _codes(
+        "ALB AND ARM AUT AZE BEL BGR BIH BLR CHE CYP CZE DEU DNK ESP EST FIN FRA "
+        "GBR GEO GRC HRV HUN IRL ISL ITA KAZ KGZ LTU LUX LVA MDA MKD MNE NLD NOR "
+        "POL PRT ROU RUS SMR SRB SVK SVN SWE TJK TKM TUR UKR UZB XKX"
+    ),
+    "Latin America & Caribbean": _codes(
+        "ABW ARG ATG BHS BLZ BOL BRA BRB CHL COL CRI DMA DOM ECU GRD GTM GUY HND "
+        "HTI JAM KNA LCA MEX NIC PAN PER PRI PRY SLV SUR TTO URY VCT VEN"
+    ),
+    "Middle East & North Africa": _codes(
+        "ARE BHR DJI DZA EGY IRN IRQ ISR JOR KWT LBN LBY MAR MLT OMN PSE QAT SAU "
+        "SYR TUN YEM"
+    ),
+    "North America": _codes("CAN USA"),
+    "South Asia": _codes("AFG BGD BTN IND LKA MDV NPL PAK"),
+    "Sub-Saharan Africa": _codes(
+        "AGO BDI BEN BFA BWA CAF CIV CMR COD COG COM CPV ERI ETH GAB GHA GIN GMB "
+        "GNB GNQ KEN LBR LSO MDG MLI MOZ MRT MUS MWI NAM NER NGA RWA SDN SEN SLE "
+        "SOM SSD STP SWZ SYC TCD TGO TZA UGA ZAF ZMB ZWE"
+    ),
+}
+
+# World Bank income groups (FY2025 classification; Venezuela is unclassified)
+INCOME_GROUPS = {
+    "High income": _codes(
+        "ABW AND ARE ATG AUS AUT BEL BGR BHR BHS BRB BRN CAN CHE CHL CYP CZE DEU "
+        "DNK ESP EST FIN FRA GBR GRC GUY HKG HRV HUN IRL ISL ISR ITA JPN KNA KOR "
+        "KWT LTU LUX LVA MAC MLT NLD NOR NRU NZL OMN PAN PLW POL PRI PRT QAT ROU "
+        "RUS SAU SGP SMR SVK SVN SWE SYC TTO TWN URY USA"
+    ),
+    "Upper middle income": _codes(
+        "ALB ARG ARM AZE BIH BLR BLZ BRA BWA CHN COL CRI DMA DOM DZA ECU FJI GAB "
+        "GEO GNQ GRD GTM IDN IRN IRQ JAM KAZ LBY LCA MDA MDV MEX MHL MKD MNE MNG "
+        "MUS MYS NAM PER PRY SLV SRB SUR THA TKM TON TUR TUV UKR VCT XKX ZAF"
+    ),
+    "Lower middle income": _codes(
+        "AGO BEN BGD BOL BTN CIV CMR COG COM CPV DJI EGY FSM GHA GIN HND HTI IND "
+        "JOR KEN KGZ KHM KIR LAO LBN LKA LSO MAR MMR MRT NGA NIC NPL PAK PHL PNG "
+        "PSE SEN SLB STP SWZ TJK TLS TUN TZA UZB VNM VUT WSM ZMB ZWE"
+    ),
+    "Low income": _codes(
+        "AFG BDI BFA CAF COD ERI ETH GMB GNB LBR MDG MLI MOZ MWI NER RWA SDN SLE "
+        "SOM SSD SYR TCD TGO UGA YEM"
+    ),
+}
+
+# Political and economic blocs (member countries only)
+BLOCS = {
+    "European Union": _codes(
+        "AUT BEL BGR CYP CZE DEU DNK ESP EST FIN FRA GRC HRV HUN IRL ITA LTU LUX "
+        "LVA MLT NLD POL PRT ROU SVK SVN SWE"
+    ),
+    "Euro area": _codes(
+        "AUT BEL CYP DEU ESP EST FIN FRA GRC HRV IRL ITA LTU LUX LVA MLT NLD PRT "
+        "SVK SVN"
+    ),
+    "G7": _codes("CAN DEU FRA GBR ITA JPN USA"),
+    "G20": _codes(
+        "ARG AUS BRA CAN CHN DEU FRA GBR IDN IND ITA JPN KOR MEX RUS SAU TUR USA "
+        "ZAF"
+    ),
+    "OECD": _codes(
+        "AUS AUT BEL CAN CHE CHL COL CRI CZE DEU DNK ESP EST FIN FRA GBR GRC HUN "
+        "IRL ISL ISR ITA JPN KOR LTU LUX LVA MEX NLD NOR NZL POL PRT SVK SVN SWE "
+        "TUR USA"
+    ),
+}
+
+# Family name -> {group name -> ISO-3 codes}
+GROUP_FAMILIES = {
+    "Region": REGIONS,
+    "Income group": INCOME_GROUPS,
+    "Bloc": BLOCS,
+}
+
+# Families where every country belongs to at most one group, so they can be mapped
+PARTITIONS = ("Region", "Income group")
+
+
+def custom_groups(path=None):
+    """
+    Load user-defined groups from a JSON file
+
+    The file (GDP_GROUPS_PATH) maps group names to lists of ISO-3 codes,
+    e.g. {"Nordics": ["DNK", "FIN", "ISL", "NOR", "SWE"]}.
+
+    Returns:
+        Dict of group name -> ISO-3 codes (empty if no file is configured)
+    """
+    path = path or os.environ.get("GDP_GROUPS_PATH")
+    if not path:
+        return {}
+    try:
+        with open(path, encoding="utf-8") as f:
+            groups = json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning("Ignoring custom groups file %s: %s", path, e)
+        return {}
+    return {str(name): tuple(codes) for name, codes in groups.items()}
+
+
+def group_families():
+    """Return the built-in group families plus custom groups, if any"""
+    families = dict(GROUP_FAMILIES)
+    custom = custom_groups()
+    if custom:
+        families["Custom"] = custom
+    return families
+
+
+class GroupIndex:
+    """Membership of a dataset's countries in every group"""
+
+    def __init__(self, iso, families=None):
+        """
+        Args:
+            iso: ISO-3 codes of the dataset's countries (None where unknown)
+            families: Family name -> {group name -> ISO-3 codes}
+                (defaults to group_families())
+        """
+        families = group_families() if families is None else families
+        positions = {code: i for i, code in enumerate(iso) if code}
+
+        self.names = []
+        self.families = []
+        rows = []
+        cols = []
+        for family, groups in families.items():
+            for name, codes in groups.items():
+                members = [positions[code] for code in codes if code in positions]
+                rows += [len(self.names)] * len(members)
+                cols += members
+                self.names.append(name)
+                self.families.append(family)
+
+        self.rows = np.array(rows, dtype=np.int64)
+        self.cols = np.array(cols, dtype=np.int64)
+        self.iso = np.asarray(iso, dtype=object)
+        self.n_countries = len(iso)
+
+    @property
+    def membership(self):
+        """Dense (group, country) 0/1 matrix"""
+        matrix = np.zeros((len(self.names), self.n_countries))
+        matrix[self.rows, self.cols] = 1.0
+        return matrix
+
+    def country_groups(self, family):
+        """
+        Return the group of every country within a family
+
+        Returns:
+            Object array of group names by country (None for non-members)
+        """
+        groups = np.full(self.n_countries, None, dtype=object)
+        names = np.array(self.names, dtype=object)
+        in_family = np.array(self.families, dtype=object)[self.rows] == family
+        groups[self.cols[in_family]] = names[self.rows[in_family]]
+        return groups
+
+    def aggregate(self, matrix, year_labels):
+        """
+        Aggregate a (country, year) matrix to every group
+
+        Args:
+            matrix: Float array of shape (countries, years), NaN when missing
+            year_labels: Year strings along the columns of matrix
+
+        Returns:
+            GroupAggregates
+        """
+        return GroupAggregates(self, matrix, year_labels)
+
+
+class GroupAggregates:
+    """Totals, member counts and averages of every group and year"""
+
+    def __init__(self, index, matrix, year_labels):
+        """
+        Args:
+            index: GroupIndex for the matrix's countries
+            matrix: Float array of shape (countries, years), NaN when missing
+            year_labels: Year strings along the columns of matrix
+        """
+        matrix = np.asarray(matrix, dtype=np.float64)
+        present = ~np.isnan(matrix)
+        membership = index.membership
+
+        self.index = index
+        self.year_labels = list(year_labels)
+        self._year_pos = {year: i for i, year in enumerate(self.year_labels)}
+        # Missing values add nothing to the totals and aren't counted
+        self.totals = membership @ np.where(present, matrix, 0.0)
+        self.counts = membership @ present.astype(np.float64)
+        with np.errstate(invalid="ignore"):
+            self.means = self.totals / self.counts
+        self.totals[self.counts == 0] = np.nan
+        self.sizes = membership.sum(axis=1)
+
+    def __contains__(self, year):
+        return year in self._year_pos
+
+    def view(self, year, family=None):
+        """
+        Return the groups ranked by total for one year
+
+        Args:
+            year: Year label, e.g. "2025"
+            family: Only include groups of this family (all if None)
+
+        Returns:
+            DataFrame with the columns of YearRankings.view() (the group name
+            in Country, ISO empty) plus Family, Members, Reporting and
+            Average, sorted by total and without groups lacking data
+        """
+        year_pos = self._year_pos[year]
+        totals = self.totals[:, year_pos]
+        frame = pd.DataFrame(
+            {
+                "Country": self.index.names,
+                "ISO": None,
+                "GDP (Billions USD)": totals,
+                "GDP_formatted": format_labels(totals),
+                "Family": self.index.families,
+                "Members": self.sizes.astype(np.int64),
+                "Reporting": self.counts[:, year_pos].astype(np.int64),
+                "Average": self.means[:, year_pos],
+            }
+        )
+        if family is not None:
+            frame = frame[frame["Family"] == family]
+        frame = frame.dropna(subset=["GDP (Billions USD)"])
+        return frame.sort_values("GDP (Billions USD)", ascending=False).reset_index(
+            drop=True
+        )
+
+    def map_view(self, year, family):
+        """
+        Return every member country with the total of its group, for maps
+
+        Args:
+            year: Year label, e.g. "2025"
+            family: Family whose groups don't overlap (see PARTITIONS)
+
+        Returns:
+            DataFrame with ISO, Group, GDP (Billions USD) and GDP_formatted
+            of the group, one row per member country with an ISO code
+        """
+        year_pos = self._year_pos[year]
+        groups = self.index.country_groups(family)
+        group_pos = {
+            name: i
+            for i, name in enumerate(self.index.names)
+            if self.index.families[i] == family
+        }
+        members = np.flatnonzero(pd.notna(groups) & pd.notna(self.index.iso))
+        totals = self.totals[[group_pos[g] for g in groups[members]], year_pos]
+        frame = pd.DataFrame(
+            {
+                "ISO": self.index.iso[members],
+                "Group": groups[members],
+                "GDP (Billions USD)": totals,
+                "GDP_formatted": format_labels(totals),
+            }
+        )
+        return frame.dropna(subset=["GDP (Billions USD)"]).reset_index(drop=True)
@@ -0,0 +1,177 @@
+"""
+Fetching and parsing of GDP data from the IMF's World Economic Outlook database.
+
+This module has no Streamlit dependency so the ingest can run from scripts,
+background threads and offline against a recorded copy of the report page.
+"""
+
+import os
+import re
+
+import pandas as pd
+
+# WEO release the report URL points at, used to key stored snapshots
+WEO_VINTAGE = "2024-10"
+
+# IMF subject code for GDP, current prices (USD billions)
+GDP_INDICATOR = "NGDPD"
+
+START_YEAR = 2022
+END_YEAR = 2029
+
+# Year selected when the app opens
+DEFAULT_YEAR = 2025
+
+# IMF data URL - World Economic Outlook database
+IMF_WEO_URL = "https://www.imf.org/en/Publications/WEO/weo-database/2024/October/weo-report?c=512,914,612,171,614,311,213,911,314,193,122,912,313,419,513,316,913,124,339,638,514,218,963,616,223,516,918,748,618,624,522,622,156,626,628,228,924,233,632,636,634,238,662,960,423,935,128,611,321,243,248,469,253,642,643,939,734,644,819,172,132,646,648,915,134,652,174,328,258,656,654,336,263,268,532,944,176,534,536,429,433,178,436,136,343,158,439,916,664,826,542,967,443,917,544,941,446,666,668,672,946,137,546,674,676,548,556,678,181,867,682,684,273,868,921,948,943,686,688,518,728,836,558,138,196,278,692,694,962,142,449,564,565,283,853,288,293,566,964,182,359,453,968,922,714,862,135,716,456,722,942,718,724,576,936,961,813,726,199,733,184,524,361,362,364,732,366,144,146,463,528,923,738,578,537,742,866,369,744,186,925,869,746,926,466,112,111,298,927,846,299,582,487,474,754,698,&s=NGDPD,&sy=2022&ey=2029&ssm=0&scsm=1&scc=0&ssd=1&ssc=0&sic=0&sort=country&ds=.&br=1"
+
+# Recorded copy of the report page for running without network access
+FIXTURE_PATH = os.path.join(os.path.dirname(__file__), "fixtures", "weo_report_ngdpd.html")
+
+
+def report_indicators():
+    """
+    Return the IMF subject codes to fetch from the report page
+
+    Set GDP_INDICATORS to a comma-separated list of subject codes (e.g.
+    "NGDPD,PPPGDP,NGDPDPC") to fetch more than GDP.
+    """
+    value = os.environ.get("GDP_INDICATORS", GDP_INDICATOR)
+    return tuple(code.strip() for code in value.split(",") if code.strip())
+
+
+def imf_source():
+    """
+    Return the location the IMF report is read from
+
+    The GDP_IMF_SOURCE environment variable may point at a URL or a local
+    HTML file (e.g. FIXTURE_PATH) and overrides the live IMF report.
+    """
+    return os.environ.get("GDP_IMF_SOURCE", IMF_WEO_URL)
+
+
+def fetch_imf_gdp_data(source=None):
+    """
+    Fetch GDP data directly from the IMF's World Economic Outlook database
+
+    Args:
+        source: URL, local path or binary file object of the report page
+            (defaults to imf_source())
+
+    Returns:
+        DataFrame with a Country column and one column per year
+
+    Raises:
+        ValueError: If the report doesn't contain a usable GDP table
+    """
+    # Imported on the first fetch: lxml isn't needed to serve a stored snapshot
+    from weo_parser import parse_weo_report
+
+    source = source or imf_source()
+
+    try:
+        # Stream the page and extract only the data table
+        return parse_weo_report(source)
+    except ValueError:
+        # Fall back to reading every table if the report layout changed
+        if hasattr(source, "read"):
+            if not source.seekable():
+                # A streamed download can't be read again
+                raise
+            source.seek(0)
+        return parse_imf_gdp_tables(pd.read_html(source))
+
+
+def parse_imf_gdp_tables(tables):
+    """
+    Pick the GDP table out of the tables on the IMF report page and clean it
+
+    Args:
+        tables: List of DataFrames as returned by pd.read_html
+
+    Returns:
+        DataFrame with a Country column and one column per year
+    """
+    # Find the GDP data table - typically the largest table
+    gdp_df = None
+    max_rows = 0
+
+    for table in tables:
+        if len(table) > max_rows:
+            max_rows = len(table)
+            gdp_df = table
+
+    if gdp_df is None or max_rows < 10:  # Ensure we have a substantial table
+        raise ValueError("Couldn't find GDP data table on the IMF website")
+
+    # Get all column names
+    col_names = list(gdp_df.columns)
+
+    # Find the column containing country names
+    country_col = None
+    for col in col_names:
+        if "country" in str(col).lower():
+            country_col = col
+            break
+
+    if country_col is None:
+        # If we can't find a column with 'country' in the name, assume it's the first column
+        country_col = col_names[0]
+
+    # Find year columns (columns with 4-digit numbers)
+    year_cols = []
+    for col in col_names:
+        if re.search(r"\b20\d\d\b", str(col)):
+            year_cols.append(col)
+
+    if not year_cols:
+        # If we can't find year columns, look for numeric columns or columns with year-like names
+        for col in col_names:
+            # Check if column name itself contains a 4-digit year
+            if isinstance(col, tuple) and any(
+                re.search(r"\b20\d\d\b", str(part)) for part in col
+            ):
+                year_cols.append(col)
+            # Check if the column contains numeric data
+            elif col != country_col and pd.api.types.is_numeric_dtype(gdp_df[col]):
+                year_cols.append(col)
+            # Check if column name contains "year" or "unnamed"
+            elif "year" in str(col).lower() or "unnamed" in str(col).lower():
+                year_cols.append(col)
+
+    # Create a new dataframe with just the country and year columns
+    clean_df = pd.DataFrame()
+    clean_df["Country"] = gdp_df[country_col].astype(str)
+
+    # Convert years to string format YYYY
+    expected_years = [str(year) for year in range(START_YEAR, END_YEAR + 1)]
+
+    # If we found year columns, use them
+    if year_cols:
+        for i, year_col in enumerate(year_cols):
+            if i < len(expected_years):
+                year = expected_years[i]
+                # Extract the values and convert to numeric
+                clean_df[year] = pd.to_numeric(gdp_df[year_col], errors="coerce")
+    # If no year columns were found, try to use position-based approach
+    else:
+        # Assume years are in columns 1-8 (after country column)
+        for i, year in enumerate(expected_years):
+            col_idx = i + 1  # Skip the country column
+            if col_idx < len(col_names):
+                col = col_names[col_idx]
+                clean_df[year] = pd.to_numeric(gdp_df[col], errors="coerce")
+
+    # Remove rows with missing or invalid country names
+    clean_df = clean_df[clean_df["Country"].str.len() > 2]
+
+    # Remove rows that are not countries (headers, footers, etc.)
+    clean_df = clean_df[
+        ~clean_df["Country"].str.contains(
+            "International Monetary Fund|Subject|Descriptor|Gross domestic product",
+            regex=True,
+            case=False,
+        )
+    ]
+
+    return clean_df.reset_index(drop=True)
@@ -0,0 +1,363 @@
+"""
+Low-overhead instrumentation of reruns, API requests and background work.
+
+Code paths are wrapped in named stages (metrics.stage("process")) that
+record their wall time into per-stage histograms, and payload sizes are
+recorded with metrics.record_bytes(). Within a rerun (metrics.rerun())
+the stages are also collected into a RerunTrace, which the app shows in
+its debug panel. Cache counters are read from registered callbacks when
+metrics are exported, so they cost nothing per lookup.
+
+A stage costs two perf_counter() calls, a bisect and a short lock, so
+instrumentation is on by default (GDP_METRICS=0 turns it off).
+Allocation tracking uses tracemalloc, which slows Python allocations
+noticeably, and is only enabled with GDP_TRACE_ALLOCATIONS=1; since the
+tracer is process-wide, concurrent reruns are attributed each other's
+allocations.
+
+Metrics are exported as JSON (snapshot()) or in the Prometheus text
+format (prometheus()): by the API at /metrics and, for Streamlit
+processes, by a small HTTP server started when GDP_METRICS_PORT is set.
+"""
+
+import bisect
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds of the histogram buckets
+SECONDS_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0
+)
+BYTES_BUCKETS = tuple(2**n for n in range(10, 27, 2))  # 1 KiB .. 64 MiB
+
+# Prefix of every exported metric name
+METRIC_PREFIX = "gdp_"
+
+ENABLED = os.environ.get("GDP_METRICS", "1") != "0"
+TRACE_ALLOCATIONS = os.environ.get("GDP_TRACE_ALLOCATIONS") == "1"
+
+_current_trace = contextvars.ContextVar("current_trace", default=None)
+
+
+class Histogram:
+    """Cumulative-bucket histogram with a count and sum, like Prometheus'"""
+
+    def __init__(self, buckets):
+        self.buckets = tuple(buckets)
+        # The last slot counts values above every bucket
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q):
+        """
+        Estimate a quantile by interpolating within its bucket
+
+        Args:
+            q: Quantile between 0 and 1
+
+        Returns:
+            Estimated value, or None without observations
+        """
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if n and seen + n >= rank:
+                lower = self.buckets[i - 1] if i > 0 else 0.0
+                if i == len(self.buckets):
+                    # Above the last bucket there is no upper bound to interpolate to
+                    return lower
+                return lower + (self.buckets[i] - lower) * (rank - seen) / n
+            seen += n
+        return self.buckets[-1]
+
+    def summary(self):
+        """Return the count, sum, mean and p50/p95/p99 estimates as a dict"""
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "mean": self.sum / self.count if self.count else None,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+        }
+
+
+class RerunTrace:
+    """Stages recorded during one rerun or request, in the order they ended"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.seconds = None
+        # (stage, seconds, allocated bytes or None, payload bytes or None)
+        self.stages = []
+
+    def add(self, stage, seconds=None, allocated=None, payload=None):
+        self.stages.append((stage, seconds, allocated, payload))
+
+    def rows(self):
+        """Return the stages as dicts, for tables"""
+        return [
+            {
+                "Stage": stage,
+                "ms": None if seconds is None else seconds * 1000,
+                "Allocated (KiB)": None if allocated is None else allocated / 1024,
+                "Payload (KiB)": None if payload is None else payload / 1024,
+            }
+            for stage, seconds, allocated, payload in self.stages
+        ]
+
+
+class Metrics:
+    """Registry of stage histograms, counters and cache statistics"""
+
+    def __init__(self, enabled=ENABLED, trace_allocations=TRACE_ALLOCATIONS):
+        self.enabled = enabled
+        self.trace_allocations = enabled and trace_allocations
+        if self.trace_allocations and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+        self._lock = threading.Lock()
+        # (metric name, stage) -> Histogram
+        self._histograms = {}
+        # (metric name, label) -> count
+        self._counters = {}
+        # Cache name -> callable returning its stats() dict
+        self._caches = {}
+
+    def observe(self, name, stage, value, buckets=SECONDS_BUCKETS):
+        """Record a value in the histogram of a metric and stage"""
+        if not self.enabled:
+            return
+        with self._lock:
+            histogram = self._histograms.get((name, stage))
+            if histogram is None:
+                histogram = self._histograms[(name, stage)] = Histogram(buckets)
+            histogram.observe(value)
+
+    def count(self, name, label, n=1):
+        """Increment a counter, e.g. count("view_cache", "hit")"""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._counters[(name, label)] = self._counters.get((name, label), 0) + n
+
+    def register_cache(self, name, stats):
+        """
+        Export a cache's counters with the metrics
+
+        Args:
+            name: Cache name, e.g. "figure"
+            stats: Callable returning a dict with at least hits and misses
+        """
+        self._caches[name] = stats
+
+    @contextmanager
+    def stage(self, name):
+        """
+        Time a stage of the current rerun or request
+
+        Args:
+            name: Stage name, e.g. "process" or "chart:build"
+        """
+        if not self.enabled:
+            yield
+            return
+
+        allocated_before = (
+            tracemalloc.get_traced_memory()[0] if self.trace_allocations else None
+        )
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            allocated = None
+            if allocated_before is not None:
+                allocated = max(tracemalloc.get_traced_memory()[0] - allocated_before, 0)
+                self.observe("stage_allocated_bytes", name, allocated, BYTES_BUCKETS)
+            self.observe("stage_seconds", name, seconds)
+
+            trace = _current_trace.get()
+            if trace is not None:
+                trace.add(name, seconds, allocated)
+
+    def record_bytes(self, stage, nbytes):
+        """Record the size of a payload sent to the browser or a client"""
+        if not self.enabled:
+            return
+        self.observe("payload_bytes", stage, nbytes, BYTES_BUCKETS)
+        trace = _current_trace.get()
+        if trace is not None:
+            trace.add(stage, payload=nbytes)
+
+    @contextmanager
+    def rerun(self, name="rerun"):
+        """
+        Collect the stages of one rerun or request into a RerunTrace
+
+        Args:
+            name: Stage name of the total time
+
+        Yields:
+            RerunTrace, complete once the block exits
+        """
+        trace = RerunTrace()
+        token = _current_trace.set(trace)
+        try:
+            yield trace
+        finally:
+            _current_trace.reset(token)
+            trace.seconds = time.perf_counter() - trace.started
+            self.observe("stage_seconds", name, trace.seconds)
+
+    def cache_stats(self):
+        """Return the current stats of every registered cache"""
+        stats = {}
+        for name, cache_stats in self._caches.items():
+            stats[name] = dict(cache_stats())
+            lookups = stats[name]["hits"] + stats[name]["misses"]
+            stats[name]["hit_rate"] = stats[name]["hits"] / lookups if lookups else 0.0
+        return stats
+
+    def snapshot(self):
+        """
+        Return every metric as a JSON-serializable dict
+
+        Returns:
+            Dict with histogram summaries by metric and stage, counters and
+            cache stats
+        """
+        with self._lock:
+            histograms = {}
+            for (name, stage), histogram in sorted(self._histograms.items()):
+                histograms.setdefault(name, {})[stage] = histogram.summary()
+            counters = {}
+            for (name, label), n in sorted(self._counters.items()):
+                counters.setdefault(name, {})[label] = n
+        return {
+            "enabled": self.enabled,
+            "trace_allocations": self.trace_allocations,
+            "histograms": histograms,
+            "counters": counters,
+            "caches": self.cache_stats(),
+        }
+
+    def prometheus(self):
+        """Return every metric in the Prometheus text exposition format"""
+        lines = []
+        with self._lock:
+            histograms = sorted(self._histograms.items())
+            counters = sorted(self._counters.items())
+
+        described = set()
+        for (name, stage), histogram in histograms:
+            metric = METRIC_PREFIX + name
+            if metric not in described:
+                lines.append(f"# TYPE {metric} histogram")
+                described.add(metric)
+            label = f'stage="{_escape(stage)}"'
+            cumulative = 0
+            for le, n in zip(histogram.buckets, histogram.counts):
+                cumulative += n
+                lines.append(f'{metric}_bucket{{{label},le="{le:g}"}} {cumulative}')
+            lines.append(f'{metric}_bucket{{{label},le="+Inf"}} {histogram.count}')
+            lines.append(f"{metric}_sum{{{label}}} {histogram.sum:.6g}")
+            lines.append(f"{metric}_count{{{label}}} {histogram.count}")
+
+        for (name, label), n in counters:
+            metric = f"{METRIC_PREFIX}{name}_total"
+            if metric not in described:
+                lines.append(f"# TYPE {metric} counter")
+                described.add(metric)
+            lines.append(f'{metric}{{result="{_escape(label)}"}} {n}')
+
+        for cache, stats in self.cache_stats().items():
+            for key, value in stats.items():
+                if isinstance(value, (int, float)):
+                    lines.append(
+                        f'{METRIC_PREFIX}cache_{key}{{cache="{_escape(cache)}"}} {value!r}'
+                    )
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+# Shared by every session and request of the process
+metrics = Metrics()
+
+_metrics_server = None
+_metrics_server_lock = threading.Lock()
+
+
+class _MetricsRequestHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path == "/metrics":
+            body = metrics.prometheus().encode()
+            content_type = "text/plain; version=0.0.4"
+        elif self.path == "/metrics.json":
+            body = json.dumps(metrics.snapshot()).encode()
+            content_type = "application/json"
+        else:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Scrapes every few seconds would flood the app's log
+        pass
+
+
+def start_metrics_server(port=None):
+    """
+    Serve /metrics and /metrics.json from a daemon thread, once per process
+
+    Used by processes without their own HTTP API (the Streamlit app); with
+    several Streamlit processes on one host each needs its own port.
+
+    Args:
+        port: Port to listen on (GDP_METRICS_PORT; not started if unset)
+
+    Returns:
+        The running server, or None if no port is configured
+    """
+    global _metrics_server
+
+    port = port or os.environ.get("GDP_METRICS_PORT")
+    if not port:
+        return None
+    with _metrics_server_lock:
+        if _metrics_server is None:
+            try:
+                server = ThreadingHTTPServer(("", int(port)), _MetricsRequestHandler)
+            except OSError as e:
+                logger.warning("Can't serve metrics on port %s: %s", port, e)
+                return None
+            server.daemon_threads = True
+            threading.Thread(
+                target=server.serve_forever, name="metrics-server", daemon=True
+            ).start()
+            _metrics_server = server
+        return _metrics_server
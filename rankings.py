@@ -0,0 +1,138 @@
+"""
+Per-year rankings of one indicator, precomputed once per dataset version.
+
+Every year column is argsorted in a single NumPy call and the value labels
+are formatted for the whole matrix at once, so a year's view is assembled
+from ready-made arrays with no per-row Python work and a page is an
+O(page) slice of it.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+def format_labels(values):
+    """
+    Format values as whole numbers without any per-element Python calls
+
+    Args:
+        values: Float array of any shape
+
+    Returns:
+        Unicode array of the same shape, with "" for missing values
+    """
+    valid = ~np.isnan(values)
+    whole = np.trunc(values[valid]).astype(np.int64)
+
+    # Size the strings for the widest label rather than for any int64
+    largest = int(np.abs(whole).max()) if whole.size else 0
+    dtype = f"U{len(str(largest)) + 1}"
+
+    labels = np.full(values.shape, "", dtype=dtype)
+    labels[valid] = whole.astype(dtype)
+    return labels
+
+
+class YearRankings:
+    """Countries ranked by value for every year of a (country, year) matrix"""
+
+    def __init__(self, countries, matrix, year_labels, iso=None):
+        """
+        Args:
+            countries: Country names along the rows of matrix
+            matrix: Float array of shape (countries, years), NaN when missing
+            year_labels: Year strings along the columns of matrix
+            iso: ISO-3 codes matching countries (None where unknown)
+        """
+        matrix = np.asarray(matrix, dtype=np.float64)
+        self.countries = np.asarray(countries, dtype=object)
+        if iso is None:
+            iso = [None] * len(self.countries)
+        self.iso = np.asarray(iso, dtype=object)
+        self.year_labels = list(year_labels)
+        self._year_pos = {year: i for i, year in enumerate(self.year_labels)}
+
+        # Number of countries with a value in each year
+        self.counts = (~np.isnan(matrix)).sum(axis=0)
+
+        # Descending order per column; NaNs sort last when negated
+        self.order = np.argsort(-matrix, axis=0)
+        self.values = np.take_along_axis(matrix, self.order, axis=0)
+        self.labels = format_labels(self.values)
+
+    @classmethod
+    def from_arrays(cls, countries, iso, year_labels, order, values, labels):
+        """
+        Wrap rankings computed before, e.g. memory-mapped from another process
+
+        Args:
+            countries: Country names
+            iso: ISO-3 codes matching countries
+            year_labels: Year strings along the columns
+            order: order array of the original rankings
+            values: values array of the original rankings
+            labels: labels array of the original rankings
+        """
+        rankings = cls.__new__(cls)
+        rankings.countries = np.asarray(countries, dtype=object)
+        rankings.iso = np.asarray(iso, dtype=object)
+        rankings.year_labels = list(year_labels)
+        rankings._year_pos = {year: i for i, year in enumerate(rankings.year_labels)}
+        rankings.counts = (~np.isnan(values)).sum(axis=0)
+        rankings.order = order
+        rankings.values = values
+        rankings.labels = labels
+        return rankings
+
+    def __contains__(self, year):
+        return year in self._year_pos
+
+    def view(self, year):
+        """
+        Return the ranked countries for a year
+
+        Args:
+            year: Year label, e.g. "2025"
+
+        Returns:
+            DataFrame with Country, ISO, GDP (Billions USD) and GDP_formatted
+            columns, sorted by value and without missing values
+        """
+        j = self._year_pos[year]
+        n = self.counts[j]
+        order = self.order[:n, j]
+        return pd.DataFrame(
+            {
+                "Country": self.countries[order],
+                "ISO": self.iso[order],
+                "GDP (Billions USD)": self.values[:n, j],
+                "GDP_formatted": self.labels[:n, j],
+            }
+        )
+
+    def timeline(self, top_n=None):
+        """
+        Return the ranked countries of every year as one long frame
+
+        Args:
+            top_n: Only include the top countries of each year (all if None)
+
+        Returns:
+            DataFrame with Year and Rank plus the columns of view(), sorted
+            by year and rank and without missing values
+        """
+        limits = self.counts if top_n is None else np.minimum(self.counts, top_n)
+        # (year, rank) positions to keep, year-major so the frame sorts by year
+        keep = np.arange(len(self.order))[None, :] < limits[:, None]
+        years, ranks = np.nonzero(keep)
+        order = self.order[ranks, years]
+        return pd.DataFrame(
+            {
+                "Year": np.asarray(self.year_labels, dtype=object)[years],
+                "Rank": ranks + 1,
+                "Country": self.countries[order],
+                "ISO": self.iso[order],
+                "GDP (Billions USD)": self.values[ranks, years],
+                "GDP_formatted": self.labels[ranks, years],
+            }
+        )
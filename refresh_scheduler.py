@@ -0,0 +1,254 @@
+"""
+Background refresh of the stored IMF snapshots.
+
+A daemon thread polls every snapshot source on a fixed interval, so new
+WEO data is picked up without a restart and no user request ever waits for
+the IMF. Each poll is a conditional request (ETag / Last-Modified, or the
+file's modification time for local sources); unchanged sources only have
+their check time recorded. New data is validated before it is written, and
+the snapshot store swaps it in atomically, so renders keep using the
+previous snapshot until the new one is complete.
+"""
+
+import logging
+import os
+import threading
+from email.utils import formatdate
+
+import requests
+
+from instrumentation import metrics
+
+logger = logging.getLogger(__name__)
+
+# Seconds between polls, 0 disables the scheduler
+DEFAULT_INTERVAL = 6 * 60 * 60
+
+REQUEST_TIMEOUT = 60
+MAX_ATTEMPTS = 4
+BACKOFF_SECONDS = 5
+
+# New data must keep at least 90% of the countries of the snapshot it replaces
+MIN_COUNTRY_RATIO = 0.9
+
+
+def refresh_interval():
+    """Return the poll interval in seconds from GDP_REFRESH_INTERVAL"""
+    return float(os.environ.get("GDP_REFRESH_INTERVAL", DEFAULT_INTERVAL))
+
+
+def is_url(location):
+    return str(location).startswith(("http://", "https://"))
+
+
+def fetch_if_changed(location, meta=None, session=None):
+    """
+    Download a snapshot source unless it is unchanged since the last fetch
+
+    Args:
+        location: URL or local path of the source. Other locations (such as
+            the indicator list of the batch fetcher) can't be checked and
+            are returned as they are
+        meta: Metadata of the stored snapshot, used for the conditional request
+        session: requests.Session to reuse connections with
+
+    Returns:
+        Tuple of (file object or location, validators dict), or None if the
+        source is unchanged. A download is returned as the response's raw
+        stream, so it is parsed as it arrives; the caller closes it. The
+        validators are stored with the snapshot.
+    """
+    meta = meta or {}
+
+    if not isinstance(location, str):
+        return location, {}
+
+    if not is_url(location):
+        mtime = os.path.getmtime(location)
+        if meta.get("source_mtime") == mtime:
+            return None
+        return location, {"source_mtime": mtime}
+
+    headers = {}
+    if meta.get("etag"):
+        headers["If-None-Match"] = meta["etag"]
+    if meta.get("last_modified"):
+        headers["If-Modified-Since"] = meta["last_modified"]
+    elif meta.get("fetched_at"):
+        headers["If-Modified-Since"] = formatdate(meta["fetched_at"], usegmt=True)
+
+    response = (session or requests).get(
+        location, headers=headers, timeout=REQUEST_TIMEOUT, stream=True
+    )
+    if response.status_code == 304:
+        response.close()
+        return None
+    try:
+        response.raise_for_status()
+    except requests.HTTPError:
+        response.close()
+        raise
+
+    validators = {
+        "etag": response.headers.get("ETag"),
+        "last_modified": response.headers.get("Last-Modified"),
+    }
+    # Undo any gzip transfer encoding while streaming
+    response.raw.decode_content = True
+    return response.raw, validators
+
+
+def snapshot_years(frame):
+    """Return the years a wide or long snapshot frame covers"""
+    if "Year" in frame.columns:
+        return {int(year) for year in frame["Year"].unique()}
+    return {int(col) for col in frame.columns if str(col).isdigit()}
+
+
+def validate_snapshot(frame, previous=None):
+    """
+    Check that newly fetched data is complete enough to replace a snapshot
+
+    The expectations come from the snapshot being replaced, so they hold
+    for any source: the report's year range as well as older vintages of
+    the bulk files.
+
+    Args:
+        frame: Parsed data, either wide (Country plus year columns) or long
+            (Country, Year, Value, ...)
+        previous: DataFrame of the snapshot being replaced, if any
+
+    Raises:
+        ValueError: If the data is empty, covers too few countries or
+            misses years of the previous snapshot
+    """
+    countries = frame["Country"].nunique()
+    years = snapshot_years(frame)
+    if not countries or not years:
+        raise ValueError("The new data is empty")
+    if previous is None:
+        return
+
+    previous_countries = previous["Country"].nunique()
+    if countries < previous_countries * MIN_COUNTRY_RATIO:
+        raise ValueError(
+            f"Only {countries} countries in the new data, previously {previous_countries}"
+        )
+    missing = sorted(snapshot_years(previous) - years)
+    if missing:
+        raise ValueError(f"New data is missing years {missing}")
+
+
+class RefreshScheduler:
+    """
+    Daemon thread that keeps the snapshots of a SnapshotStore up to date
+
+    Args:
+        store: SnapshotStore to refresh
+        sources: Callable returning (vintage, key, location, parse) tuples,
+            as gdp_data._snapshot_sources()
+        interval: Seconds between polls (defaults to refresh_interval())
+        before_swap: Hook passed to SnapshotStore.write()
+    """
+
+    def __init__(self, store, sources, interval=None, before_swap=None):
+        self.store = store
+        self.sources = sources
+        self.interval = refresh_interval() if interval is None else interval
+        self.before_swap = before_swap
+        self.session = requests.Session()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Start polling, unless the interval is 0"""
+        if self.interval <= 0 or self._thread is not None:
+            return
+        self._thread = threading.Thread(
+            target=self._run, name="imf-refresh", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.refresh_all()
+
+    def refresh_all(self):
+        """
+        Poll every source once, unless another process of the host is
+
+        Returns:
+            List of keys whose snapshot was replaced
+        """
+        updated = []
+        with self.store.refresh_lock() as locked:
+            if not locked:
+                metrics.count("refresh", "skipped")
+                return updated
+            for _, key, location, parse in self.sources():
+                try:
+                    if self.refresh(key, location, parse):
+                        updated.append(key)
+                except Exception:
+                    logger.exception("Refreshing snapshot %s failed", key)
+        return updated
+
+    def refresh(self, key, location, parse):
+        """
+        Fetch, validate and swap in one source if its data changed
+
+        Returns:
+            True if a new snapshot was written
+        """
+        stored = self.store.read(key)
+        previous, meta = stored if stored is not None else (None, None)
+
+        with metrics.stage("refresh:fetch"):
+            fetched = self._with_retries(
+                key, lambda: fetch_if_changed(location, meta, self.session)
+            )
+        if fetched is None:
+            metrics.count("refresh", "unchanged")
+            self.store.mark_checked(key)
+            return False
+
+        data, validators = fetched
+        with metrics.stage("refresh:parse"):
+            try:
+                frame = parse(data)
+            finally:
+                # Parsing can stop before the end of a streamed download
+                if hasattr(data, "close"):
+                    data.close()
+        validate_snapshot(frame, previous)
+        with metrics.stage("refresh:write"):
+            written = self.store.write(
+                key, frame, before_swap=self.before_swap, **validators
+            )
+        metrics.count("refresh", "fetched")
+        if meta is not None and written["fetched_at"] == meta["fetched_at"]:
+            # The source changed but its data didn't
+            return False
+        logger.info(
+            "Swapped in new snapshot %s (%s revised cells)",
+            key,
+            written.get("revised_cells", len(frame)),
+        )
+        return True
+
+    def _with_retries(self, key, fetch):
+        for attempt in range(MAX_ATTEMPTS):
+            try:
+                return fetch()
+            except (requests.RequestException, OSError) as e:
+                if attempt == MAX_ATTEMPTS - 1:
+                    raise
+                delay = BACKOFF_SECONDS * 2**attempt
+                logger.warning(
+                    "Checking %s failed (%s), retrying in %ss", key, e, delay
+                )
+                if self._stop.wait(delay):
+                    raise
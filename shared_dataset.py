@@ -0,0 +1,181 @@
+"""
+Dataset files shared by the worker processes of a host through memory maps.
+
+Several Streamlit processes per host would each hold a private copy of the
+cube and its rankings. Instead, the first worker to build a dataset
+version writes its arrays once as raw .npy files (a small header plus the
+array bytes) and every worker maps them read-only with np.load(mmap_mode),
+so the pages are shared through the OS page cache and a new worker starts
+without fetching or parsing anything.
+
+Each version is a folder named after a hash of the version string:
+    header.json   axes of the cube, year versions and fetch time
+    values.npy    float32 (vintage, indicator, country, year) cube values
+    order.npy     per-year ranking order of the GDP rankings
+    ranked.npy    ranked GDP values
+    labels.npy    formatted ranked values
+
+A folder is written under a temporary name and renamed into place, so
+readers see a version completely or not at all. Workers learn about a new
+version from the snapshot metadata, which the snapshot store also
+replaces by rename.
+"""
+
+import errno
+import hashlib
+import json
+import logging
+import os
+import shutil
+import threading
+
+import numpy as np
+
+from rankings import YearRankings
+from weo_cube import WeoCube
+
+logger = logging.getLogger(__name__)
+
+# Share datasets between processes (GDP_SHARED_DATASET=0 disables)
+ENABLED = os.environ.get("GDP_SHARED_DATASET", "1") != "0"
+
+# Versions kept on disk; older ones are removed once a new one is published
+KEEP_VERSIONS = 3
+
+HEADER = "header.json"
+
+# File name -> (object, attribute) of the shared arrays
+ARRAYS = {
+    "values.npy": ("cube", "values"),
+    "order.npy": ("rankings", "order"),
+    "ranked.npy": ("rankings", "values"),
+    "labels.npy": ("rankings", "labels"),
+}
+
+
+class SharedDatasets:
+    """Folder of memory-mappable dataset versions"""
+
+    def __init__(self, directory):
+        """
+        Args:
+            directory: Folder shared by the host's workers
+                (GDP_SHARED_DIR, or shared/ in the snapshot folder)
+        """
+        self.directory = os.environ.get("GDP_SHARED_DIR") or directory
+
+    def _path(self, version):
+        digest = hashlib.sha1(version.encode()).hexdigest()[:20]
+        return os.path.join(self.directory, f"dataset-{digest}")
+
+    def publish(self, version, cube, rankings, as_of, year_versions):
+        """
+        Write a dataset version for the other workers, unless it exists
+
+        Args:
+            version: Dataset version string
+            cube: WeoCube of the version
+            rankings: GDP YearRankings of the cube
+            as_of: When the data was fetched (seconds since the epoch)
+            year_versions: Year label -> version its data last changed in
+
+        Returns:
+            Whether the version is now published
+        """
+        path = self._path(version)
+        if os.path.exists(path):
+            return True
+
+        # Unique per writing thread: threads of one worker can publish too
+        tmp = f"{path}.tmp-{os.getpid()}-{threading.get_ident()}"
+        header = {
+            "version": version,
+            "as_of": as_of,
+            "year_versions": year_versions,
+            "vintages": cube.vintages,
+            "indicators": cube.indicators,
+            "countries": cube.countries.tolist(),
+            "iso": cube.iso.tolist(),
+            "years": cube.years.tolist(),
+            "year_labels": rankings.year_labels,
+        }
+        try:
+            os.makedirs(tmp, exist_ok=True)
+            objects = {"cube": cube, "rankings": rankings}
+            for name, (obj, attribute) in ARRAYS.items():
+                np.save(os.path.join(tmp, name), getattr(objects[obj], attribute))
+            with open(os.path.join(tmp, HEADER), "w", encoding="utf-8") as f:
+                json.dump(header, f)
+            # Readers see the whole folder or none of it
+            os.rename(tmp, path)
+        except OSError as e:
+            shutil.rmtree(tmp, ignore_errors=True)
+            # Renaming onto a folder fails once another worker published the
+            # same version first, which is as good as publishing it
+            if e.errno in (errno.EEXIST, errno.ENOTEMPTY) or os.path.exists(path):
+                return True
+            logger.warning("Can't share dataset %s: %s", version, e)
+            return False
+
+        self._remove_old(keep=path)
+        return True
+
+    def open(self, version):
+        """
+        Map a published dataset version read-only
+
+        Returns:
+            Tuple of (WeoCube, YearRankings, header dict) whose arrays are
+            memory maps, or None if the version isn't published
+        """
+        path = self._path(version)
+        try:
+            with open(os.path.join(path, HEADER), encoding="utf-8") as f:
+                header = json.load(f)
+            arrays = {
+                name: np.load(os.path.join(path, name), mmap_mode="r") for name in ARRAYS
+            }
+        except (OSError, ValueError):
+            return None
+
+        cube = WeoCube(
+            header["vintages"],
+            header["indicators"],
+            header["countries"],
+            header["years"],
+            arrays["values.npy"],
+            iso=header["iso"],
+        )
+        rankings = YearRankings.from_arrays(
+            cube.countries,
+            cube.iso,
+            header["year_labels"],
+            arrays["order.npy"],
+            arrays["ranked.npy"],
+            arrays["labels.npy"],
+        )
+        return cube, rankings, header
+
+    def _remove_old(self, keep):
+        # Workers that still map a removed version keep reading it: the
+        # files only go away once the last mapping is closed
+        try:
+            names = [name for name in os.listdir(self.directory) if ".tmp-" not in name]
+        except OSError:
+            return
+        paths = sorted(
+            (os.path.join(self.directory, name) for name in names),
+            key=_mtime,
+            reverse=True,
+        )
+        for path in paths[KEEP_VERSIONS:]:
+            if path != keep:
+                shutil.rmtree(path, ignore_errors=True)
+
+
+def _mtime(path):
+    try:
+        return os.path.getmtime(path)
+    except OSError:
+        # Removed by another worker meanwhile
+        return 0.0
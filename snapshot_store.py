@@ -0,0 +1,446 @@
+"""
+Persistent on-disk snapshots of parsed IMF data.
+
+Cleaned frames are written to Parquet, keyed by WEO vintage, indicator and
+year range, with the compact dtypes of weo_cube.compact_frame(), so a
+restarted worker reads a local file instead of downloading and parsing the
+IMF report. Snapshots older than the TTL are still served right away while
+a background thread refreshes them, and the last good snapshot is kept
+whenever the upstream fetch fails.
+
+A refresh that revises only part of a snapshot is stored as a delta file
+holding just the changed cells, applied on top of the base file when the
+snapshot is read. The base is rewritten once deltas pile up.
+
+Several processes may share the snapshot folder. Files are written under
+names unique to the writing thread and renamed into place, background
+refreshes hold a host-wide lock on the folder so only one process
+refreshes at a time, and each process picks up snapshots written by the
+others when their metadata changes.
+"""
+
+import contextlib
+import json
+import logging
+import os
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows: refreshes aren't serialized across processes
+    fcntl = None
+
+import pandas as pd
+
+from weo_cube import compact_frame
+from weo_delta import apply_delta, diff_snapshots
+
+logger = logging.getLogger(__name__)
+
+# Default location and lifetime of snapshots, overridable via the environment
+DEFAULT_SNAPSHOT_DIR = os.path.join(os.path.dirname(__file__), ".snapshots")
+DEFAULT_TTL_SECONDS = 24 * 60 * 60
+
+# Deltas applied on read before the base snapshot is rewritten
+MAX_DELTAS = 8
+
+# File in the snapshot folder locked while a process refreshes snapshots
+REFRESH_LOCK = ".refresh.lock"
+
+
+def snapshot_key(vintage, indicator, start_year, end_year):
+    """
+    Build the key a snapshot is stored under
+
+    Args:
+        vintage: WEO release, e.g. "2024-10"
+        indicator: IMF subject code, e.g. "NGDPD"
+        start_year: First year covered by the snapshot
+        end_year: Last year covered by the snapshot
+
+    Returns:
+        String usable as a file name stem
+    """
+    return f"weo-{vintage}_{indicator}_{start_year}-{end_year}"
+
+
+class SnapshotStore:
+    """Parquet snapshot store with TTL and stale-while-revalidate refreshes"""
+
+    def __init__(self, directory=None, ttl=None):
+        """
+        Args:
+            directory: Folder holding the snapshots (GDP_SNAPSHOT_DIR or .snapshots)
+            ttl: Seconds before a snapshot is considered stale (GDP_SNAPSHOT_TTL or 24h)
+        """
+        self.directory = directory or os.environ.get(
+            "GDP_SNAPSHOT_DIR", DEFAULT_SNAPSHOT_DIR
+        )
+        if ttl is None:
+            ttl = float(os.environ.get("GDP_SNAPSHOT_TTL", DEFAULT_TTL_SECONDS))
+        self.ttl = ttl
+
+        # key -> (frame, metadata) of the snapshots already read in this process
+        self._loaded = {}
+        # key -> (file stat, metadata) of the metadata files read by meta()
+        self._metas = {}
+        self._refreshing = set()
+        self._lock = threading.Lock()
+
+    def _paths(self, key):
+        base = os.path.join(self.directory, key)
+        return base + ".parquet", base + ".json"
+
+    def read(self, key):
+        """
+        Read a snapshot from disk, applying its deltas
+
+        Returns:
+            Tuple of (DataFrame, metadata dict), or None if there is no snapshot
+        """
+        data_path, meta_path = self._paths(key)
+        try:
+            with open(meta_path, encoding="utf-8") as f:
+                meta = json.load(f)
+            if "base" in meta:
+                data_path = os.path.join(self.directory, meta["base"])
+            frame = pd.read_parquet(data_path)
+            for name in meta.get("deltas", []):
+                frame = apply_delta(
+                    frame, pd.read_parquet(os.path.join(self.directory, name))
+                )
+        except (OSError, ValueError) as e:
+            if os.path.exists(meta_path):
+                logger.warning("Ignoring unreadable snapshot %s: %s", key, e)
+            return None
+        # Snapshots written before compact dtypes are converted on read
+        return compact_frame(frame), meta
+
+    def meta(self, key):
+        """
+        Read the metadata of the snapshot on disk, without its data
+
+        The file is only parsed again once it was replaced, e.g. by another
+        process refreshing the snapshot, so calling this on every request
+        costs a stat().
+
+        Returns:
+            Metadata dict, or None if there is no snapshot
+        """
+        meta_path = self._paths(key)[1]
+        try:
+            stat = os.stat(meta_path)
+            signature = (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+            with self._lock:
+                cached = self._metas.get(key)
+            if cached is not None and cached[0] == signature:
+                return cached[1]
+            with open(meta_path, encoding="utf-8") as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        with self._lock:
+            self._metas[key] = (signature, meta)
+        return meta
+
+    def cached(self, key):
+        """
+        Return the snapshot this process already holds for a key
+
+        Returns:
+            Tuple of (DataFrame, metadata dict), or None if it wasn't read
+        """
+        with self._lock:
+            return self._loaded.get(key)
+
+    def read_delta(self, key, meta=None):
+        """
+        Read the cells the last update of a snapshot changed
+
+        Args:
+            key: Snapshot key
+            meta: Metadata of the snapshot (that of current() if None)
+
+        Returns:
+            Delta DataFrame as from weo_delta.diff_snapshots(), or None if
+            the snapshot was never updated
+        """
+        if meta is None:
+            loaded = self.current(key)
+            meta = loaded[1] if loaded is not None else {}
+        name = meta.get("last_delta")
+        if name is None:
+            return None
+        try:
+            return pd.read_parquet(os.path.join(self.directory, name))
+        except (OSError, ValueError):
+            return None
+
+    def current(self, key):
+        """
+        Return the snapshot this process serves for a key, without fetching
+
+        A snapshot another process replaced or checked since it was read is
+        picked up here.
+
+        Returns:
+            Tuple of (DataFrame, metadata dict), or None if there is no snapshot
+        """
+        with self._lock:
+            loaded = self._loaded.get(key)
+        meta = self.meta(key)
+        if loaded is not None and (meta is None or meta == loaded[1]):
+            return loaded
+
+        if loaded is not None and meta["fetched_at"] == loaded[1]["fetched_at"]:
+            # Only checked by another process; the data is the same
+            fresh = (loaded[0], meta)
+        else:
+            fresh = self.read(key)
+            if fresh is None:
+                return loaded
+        with self._lock:
+            if self._loaded.get(key) is loaded:
+                self._loaded[key] = fresh
+            return self._loaded[key]
+
+    def write(self, key, frame, before_swap=None, **extra_meta):
+        """
+        Write a snapshot to disk, replacing any previous one atomically
+
+        If a snapshot for the key exists, only the cells that changed are
+        written, as a delta file. Data identical to the stored snapshot only
+        marks it as checked and keeps its version.
+
+        Args:
+            key: Snapshot key from snapshot_key()
+            frame: Cleaned DataFrame to store
+            before_swap: Optional callable taking (key, frame, metadata,
+                delta), run before readers are switched to the new snapshot,
+                e.g. to build derived data so no reader has to wait for it.
+                delta is None when there was no previous snapshot
+            extra_meta: Additional metadata saved alongside the frame
+
+        Returns:
+            Metadata dict of the written snapshot
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        meta_path = self._paths(key)[1]
+        frame = compact_frame(frame)
+
+        previous = self.current(key)
+        delta = None
+        deltas = []
+        if previous is not None:
+            delta = diff_snapshots(previous[0], frame)
+            if delta.empty:
+                return self.mark_checked(key, **extra_meta)
+            deltas = previous[1].get("deltas", [])
+
+        now = time.time()
+        meta = {
+            "key": key,
+            "fetched_at": now,
+            "checked_at": now,
+            "rows": len(frame),
+            **extra_meta,
+        }
+
+        if before_swap is not None:
+            before_swap(key, frame, meta, delta)
+
+        # Data files get new names and the metadata pointing at them is
+        # replaced last, so readers never see a partial snapshot
+        stamp = f"{now * 1000:.0f}"
+        if delta is not None:
+            meta["last_delta"] = f"{key}.delta-{stamp}.parquet"
+            meta["revised_cells"] = len(delta)
+            self._write_parquet(meta["last_delta"], delta)
+
+        # Rewrite the base once there are many deltas or one replaces most of it
+        compact = (
+            delta is None
+            or len(deltas) >= MAX_DELTAS
+            or len(delta) > len(previous[0]) // 2
+        )
+        if compact:
+            meta["base"] = f"{key}.base-{stamp}.parquet"
+            meta["deltas"] = []
+            self._write_parquet(meta["base"], frame)
+        else:
+            legacy_base = os.path.basename(self._paths(key)[0])
+            meta["base"] = previous[1].get("base", legacy_base)
+            meta["deltas"] = deltas + [meta["last_delta"]]
+        self._write_meta(meta_path, meta)
+
+        if compact:
+            self._remove_unused(key, meta)
+
+        with self._lock:
+            self._loaded[key] = (frame, meta)
+        return meta
+
+    def _write_parquet(self, name, frame):
+        path = os.path.join(self.directory, name)
+        tmp = _tmp_name(path)
+        frame.to_parquet(tmp, index=False)
+        os.replace(tmp, path)
+
+    def _remove_unused(self, key, meta):
+        # Older bases and deltas of the key, once the metadata no longer uses
+        # them; files other writers are still writing are left alone
+        in_use = {meta["base"], meta.get("last_delta")}
+        for name in os.listdir(self.directory):
+            if (
+                name.startswith((f"{key}.base-", f"{key}.delta-", f"{key}.parquet"))
+                and name not in in_use
+                and ".tmp-" not in name
+            ):
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except OSError:
+                    pass
+
+    def mark_checked(self, key, **extra_meta):
+        """
+        Record that the upstream data of a snapshot was checked and is unchanged
+
+        This resets the TTL without changing the snapshot's data or version.
+
+        Returns:
+            Updated metadata dict, or None if there is no snapshot
+        """
+        loaded = self.current(key)
+        if loaded is None:
+            return None
+
+        frame, meta = loaded
+        meta = {**meta, "checked_at": time.time(), **extra_meta}
+        self._write_meta(self._paths(key)[1], meta)
+
+        with self._lock:
+            self._loaded[key] = (frame, meta)
+        return meta
+
+    def _write_meta(self, meta_path, meta):
+        tmp = _tmp_name(meta_path)
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp, meta_path)
+
+    def is_stale(self, meta):
+        """Whether a snapshot was last fetched or checked longer ago than the TTL"""
+        checked_at = meta.get("checked_at", meta["fetched_at"])
+        return time.time() - checked_at > self.ttl
+
+    def get(self, key, fetch):
+        """
+        Return the data for a key, fetching it only when necessary
+
+        See load() for details.
+
+        Returns:
+            DataFrame with the snapshot data
+        """
+        return self.load(key, fetch)[0]
+
+    def load(self, key, fetch, refresh=None):
+        """
+        Return the data and metadata for a key, fetching it only when necessary
+
+        A fresh snapshot is returned as is. A stale one is returned
+        immediately while it is refreshed in a background thread. Without
+        any snapshot, fetch() runs synchronously and its errors propagate.
+
+        Args:
+            key: Snapshot key from snapshot_key()
+            fetch: Callable returning a freshly downloaded DataFrame
+            refresh: Callable refreshing a stale snapshot, e.g. with a
+                conditional request and validation before writing. By
+                default the result of fetch() is written as is
+
+        Returns:
+            Tuple of (DataFrame, metadata dict)
+        """
+        loaded = self.current(key)
+        if loaded is None:
+            # Served as stored, with compact dtypes
+            self.write(key, fetch())
+            return self.current(key)
+
+        frame, meta = loaded
+        if self.is_stale(meta):
+            self.refresh_in_background(key, refresh or (lambda: self.write(key, fetch())))
+        return frame, meta
+
+    def refresh_in_background(self, key, refresh):
+        """
+        Start a background refresh of a snapshot unless one is already running
+
+        The refresh is skipped while another process of the host refreshes
+        snapshots.
+
+        Args:
+            key: Snapshot key
+            refresh: Callable refreshing the snapshot, e.g. writing
+                freshly fetched data
+
+        Returns:
+            The started thread, or None if a refresh was already in progress
+        """
+        with self._lock:
+            if key in self._refreshing:
+                return None
+            self._refreshing.add(key)
+
+        thread = threading.Thread(
+            target=self._refresh, args=(key, refresh), name=f"refresh-{key}", daemon=True
+        )
+        thread.start()
+        return thread
+
+    @contextlib.contextmanager
+    def refresh_lock(self):
+        """
+        Take the host-wide refresh lock of the snapshot folder, if it is free
+
+        Holders refresh snapshots; other processes, and other threads of
+        this one, skip refreshing meanwhile and pick up the result.
+
+        Yields:
+            Whether the lock was taken
+        """
+        if fcntl is None:
+            yield True
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, REFRESH_LOCK), "a") as f:
+            try:
+                fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                yield False
+                return
+            try:
+                yield True
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _refresh(self, key, refresh):
+        try:
+            with self.refresh_lock() as locked:
+                if locked:
+                    refresh()
+                else:
+                    logger.debug("Snapshot %s is being refreshed elsewhere", key)
+        except Exception as e:
+            # Keep serving the last good snapshot
+            logger.warning("Refreshing snapshot %s failed: %s", key, e)
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+
+def _tmp_name(path):
+    # Unique per writing thread, so concurrent writers never share a file
+    return f"{path}.tmp-{os.getpid()}-{threading.get_ident()}"
@@ -0,0 +1,17 @@
+import os
+import sys
+import time
+
+# The app's modules live at the repository root
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+
+def wait_for_refresh(store, key, timeout=10):
+    """Wait until a SnapshotStore has no background refresh of a key running"""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        with store._lock:
+            if key not in store._refreshing:
+                return
+        time.sleep(0.01)
+    raise AssertionError("Background refresh didn't finish")
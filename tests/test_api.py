@@ -0,0 +1,122 @@
+import gzip
+import json
+
+import pyarrow as pa
+import pytest
+from tornado.testing import AsyncHTTPTestCase
+
+import api
+import gdp_data
+from imf_data import FIXTURE_PATH
+from snapshot_store import SnapshotStore
+
+
+class APITest(AsyncHTTPTestCase):
+    """The API serving the recorded IMF report"""
+
+    @pytest.fixture(autouse=True)
+    def offline_data(self, monkeypatch, tmp_path):
+        monkeypatch.setenv("GDP_IMF_SOURCE", FIXTURE_PATH)
+        monkeypatch.delenv("GDP_WEO_BULK_PATH", raising=False)
+        monkeypatch.delenv("GDP_INDICATORS", raising=False)
+        monkeypatch.setattr(gdp_data, "snapshot_store", SnapshotStore(str(tmp_path), ttl=3600))
+        monkeypatch.setattr(gdp_data, "shared_datasets", None)
+        monkeypatch.setattr(gdp_data, "_scheduler", None)
+        monkeypatch.setattr(gdp_data, "_datasets", {})
+        monkeypatch.setattr(api, "_arrow_dumps", {})
+        self.monkeypatch = monkeypatch
+
+    def get_app(self):
+        return api.make_app()
+
+    def get_json(self, path, **kwargs):
+        response = self.fetch(path, **kwargs)
+        return response, json.loads(response.body) if response.body else None
+
+    def test_unchanged_version_answers_304(self):
+        response = self.fetch("/api/v1/rankings/2025")
+        assert response.code == 200
+        etag = response.headers["ETag"]
+
+        cached = self.fetch("/api/v1/rankings/2025", headers={"If-None-Match": etag})
+        assert cached.code == 304
+        assert cached.body == b""
+        # The ETag depends on the URL too
+        other = self.fetch("/api/v1/rankings/2026", headers={"If-None-Match": etag})
+        assert other.code == 200
+
+    def test_rankings_are_paginated(self):
+        response, first = self.get_json("/api/v1/rankings/2025?page_size=10")
+        assert response.code == 200
+        assert [row["rank"] for row in first["rows"]] == list(range(1, 11))
+        assert first["pages"] == -(-first["total"] // 10)
+
+        last_page = first["pages"] - 1
+        _, last = self.get_json(f"/api/v1/rankings/2025?page_size=10&page={last_page}")
+        assert last["rows"][-1]["rank"] == first["total"]
+        _, past = self.get_json(f"/api/v1/rankings/2025?page_size=10&page={last_page + 1}")
+        assert past["rows"] == []
+
+    def test_bad_pagination_answers_400(self):
+        for query in ("page=-1", "page_size=0", f"page_size={api.MAX_PAGE_SIZE + 1}", "page=x"):
+            response, body = self.get_json(f"/api/v1/rankings/2025?{query}")
+            assert response.code == 400, query
+            assert body["status"] == 400
+
+    def test_unknown_resources_answer_404(self):
+        for path in (
+            "/api/v1/rankings/1900",
+            "/api/v1/rankings/2025?indicator=NOPE",
+            "/api/v1/growth/2025?base=1900",
+            "/api/v1/groups/1900",
+            "/api/v1/groups/2025?family=Nope",
+            "/api/v1/countries/Atlantis",
+            "/api/v1/indicators/NOPE.arrow",
+        ):
+            response, body = self.get_json(path)
+            assert response.code == 404, path
+            assert body["status"] == 404
+
+    def test_responses_are_gzipped(self):
+        response = self.fetch(
+            "/api/v1/growth/2025",
+            headers={"Accept-Encoding": "gzip"},
+            decompress_response=False,
+        )
+        assert response.headers["Content-Encoding"] == "gzip"
+        assert json.loads(gzip.decompress(response.body))["rows"]
+
+        response = self.fetch(
+            "/api/v1/indicators/NGDPD.arrow",
+            headers={"Accept-Encoding": "gzip"},
+            decompress_response=False,
+        )
+        assert response.code == 200
+        assert response.headers["Content-Encoding"] == "gzip"
+        assert response.headers["Content-Type"] == api.ARROW_CONTENT_TYPE
+
+        table = pa.ipc.open_stream(gzip.decompress(response.body)).read_all()
+        plain = self.fetch("/api/v1/indicators/NGDPD.arrow", decompress_response=False)
+        assert "Content-Encoding" not in plain.headers
+        assert pa.ipc.open_stream(plain.body).read_all().equals(table)
+        assert table.column_names[:2] == ["Country", "ISO"]
+
+    def test_evicted_version_is_loaded_again(self):
+        get_analytics = api.get_analytics
+        calls = []
+
+        def evicted_once(version, *args):
+            calls.append(version)
+            return None if len(calls) == 1 else get_analytics(version, *args)
+
+        self.monkeypatch.setattr(api, "get_analytics", evicted_once)
+        response, body = self.get_json("/api/v1/growth/2025")
+        assert response.code == 200
+        assert len(calls) == 2
+        assert body["rows"]
+
+    def test_evicted_version_answers_503(self):
+        self.monkeypatch.setattr(api, "get_group_aggregates", lambda version: None)
+        response, body = self.get_json("/api/v1/groups/2025")
+        assert response.code == 503
+        assert body["status"] == 503
@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+
+from figures import MAP_CLASSES, create_gdp_map_lite, map_color_classes
+
+
+def map_frame(values):
+    return pd.DataFrame(
+        {
+            "Country": ["United States", "Germany", "Japan"][: len(values)],
+            "ISO": ["USA", "DEU", "JPN"][: len(values)],
+            "GDP (Billions USD)": values,
+            "GDP_formatted": [f"{value:,.0f}" for value in values],
+        }
+    )
+
+
+def test_color_classes_are_log_spaced():
+    classes, edges = map_color_classes([1, 10, 100, 1000, 10000, 100000])
+
+    assert len(edges) == MAP_CLASSES + 1
+    assert list(classes) == sorted(classes)
+    assert classes[0] == 0 and classes[-1] == MAP_CLASSES - 1
+
+
+def test_non_positive_values_are_left_out():
+    classes, edges = map_color_classes([-3.5, 0.0, np.nan, 10.0, 1000.0])
+
+    assert list(classes[:3]) == [-1, -1, -1]
+    assert classes[3] == 0 and classes[4] == len(edges) - 2
+    assert edges[0] == 10.0
+
+    fig = create_gdp_map_lite(map_frame([-3.5, 10.0, 1000.0]), "2025")
+    assert list(fig.data[0].locations) == ["DEU", "JPN"]
+    assert fig.data[0].colorbar.ticktext[0].startswith("10–")
+
+
+def test_no_positive_values_leave_the_map_blank():
+    classes, edges = map_color_classes([-3.5, -1.0, 0.0, np.nan])
+
+    assert list(classes) == [-1, -1, -1, -1]
+    assert len(edges) == 0
+
+    fig = create_gdp_map_lite(map_frame([-3.5, -1.0, 0.0]), "2025")
+    assert len(fig.data[0].locations) == 0
+    assert not fig.data[0].showscale
+    fig.to_json()
+
+
+def test_equal_values_give_one_class():
+    classes, edges = map_color_classes([42.0, 42.0, 42.0])
+
+    assert list(classes) == [0, 0, 0]
+    assert list(edges) == [42.0, 42.0]
+
+    fig = create_gdp_map_lite(map_frame([42.0, 42.0, 42.0]), "2025")
+    assert len(fig.data[0].colorscale) == 2
+    fig.to_json()
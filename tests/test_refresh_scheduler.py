@@ -0,0 +1,258 @@
+import gzip
+import threading
+import time
+from email.utils import formatdate, parsedate_to_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from conftest import wait_for_refresh
+
+import gdp_data
+import refresh_scheduler
+from imf_data import FIXTURE_PATH, WEO_VINTAGE, fetch_imf_gdp_data
+from refresh_scheduler import RefreshScheduler, validate_snapshot
+from snapshot_store import SnapshotStore, snapshot_key
+
+KEY = snapshot_key(WEO_VINTAGE, "NGDPD", 2022, 2029)
+
+with open(FIXTURE_PATH, "rb") as f:
+    REPORT = f.read()
+
+
+def truncated(report, countries):
+    """The report page with only its first data rows"""
+    lines = report.split(b"\n")
+    rows = [i for i, line in enumerate(lines) if line.startswith(b"<tr><td>")]
+    drop = set(rows[countries:])
+    return b"\n".join(line for i, line in enumerate(lines) if i not in drop)
+
+
+def revised(report):
+    """The report page with Germany's 2025 GDP revised"""
+    lines = report.split(b"\n")
+    for i, line in enumerate(lines):
+        if line.startswith(b"<tr><td>Germany</td>"):
+            cells = line.split(b'<td align="right">')
+            cells[4] = b"9999.999</td>" + cells[4].split(b"</td>", 1)[1]
+            lines[i] = b'<td align="right">'.join(cells)
+    return b"\n".join(lines)
+
+
+class StandInIMF:
+    """Local HTTP server standing in for the IMF report page"""
+
+    def __init__(self):
+        self.body = REPORT
+        self.modified = time.time() - 3600
+        self.failures = 0
+        self.gzip = False
+        self.requests = []
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                server.requests.append(dict(self.headers))
+                if server.failures:
+                    server.failures -= 1
+                    self.send_error(503)
+                    return
+                since = self.headers.get("If-Modified-Since")
+                if since and parsedate_to_datetime(since).timestamp() >= int(server.modified):
+                    self.send_response(304)
+                    self.end_headers()
+                    return
+                body = gzip.compress(server.body) if server.gzip else server.body
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html")
+                self.send_header("Content-Length", str(len(body)))
+                if server.gzip:
+                    self.send_header("Content-Encoding", "gzip")
+                self.send_header("Last-Modified", formatdate(server.modified, usegmt=True))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}/weo-report"
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+
+    def publish(self, body):
+        self.body = body
+        self.modified = time.time() + 1
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+@pytest.fixture
+def imf():
+    server = StandInIMF()
+    yield server
+    server.close()
+
+
+@pytest.fixture
+def store(tmp_path):
+    return SnapshotStore(str(tmp_path), ttl=3600)
+
+
+@pytest.fixture
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(refresh_scheduler, "BACKOFF_SECONDS", 0.01)
+
+
+def test_unchanged_source_answers_304(imf, store):
+    scheduler = RefreshScheduler(store, lambda: [])
+    assert scheduler.refresh(KEY, imf.url, fetch_imf_gdp_data)
+    _, first = store.current(KEY)
+    assert first["last_modified"] == formatdate(imf.modified, usegmt=True)
+
+    assert not scheduler.refresh(KEY, imf.url, fetch_imf_gdp_data)
+    assert imf.requests[-1]["If-Modified-Since"] == first["last_modified"]
+    _, checked = store.current(KEY)
+    assert checked["fetched_at"] == first["fetched_at"]
+    assert checked["checked_at"] > first["checked_at"]
+
+
+def test_changed_source_is_swapped_in(imf, store):
+    scheduler = RefreshScheduler(store, lambda: [])
+    scheduler.refresh(KEY, imf.url, fetch_imf_gdp_data)
+
+    imf.publish(revised(REPORT))
+    assert scheduler.refresh(KEY, imf.url, fetch_imf_gdp_data)
+    frame, meta = store.current(KEY)
+    assert meta["revised_cells"] == 1
+    assert frame.loc[frame["Country"] == "Germany", "2025"].iloc[0] == pytest.approx(9999.999)
+
+
+def test_download_is_parsed_as_it_streams(imf, store):
+    imf.gzip = True
+    streams = []
+
+    def parse(source):
+        streams.append(source)
+        return fetch_imf_gdp_data(source)
+
+    assert RefreshScheduler(store, lambda: []).refresh(KEY, imf.url, parse)
+    # The raw response, decompressed on the fly and closed after parsing
+    assert not hasattr(streams[0], "getvalue")
+    assert streams[0].closed
+    assert len(store.current(KEY)[0]) == 196
+
+
+def test_truncated_report_is_rejected(imf, store):
+    scheduler = RefreshScheduler(store, lambda: [])
+    scheduler.refresh(KEY, imf.url, fetch_imf_gdp_data)
+    frame, meta = store.current(KEY)
+
+    imf.publish(truncated(REPORT, 21))
+    with pytest.raises(ValueError, match=r"Only \d+ countries in the new data, previously 196"):
+        scheduler.refresh(KEY, imf.url, fetch_imf_gdp_data)
+
+    # The previous snapshot keeps being served
+    served, served_meta = SnapshotStore(store.directory).current(KEY)
+    assert served_meta["fetched_at"] == meta["fetched_at"]
+    assert len(served) == len(frame)
+
+
+def test_validation_follows_the_previous_snapshot():
+    report = fetch_imf_gdp_data(FIXTURE_PATH)
+    # An older vintage with fewer years and countries replaces itself fine
+    older = report.drop(columns=["2028", "2029"]).head(40)
+    validate_snapshot(older, older)
+
+    with pytest.raises(ValueError, match="missing years \\[2029\\]"):
+        validate_snapshot(report.drop(columns=["2029"]), report)
+    with pytest.raises(ValueError, match="empty"):
+        validate_snapshot(report.head(0))
+
+
+def test_failed_requests_are_retried_with_backoff(imf, store, no_backoff):
+    scheduler = RefreshScheduler(store, lambda: [])
+    delays = []
+    wait = scheduler._stop.wait
+    scheduler._stop.wait = lambda delay: delays.append(delay) or wait(0)
+
+    imf.failures = 2
+    assert scheduler.refresh(KEY, imf.url, fetch_imf_gdp_data)
+    assert delays == [0.01, 0.02]
+    assert len(imf.requests) == 3
+
+
+def test_failures_past_the_retries_keep_the_snapshot(imf, store, no_backoff):
+    sources = lambda: [(WEO_VINTAGE, KEY, imf.url, fetch_imf_gdp_data)]  # noqa: E731
+    scheduler = RefreshScheduler(store, sources)
+    scheduler.refresh_all()
+    _, meta = store.current(KEY)
+
+    imf.publish(revised(REPORT))
+    imf.failures = refresh_scheduler.MAX_ATTEMPTS
+    assert scheduler.refresh_all() == []
+    assert len(imf.requests) == 1 + refresh_scheduler.MAX_ATTEMPTS
+    assert store.current(KEY)[1]["fetched_at"] == meta["fetched_at"]
+
+    # The next poll picks the data up
+    assert scheduler.refresh_all() == [KEY]
+
+
+def test_one_refresher_per_snapshot_folder(imf, store):
+    sources = lambda: [(WEO_VINTAGE, KEY, imf.url, fetch_imf_gdp_data)]  # noqa: E731
+    scheduler = RefreshScheduler(store, sources)
+    other_process = SnapshotStore(store.directory)
+
+    with other_process.refresh_lock() as locked:
+        assert locked
+        assert scheduler.refresh_all() == []
+    assert imf.requests == []
+    assert scheduler.refresh_all() == [KEY]
+
+
+@pytest.fixture
+def app_data(monkeypatch, tmp_path, imf):
+    """gdp_data reading the stand-in IMF server with a TTL of 0"""
+    monkeypatch.setattr(gdp_data, "snapshot_store", SnapshotStore(str(tmp_path), ttl=0))
+    monkeypatch.setattr(gdp_data, "shared_datasets", None)
+    monkeypatch.setattr(gdp_data, "_scheduler", None)
+    monkeypatch.setattr(gdp_data, "_datasets", {})
+    monkeypatch.setattr(
+        gdp_data,
+        "_snapshot_sources",
+        lambda: [(WEO_VINTAGE, KEY, imf.url, fetch_imf_gdp_data)],
+    )
+    return gdp_data
+
+
+def test_stale_snapshot_refresh_is_validated(app_data, imf):
+    cube, version = app_data.load_gdp_data()
+    countries = len(cube.countries)
+
+    imf.publish(truncated(REPORT, 21))
+    # Stale with a TTL of 0: served while refreshed in the background
+    assert app_data.load_gdp_data()[1] == version
+    wait_for_refresh(app_data.snapshot_store, KEY)
+
+    cube, served = app_data.load_gdp_data()
+    assert served == version
+    assert len(cube.countries) == countries
+
+
+def test_stale_snapshot_refresh_builds_the_dataset_before_the_swap(app_data, imf):
+    _, version = app_data.load_gdp_data()
+
+    imf.publish(revised(REPORT))
+    app_data.load_gdp_data()
+    wait_for_refresh(app_data.snapshot_store, KEY)
+
+    # prepare_snapshot() built the new version before it was swapped in
+    versions = list(app_data._datasets)
+    assert len(versions) == 2
+    cube, new_version = app_data.load_gdp_data()
+    assert new_version == versions[-1] != version
+    dataset = app_data._datasets[new_version]
+    assert dataset.year_versions["2024"] == version
+    assert dataset.year_versions["2025"] == new_version
@@ -0,0 +1,54 @@
+import os
+import threading
+
+import numpy as np
+import pytest
+
+from imf_data import FIXTURE_PATH, GDP_INDICATOR, WEO_VINTAGE, fetch_imf_gdp_data
+from rankings import YearRankings
+from shared_dataset import SharedDatasets
+from weo_cube import WeoCube
+
+VERSION = "test@1"
+
+
+@pytest.fixture(scope="module")
+def dataset():
+    cube = WeoCube.from_wide(fetch_imf_gdp_data(FIXTURE_PATH), WEO_VINTAGE, GDP_INDICATOR)
+    rankings = YearRankings(
+        cube.countries, cube.matrix(GDP_INDICATOR), cube.year_labels, cube.iso
+    )
+    return cube, rankings
+
+
+def test_published_version_is_mapped(tmp_path, dataset):
+    cube, rankings = dataset
+    shared = SharedDatasets(str(tmp_path))
+    assert shared.open(VERSION) is None
+
+    assert shared.publish(VERSION, cube, rankings, 0.0, {"2025": VERSION})
+    mapped, _, header = shared.open(VERSION)
+    assert np.array_equal(mapped.values, cube.values, equal_nan=True)
+    assert header["year_versions"] == {"2025": VERSION}
+
+
+def test_concurrent_publishes_all_succeed(tmp_path, dataset):
+    cube, rankings = dataset
+    shared = SharedDatasets(str(tmp_path))
+    results = []
+    barrier = threading.Barrier(8)
+
+    def publish():
+        barrier.wait()
+        results.append(shared.publish(VERSION, cube, rankings, 0.0, {}))
+
+    threads = [threading.Thread(target=publish) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == [True] * 8
+    # One folder, no temporary ones left behind
+    assert len(os.listdir(tmp_path)) == 1
+    assert shared.open(VERSION) is not None
@@ -0,0 +1,94 @@
+import pytest
+from conftest import wait_for_refresh
+
+from imf_data import FIXTURE_PATH, fetch_imf_gdp_data
+from snapshot_store import SnapshotStore, snapshot_key
+
+KEY = snapshot_key("2024-10", "NGDPD", 2022, 2029)
+
+
+@pytest.fixture(scope="module")
+def report():
+    return fetch_imf_gdp_data(FIXTURE_PATH)
+
+
+class CountingFetch:
+    """Fetch callable recording its calls, optionally failing"""
+
+    def __init__(self, frame, error=None):
+        self.frame = frame
+        self.error = error
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        if self.error is not None:
+            raise self.error
+        return self.frame
+
+
+def test_no_snapshot_fetches_synchronously(tmp_path, report):
+    store = SnapshotStore(str(tmp_path), ttl=60)
+    fetch = CountingFetch(report)
+
+    frame = store.get(KEY, fetch)
+
+    assert fetch.calls == 1
+    assert len(frame) == len(report)
+    _, meta = store.read(KEY)
+    assert meta["key"] == KEY
+
+
+def test_no_snapshot_propagates_fetch_errors(tmp_path):
+    store = SnapshotStore(str(tmp_path), ttl=60)
+    with pytest.raises(OSError):
+        store.get(KEY, CountingFetch(None, OSError("offline")))
+    assert store.read(KEY) is None
+
+
+def test_fresh_snapshot_is_served_without_fetching(tmp_path, report):
+    SnapshotStore(str(tmp_path), ttl=60).get(KEY, CountingFetch(report))
+
+    # A restarted worker reads the snapshot from disk
+    store = SnapshotStore(str(tmp_path), ttl=60)
+    fetch = CountingFetch(report)
+    frame = store.get(KEY, fetch)
+
+    assert fetch.calls == 0
+    assert list(frame["Country"]) == list(report["Country"])
+
+
+def test_stale_snapshot_is_served_while_refreshing(tmp_path, report):
+    store = SnapshotStore(str(tmp_path), ttl=0)
+    store.get(KEY, CountingFetch(report))
+    _, first = store.read(KEY)
+
+    revised = report.copy()
+    revised.loc[revised["Country"] == "Germany", "2025"] += 1
+    fetch = CountingFetch(revised)
+    frame = store.get(KEY, fetch)
+
+    # The stale data is returned right away
+    assert frame.loc[frame["Country"] == "Germany", "2025"].iloc[0] == pytest.approx(
+        report.loc[report["Country"] == "Germany", "2025"].iloc[0]
+    )
+    wait_for_refresh(store, KEY)
+    assert fetch.calls == 1
+    _, refreshed = store.read(KEY)
+    assert refreshed["fetched_at"] > first["fetched_at"]
+
+
+def test_failed_refresh_keeps_last_good_snapshot(tmp_path, report):
+    store = SnapshotStore(str(tmp_path), ttl=0)
+    store.get(KEY, CountingFetch(report))
+    _, first = store.read(KEY)
+
+    fetch = CountingFetch(None, OSError("IMF unreachable"))
+    store.get(KEY, fetch)
+    wait_for_refresh(store, KEY)
+
+    assert fetch.calls == 1
+    frame, meta = store.read(KEY)
+    assert meta["fetched_at"] == first["fetched_at"]
+    assert len(frame) == len(report)
+    assert len(store.get(KEY, CountingFetch(report))) == len(report)
@@ -0,0 +1,204 @@
+"""
+Concurrent fetch of several WEO indicators from the IMF report page.
+
+The report returns one table per request, and asking for several subjects
+at once interleaves their rows. Each indicator is therefore requested
+separately, with the long country list split into chunks, and the requests
+run concurrently on a pooled requests.Session so they reuse connections.
+Fetching many indicators takes about as long as the slowest request
+instead of the sum of all of them. The results are merged into the same
+long format as the WEO bulk download.
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, urlencode, urlsplit, urlunsplit
+
+import numpy as np
+import pandas as pd
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from country_codes import resolve_iso3
+from imf_data import END_YEAR, IMF_WEO_URL, START_YEAR
+from weo_parser import parse_weo_report
+
+# Countries per request; the full list makes for slow, very long URLs
+DEFAULT_CHUNK_SIZE = 100
+
+# Concurrent requests (and pooled connections) per fetch
+DEFAULT_MAX_WORKERS = 16
+
+# Seconds to wait for connecting to / reading from the IMF server
+REQUEST_TIMEOUT = (10, 60)
+
+# Retries of failed connections and 429/5xx responses, with exponential backoff
+MAX_RETRIES = 3
+BACKOFF_FACTOR = 0.5
+
+
+def report_country_codes(url=IMF_WEO_URL):
+    """Return the IMF country codes a report URL asks for"""
+    codes = parse_qs(urlsplit(url).query).get("c", [""])[0]
+    return [code for code in codes.split(",") if code]
+
+
+def weo_report_url(
+    countries, indicator, start_year=START_YEAR, end_year=END_YEAR, base_url=IMF_WEO_URL
+):
+    """
+    Build the report URL for one indicator and a set of countries
+
+    The other report options (sorting, separators, ...) are kept from the
+    base URL.
+
+    Args:
+        countries: IMF country codes
+        indicator: IMF subject code
+        start_year: First year of the report
+        end_year: Last year of the report
+        base_url: Report URL to take the host, path and options from
+
+    Returns:
+        Report URL
+    """
+    parts = urlsplit(base_url)
+    query = {key: values[0] for key, values in parse_qs(parts.query).items()}
+    query.update(
+        c=",".join(countries) + ",",
+        s=indicator + ",",
+        sy=str(start_year),
+        ey=str(end_year),
+    )
+    return urlunsplit(parts._replace(query=urlencode(query, safe=",")))
+
+
+def make_session(pool_size=DEFAULT_MAX_WORKERS):
+    """
+    Create a requests.Session that pools connections and retries failures
+
+    Args:
+        pool_size: Connections kept open per host
+
+    Returns:
+        requests.Session
+    """
+    retry = Retry(
+        total=MAX_RETRIES,
+        backoff_factor=BACKOFF_FACTOR,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=("GET",),
+    )
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def fetch_weo_indicators(
+    indicators,
+    countries=None,
+    start_year=START_YEAR,
+    end_year=END_YEAR,
+    base_url=None,
+    chunk_size=DEFAULT_CHUNK_SIZE,
+    max_workers=None,
+    session=None,
+):
+    """
+    Fetch several indicators from the IMF report page concurrently
+
+    Args:
+        indicators: IMF subject codes
+        countries: IMF country codes (defaults to those of the base URL)
+        start_year: First year to fetch
+        end_year: Last year to fetch
+        base_url: Report URL to fetch from (defaults to imf_source() if it
+            is a URL, otherwise IMF_WEO_URL)
+        chunk_size: Countries per request
+        max_workers: Concurrent requests (defaults to GDP_FETCH_WORKERS or 16)
+        session: requests.Session to use (one is created if None)
+
+    Returns:
+        DataFrame with columns Country, ISO, Indicator, Year and Value,
+        without missing values
+
+    Raises:
+        requests.RequestException: If a request still fails after retrying
+        ValueError: If a response has no data table
+    """
+    if base_url is None:
+        source = os.environ.get("GDP_IMF_SOURCE", IMF_WEO_URL)
+        base_url = source if source.startswith(("http://", "https://")) else IMF_WEO_URL
+    if countries is None:
+        countries = report_country_codes(base_url) or report_country_codes()
+    if max_workers is None:
+        max_workers = int(os.environ.get("GDP_FETCH_WORKERS", DEFAULT_MAX_WORKERS))
+
+    chunks = [countries[i : i + chunk_size] for i in range(0, len(countries), chunk_size)]
+    urls = [
+        (indicator, weo_report_url(chunk, indicator, start_year, end_year, base_url))
+        for indicator in indicators
+        for chunk in chunks
+    ]
+
+    owns_session = session is None
+    if owns_session:
+        session = make_session(max_workers)
+
+    def fetch(indicator_url):
+        indicator, url = indicator_url
+        with session.get(url, stream=True, timeout=REQUEST_TIMEOUT) as response:
+            response.raise_for_status()
+            response.raw.decode_content = True
+            return indicator, parse_weo_report(response.raw, min_countries=1)
+
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results = list(executor.map(fetch, urls))
+    finally:
+        if owns_session:
+            session.close()
+
+    return merge_report_tables(results)
+
+
+def merge_report_tables(tables):
+    """
+    Merge wide report tables into one long-format table
+
+    Args:
+        tables: List of (indicator, DataFrame) pairs, each DataFrame with a
+            Country column and one column per year
+
+    Returns:
+        DataFrame with columns Country, ISO, Indicator, Year and Value,
+        without missing values
+    """
+    parts = []
+    for indicator, frame in tables:
+        year_cols = [col for col in frame.columns if col != "Country"]
+        values = frame[year_cols].to_numpy(dtype=np.float64)
+        row_idx, year_idx = np.nonzero(~np.isnan(values))
+        parts.append(
+            pd.DataFrame(
+                {
+                    "Country": frame["Country"].to_numpy()[row_idx],
+                    "Indicator": indicator,
+                    "Year": np.array(year_cols, dtype=np.int16)[year_idx],
+                    "Value": values[row_idx, year_idx],
+                }
+            )
+        )
+
+    long_df = pd.concat(parts, ignore_index=True).drop_duplicates(
+        ["Country", "Indicator", "Year"]
+    )
+    names = long_df["Country"].unique()
+    iso = {name: resolve_iso3(name) or "" for name in names}
+    long_df.insert(1, "ISO", long_df["Country"].map(iso))
+    for col in ("Country", "ISO", "Indicator"):
+        long_df[col] = long_df[col].astype("category")
+    return long_df.reset_index(drop=True)
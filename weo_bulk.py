@@ -0,0 +1,155 @@
+"""
+Ingest of the IMF WEO bulk download.
+
+The IMF publishes each WEO release as one tab-delimited file
+("WEOOct2024all.xls" despite the extension) holding every indicator for
+every economy, one row per (country, indicator) and one column per year.
+It is read in chunks and reshaped into a long-format table with columns
+Country, ISO, Indicator, Year and Value, which is stored as a snapshot so
+the app reads it once from a local file without any HTML scraping.
+
+fixtures/WEOOct2024sample.tsv is a small file in the same layout for
+offline runs.
+"""
+
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+from imf_data import WEO_VINTAGE
+
+LONG_COLUMNS = ["Country", "ISO", "Indicator", "Year", "Value"]
+
+# Column names used by the IMF bulk file
+ISO_COLUMN = "ISO"
+INDICATOR_COLUMN = "WEO Subject Code"
+COUNTRY_COLUMN = "Country"
+
+MONTHS = {"Apr": "04", "Oct": "10"}
+
+SAMPLE_PATH = os.path.join(os.path.dirname(__file__), "fixtures", "WEOOct2024sample.tsv")
+
+
+def weo_bulk_sources():
+    """
+    Return the bulk files to ingest, if the bulk backend is enabled
+
+    Set GDP_WEO_BULK_PATH to a local path (or URL) of a WEO bulk file to
+    use it instead of the HTML report. Several files, e.g. one per WEO
+    vintage, can be given separated by commas.
+    """
+    value = os.environ.get("GDP_WEO_BULK_PATH", "")
+    return [source.strip() for source in value.split(",") if source.strip()]
+
+
+def weo_bulk_vintage(source):
+    """
+    Derive the WEO vintage from a bulk file name such as WEOOct2024all.xls
+
+    Returns:
+        Vintage string like "2024-10", or WEO_VINTAGE if the name has none
+    """
+    match = re.search(r"WEO(Apr|Oct)(\d{4})", os.path.basename(str(source)))
+    if match is None:
+        return WEO_VINTAGE
+    return f"{match.group(2)}-{MONTHS[match.group(1)]}"
+
+
+def weo_bulk_key(source):
+    """Snapshot key of the long-format table ingested from a bulk file"""
+    return f"weo-{weo_bulk_vintage(source)}_bulk"
+
+
+def _detect_encoding(source):
+    # Releases have shipped as UTF-16 with a BOM as well as in Windows-1252
+    if hasattr(source, "read"):
+        head = source.read(4096)
+        source.seek(0)
+    elif os.path.exists(str(source)):
+        with open(source, "rb") as f:
+            head = f.read(4096)
+    else:
+        return "utf-8"
+    if head.startswith((b"\xff\xfe", b"\xfe\xff")):
+        return "utf-16"
+    try:
+        head.decode("utf-8")
+    except UnicodeDecodeError:
+        return "cp1252"
+    return "utf-8-sig"
+
+
+def read_weo_bulk(source, indicators=None, chunksize=5000):
+    """
+    Read a WEO bulk file into a long-format table
+
+    Args:
+        source: Local path, URL or binary file object of the tab-delimited
+            bulk file
+        indicators: IMF subject codes to keep (all if None)
+        chunksize: Number of rows parsed at a time
+
+    Returns:
+        DataFrame with columns Country, ISO, Indicator, Year and Value,
+        without missing values
+    """
+    encoding = _detect_encoding(source)
+    header = pd.read_csv(source, sep="\t", nrows=0, encoding=encoding).columns
+    year_cols = [col for col in header if re.fullmatch(r"\d{4}", str(col).strip())]
+    years = np.array([int(col) for col in year_cols], dtype=np.int16)
+    if hasattr(source, "seek"):
+        source.seek(0)
+
+    reader = pd.read_csv(
+        source,
+        sep="\t",
+        encoding=encoding,
+        usecols=[COUNTRY_COLUMN, ISO_COLUMN, INDICATOR_COLUMN, *year_cols],
+        dtype={col: "float64" for col in year_cols},
+        thousands=",",
+        na_values=["n/a", "--"],
+        chunksize=chunksize,
+    )
+
+    parts = []
+    for chunk in reader:
+        # The file ends with a source note that has no subject code
+        chunk = chunk.dropna(subset=[INDICATOR_COLUMN])
+        if indicators is not None:
+            chunk = chunk[chunk[INDICATOR_COLUMN].isin(indicators)]
+        if chunk.empty:
+            continue
+
+        # Reshape rows x years into long format without a Python loop
+        values = chunk[year_cols].to_numpy(dtype=np.float64)
+        valid = ~np.isnan(values)
+        row_idx, year_idx = np.nonzero(valid)
+        parts.append(
+            pd.DataFrame(
+                {
+                    "Country": chunk[COUNTRY_COLUMN].str.strip().to_numpy()[row_idx],
+                    "ISO": chunk[ISO_COLUMN].to_numpy()[row_idx],
+                    "Indicator": chunk[INDICATOR_COLUMN].to_numpy()[row_idx],
+                    "Year": years[year_idx],
+                    "Value": values[valid],
+                }
+            )
+        )
+
+    if not parts:
+        return pd.DataFrame(
+            {
+                "Country": pd.Series(dtype="category"),
+                "ISO": pd.Series(dtype="category"),
+                "Indicator": pd.Series(dtype="category"),
+                "Year": pd.Series(dtype=np.int16),
+                "Value": pd.Series(dtype=np.float64),
+            }
+        )
+
+    long_df = pd.concat(parts, ignore_index=True)
+    for col in ["Country", "ISO", "Indicator"]:
+        long_df[col] = long_df[col].astype("category")
+    return long_df
@@ -0,0 +1,256 @@
+"""
+Columnar store for WEO data across vintages, indicators, countries and years.
+
+All values live in one dense float32 array indexed by
+(vintage, indicator, country, year), with missing cells as NaN. Countries
+and indicators are dictionary-encoded: the array holds positions and the
+code/name lists map them back, so a single indicator for a single year is
+a cheap slice rather than a column of its own DataFrame.
+
+The snapshot frames the cube is built from stay in memory too (refreshes
+are diffed against them), so compact_frame() gives them compact dtypes
+at ingest: categorical names and codes, float32 values.
+"""
+
+import numpy as np
+import pandas as pd
+
+from country_codes import build_iso_index
+
+# Compact dtypes of the columns of long-format snapshot frames
+LONG_DTYPES = {
+    "Country": "category",
+    "ISO": "category",
+    "Indicator": "category",
+    "Year": np.int16,
+    "Value": np.float32,
+}
+
+
+def compact_frame(frame):
+    """
+    Return a snapshot frame with compact dtypes, in the same layout
+
+    Country names, and the ISO and indicator codes of long frames, become
+    categoricals, which store each distinct string once. Values become
+    float32, the precision the cube holds them in anyway.
+
+    Args:
+        frame: Wide (Country plus year columns) or long snapshot DataFrame
+
+    Returns:
+        DataFrame with the same columns and values
+    """
+    if "Indicator" in frame.columns:
+        dtypes = {col: dtype for col, dtype in LONG_DTYPES.items() if col in frame.columns}
+    else:
+        dtypes = {col: np.float32 for col in frame.columns if col != "Country"}
+        dtypes["Country"] = "category"
+    return frame.astype(dtypes)
+
+
+class WeoCube:
+    """Dense (vintage, indicator, country, year) array of WEO values"""
+
+    def __init__(self, vintages, indicators, countries, years, values, iso=None):
+        """
+        Args:
+            vintages: WEO releases along axis 0, e.g. ["2024-10"]
+            indicators: IMF subject codes along axis 1, e.g. ["NGDPD"]
+            countries: Country names along axis 2
+            years: Years along axis 3 as integers
+            values: float32 array of shape (vintages, indicators, countries, years)
+            iso: Codes shipped with the data for each country, if any
+        """
+        self.vintages = list(vintages)
+        self.indicators = list(indicators)
+        self.countries = np.asarray(countries, dtype=object)
+        self.years = np.asarray(years, dtype=np.int16)
+        self.values = np.asarray(values, dtype=np.float32)
+
+        # ISO-3 code of every country (None if unknown), resolved once here
+        self.iso, self.unmatched_countries = build_iso_index(self.countries, iso)
+
+        expected = (
+            len(self.vintages),
+            len(self.indicators),
+            len(self.countries),
+            len(self.years),
+        )
+        if self.values.shape != expected:
+            raise ValueError(f"Values have shape {self.values.shape}, expected {expected}")
+
+        self._vintage_pos = {v: i for i, v in enumerate(self.vintages)}
+        self._indicator_pos = {code: i for i, code in enumerate(self.indicators)}
+        self._year_pos = {int(year): i for i, year in enumerate(self.years)}
+
+    @classmethod
+    def from_wide(cls, frame, vintage, indicator):
+        """
+        Build a cube from a wide frame as returned by fetch_imf_gdp_data()
+
+        Args:
+            frame: DataFrame with a Country column and one column per year
+            vintage: WEO release the frame belongs to
+            indicator: IMF subject code of the values
+        """
+        year_cols = [col for col in frame.columns if col != "Country"]
+        values = frame[year_cols].to_numpy(dtype=np.float32)
+        return cls(
+            [vintage],
+            [indicator],
+            frame["Country"].to_numpy(),
+            [int(col) for col in year_cols],
+            values[np.newaxis, np.newaxis],
+        )
+
+    @classmethod
+    def from_long(cls, long_df, vintage):
+        """
+        Build a cube from a long-format table as returned by read_weo_bulk()
+
+        Args:
+            long_df: DataFrame with Country, ISO, Indicator, Year and Value columns
+            vintage: WEO release the table belongs to
+        """
+        countries = pd.Categorical(long_df["Country"])
+        indicators = pd.Categorical(long_df["Indicator"])
+        years = np.unique(long_df["Year"].to_numpy())
+
+        # The category codes are the positions along the country/indicator axes
+        country_idx = countries.codes
+        indicator_idx = indicators.codes
+        year_idx = np.searchsorted(years, long_df["Year"].to_numpy())
+
+        values = np.full(
+            (1, len(indicators.categories), len(countries.categories), len(years)),
+            np.nan,
+            dtype=np.float32,
+        )
+        values[0, indicator_idx, country_idx, year_idx] = long_df["Value"].to_numpy()
+
+        iso = (
+            long_df[["Country", "ISO"]]
+            .drop_duplicates("Country")
+            .set_index("Country")["ISO"]
+            .astype(str)
+            .reindex(countries.categories)
+            .to_numpy()
+        )
+        return cls(
+            [vintage],
+            indicators.categories.astype(str),
+            countries.categories.astype(str),
+            years,
+            values,
+            iso=iso,
+        )
+
+    @classmethod
+    def combine(cls, cubes):
+        """
+        Merge cubes of different vintages or indicators into one
+
+        Countries are matched by ISO-3 code, or by name where they have
+        none. Cells missing from a cube are NaN.
+        """
+
+        def keys(cube):
+            return [iso or name for iso, name in zip(cube.iso, cube.countries)]
+
+        vintages = sorted({v for cube in cubes for v in cube.vintages})
+        indicators = sorted({code for cube in cubes for code in cube.indicators})
+        years = np.unique(np.concatenate([cube.years for cube in cubes]))
+
+        # Keep the first name seen for every country key
+        names = {}
+        for cube in cubes:
+            for key, name in zip(keys(cube), cube.countries):
+                names.setdefault(key, name)
+        country_keys = sorted(names, key=lambda key: names[key])
+
+        positions = {key: i for i, key in enumerate(country_keys)}
+        values = np.full(
+            (len(vintages), len(indicators), len(country_keys), len(years)),
+            np.nan,
+            dtype=np.float32,
+        )
+        for cube in cubes:
+            idx = np.ix_(
+                [vintages.index(v) for v in cube.vintages],
+                [indicators.index(code) for code in cube.indicators],
+                [positions[key] for key in keys(cube)],
+                np.searchsorted(years, cube.years),
+            )
+            block = values[idx]
+            filled = ~np.isnan(cube.values)
+            block[filled] = cube.values[filled]
+            values[idx] = block
+
+        return cls(
+            vintages,
+            indicators,
+            [names[key] for key in country_keys],
+            years,
+            values,
+            iso=country_keys,
+        )
+
+    @property
+    def latest_vintage(self):
+        return max(self.vintages)
+
+    @property
+    def year_labels(self):
+        """Years as the strings used for column names and selectors"""
+        return [str(year) for year in self.years]
+
+    @property
+    def nbytes(self):
+        return self.values.nbytes
+
+    def has_year(self, year):
+        return int(year) in self._year_pos
+
+    def matrix(self, indicator, vintage=None):
+        """
+        Return the (country, year) values of one indicator
+
+        Args:
+            indicator: IMF subject code
+            vintage: WEO release (latest if None)
+
+        Returns:
+            float32 array view of shape (countries, years)
+        """
+        v = self._vintage_pos[vintage or self.latest_vintage]
+        return self.values[v, self._indicator_pos[indicator]]
+
+    def series(self, indicator, year, vintage=None):
+        """
+        Return the values of one indicator for one year, by country
+
+        Returns:
+            float32 array view of shape (countries,)
+        """
+        return self.matrix(indicator, vintage)[:, self._year_pos[int(year)]]
+
+    def years_with_data(self, indicator, vintage=None):
+        """Year labels for which at least one country has a value"""
+        has_data = ~np.isnan(self.matrix(indicator, vintage)).all(axis=0)
+        return [str(year) for year in self.years[has_data]]
+
+    def memory_usage(self):
+        """
+        Return the bytes held by the cube
+
+        Returns:
+            Dict with the bytes of values, years and the country name and
+            ISO code arrays (including their strings)
+        """
+        return {
+            "values": self.values.nbytes,
+            "years": self.years.nbytes,
+            "countries": int(pd.Series(self.countries).memory_usage(index=False, deep=True)),
+            "iso": int(pd.Series(self.iso).memory_usage(index=False, deep=True)),
+        }
@@ -0,0 +1,138 @@
+"""
+Cell-level differences between two snapshots of WEO data.
+
+Successive WEO releases and refreshes revise only part of the
+(country, indicator, year) cells. diff_snapshots() finds the cells whose
+value changed, appeared or disappeared, so the snapshot store can write
+just those and the app can refresh only the years they touch.
+apply_delta() rebuilds the new snapshot from the old one and the delta.
+
+Both the wide frames of the report parser (Country plus one column per
+year) and the long frames of the bulk reader (Country, ISO, Indicator,
+Year, Value) are supported; deltas are always long.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+def is_long(frame):
+    return "Indicator" in frame.columns
+
+
+def _keys(frame):
+    return ["Country", "Indicator", "Year"] if is_long(frame) else ["Country", "Year"]
+
+
+def to_long(frame):
+    """
+    Return the non-missing cells of a snapshot as a long-format table
+
+    Args:
+        frame: Wide or long snapshot DataFrame
+
+    Returns:
+        DataFrame with the key columns (Country, [ISO, Indicator,] Year) and
+        Value, with plain (non-categorical) columns
+    """
+    if is_long(frame):
+        long_df = frame.astype(
+            {"Country": str, "ISO": str, "Indicator": str, "Year": np.int16}
+        )
+        return long_df.dropna(subset=["Value"]).reset_index(drop=True)
+
+    year_cols = [col for col in frame.columns if col != "Country"]
+    values = frame[year_cols].to_numpy(dtype=np.float64)
+    row_idx, year_idx = np.nonzero(~np.isnan(values))
+    return pd.DataFrame(
+        {
+            "Country": frame["Country"].to_numpy()[row_idx],
+            "Year": np.array(year_cols, dtype=np.int16)[year_idx],
+            "Value": values[row_idx, year_idx],
+        }
+    )
+
+
+def diff_snapshots(old, new):
+    """
+    Find the cells that differ between two snapshots
+
+    Args:
+        old: Stored snapshot DataFrame
+        new: Newly fetched snapshot DataFrame of the same layout
+
+    Returns:
+        Long DataFrame with the key columns, Previous (NaN for new cells)
+        and Value (NaN for removed cells), one row per changed cell
+    """
+    keys = _keys(new)
+    old_long = to_long(old)
+    new_long = to_long(new)
+    if is_long(new):
+        # The ISO code is an attribute of the country, not part of the key
+        old_long = old_long.drop(columns="ISO")
+
+    merged = new_long.merge(
+        old_long.rename(columns={"Value": "Previous"}), on=keys, how="outer"
+    )
+    previous = merged["Previous"].to_numpy()
+    value = merged["Value"].to_numpy()
+    changed = ~((previous == value) | (np.isnan(previous) & np.isnan(value)))
+
+    delta = merged[changed].reset_index(drop=True)
+    if is_long(new):
+        # Removed cells have no ISO code in the new data; take the old one
+        iso = pd.concat([to_long(new), to_long(old)]).drop_duplicates("Country")
+        delta["ISO"] = delta["Country"].map(iso.set_index("Country")["ISO"])
+        columns = ["Country", "ISO", "Indicator", "Year", "Previous", "Value"]
+    else:
+        columns = ["Country", "Year", "Previous", "Value"]
+    return delta[columns]
+
+
+def apply_delta(frame, delta):
+    """
+    Apply the changed cells of a delta to a snapshot
+
+    Args:
+        frame: Snapshot DataFrame the delta was computed against
+        delta: DataFrame from diff_snapshots()
+
+    Returns:
+        Snapshot DataFrame in the layout of frame
+    """
+    keys = _keys(frame)
+    long_df = pd.concat(
+        [to_long(frame), delta.drop(columns="Previous")], ignore_index=True
+    )
+    # Later rows (the delta) win; removed cells have a NaN value
+    long_df = long_df.drop_duplicates(keys, keep="last").dropna(subset=["Value"])
+
+    if is_long(frame):
+        long_df = long_df.sort_values(keys, kind="stable").reset_index(drop=True)
+        for col in ("Country", "ISO", "Indicator"):
+            long_df[col] = long_df[col].astype("category")
+        return long_df[list(frame.columns)]
+
+    # Keep the row order of the stored frame and append new countries
+    countries = pd.unique(
+        np.concatenate([frame["Country"].to_numpy(), delta["Country"].to_numpy()])
+    )
+    wide = long_df.pivot(index="Country", columns="Year", values="Value")
+    years = sorted(
+        {int(col) for col in frame.columns if col != "Country"} | set(wide.columns)
+    )
+    wide = wide.reindex(index=countries, columns=years)
+
+    # Drop countries the delta removed, but keep those that never had data
+    year_cols = [col for col in frame.columns if col != "Country"]
+    empty = frame.loc[frame[year_cols].isna().all(axis=1), "Country"]
+    wide = wide[wide.notna().any(axis=1) | wide.index.isin(empty)]
+
+    wide.columns = [str(year) for year in wide.columns]
+    return wide.rename_axis(None, axis=1).reset_index()
+
+
+def delta_years(delta):
+    """Return the years a delta touches as sorted strings"""
+    return [str(year) for year in sorted(delta["Year"].unique())]
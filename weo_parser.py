@@ -0,0 +1,143 @@
+"""
+Streaming parser for the IMF WEO report page.
+
+Instead of letting pd.read_html build a DataFrame for every table on the
+page, the report is fed incrementally to lxml's iterparse. Only the rows of
+the data table (the one whose header has a country column and year
+columns) are looked at, each row is discarded as soon as its values are
+read, and parsing stops at the end of that table. Values go straight into
+float arrays, one per year.
+"""
+
+import re
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+from lxml import etree
+
+YEAR_PATTERN = re.compile(r"^(19|20)\d\d$")
+
+# Rows in the data table that aren't economies (headers, footers, etc.)
+NON_COUNTRY_PATTERN = re.compile(
+    "International Monetary Fund|Subject|Descriptor|Gross domestic product",
+    re.IGNORECASE,
+)
+
+# Seconds to wait for the IMF server when streaming the report
+REQUEST_TIMEOUT = 60
+
+
+def parse_number(text):
+    """
+    Convert a report cell such as "25,439.700" or "n/a" to a float
+
+    Returns:
+        The value, or NaN for missing or non-numeric cells
+    """
+    try:
+        return float(text.replace(",", ""))
+    except ValueError:
+        return np.nan
+
+
+def _cell_text(cell):
+    # Most cells hold plain text, which avoids walking the subtree
+    if len(cell) == 0:
+        return (cell.text or "").strip()
+    return "".join(cell.itertext()).strip()
+
+
+def _cells(row):
+    return [cell for cell in row if cell.tag in ("td", "th")]
+
+
+def _find_columns(texts):
+    """Return (country index, {index: year}) if the row is the data table header"""
+    country_idx = next(
+        (i for i, text in enumerate(texts) if "country" in text.lower()), None
+    )
+    year_idx = {i: text for i, text in enumerate(texts) if YEAR_PATTERN.match(text)}
+    if country_idx is None or not year_idx:
+        return None
+    return country_idx, year_idx
+
+
+@contextmanager
+def _open_report(source):
+    """Yield a binary stream for a URL, local path or file object"""
+    if hasattr(source, "read"):
+        yield source
+    elif re.match(r"^https?://", str(source)):
+        # Imported on the first live fetch: workers starting from a stored
+        # snapshot never need it
+        import requests
+
+        with requests.get(source, stream=True, timeout=REQUEST_TIMEOUT) as response:
+            response.raise_for_status()
+            response.raw.decode_content = True
+            yield response.raw
+    else:
+        # Opened here rather than by lxml, so stopping after the data table
+        # still closes the file
+        with open(source, "rb") as f:
+            yield f
+
+
+def parse_weo_report(source, min_countries=10):
+    """
+    Stream the IMF report and extract the data table
+
+    Args:
+        source: URL, local path or binary file object of the report page
+        min_countries: Fewest economies the data table may have
+
+    Returns:
+        DataFrame with a Country column and one float column per year
+
+    Raises:
+        ValueError: If the page has no table with country and year columns
+    """
+    countries = []
+    columns = None
+    data_table = None
+
+    with _open_report(source) as stream:
+        for event, elem in etree.iterparse(
+            stream, events=("end",), tag=("tr", "table"), html=True
+        ):
+            if elem.tag == "table":
+                if elem is data_table:
+                    # Everything after the data table is irrelevant
+                    break
+                continue
+
+            cells = _cells(elem)
+
+            if columns is None:
+                found = _find_columns([_cell_text(cell) for cell in cells])
+                if found is not None:
+                    country_idx, year_idx = found
+                    last_idx = max(year_idx)
+                    columns = {year: [] for year in year_idx.values()}
+                    data_table = next(elem.iterancestors("table"), None)
+            elif len(cells) > last_idx:
+                # Only the country and year cells of a row are read
+                country = _cell_text(cells[country_idx])
+                if len(country) > 2 and not NON_COUNTRY_PATTERN.search(country):
+                    countries.append(country)
+                    for i, year in year_idx.items():
+                        columns[year].append(parse_number(_cell_text(cells[i])))
+
+            # Drop rows that have been read so memory stays flat
+            elem.clear()
+            while elem.getprevious() is not None:
+                del elem.getparent()[0]
+
+    if columns is None or len(countries) < min_countries:
+        raise ValueError("Couldn't find GDP data table on the IMF website")
+
+    clean_df = pd.DataFrame({"Country": countries})
+    for year, values in columns.items():
+        clean_df[year] = np.array(values, dtype=np.float64)
+    return clean_df